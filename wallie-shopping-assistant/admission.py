@@ -0,0 +1,141 @@
+import asyncio
+import heapq
+import itertools
+import math
+import time
+from typing import Any, Callable, List, Optional
+
+from fastapi.concurrency import run_in_threadpool
+
+from deadline import remaining
+from metrics import CHAT_ADMISSIONS, CHAT_QUEUE_DEPTH, CHAT_QUEUE_WAIT
+from settings import CHAT_WORKERS, CHAT_QUEUE, CHAT_MAX_QUEUE_WAIT
+
+# Waiting turns run lowest number first. Checkout turns are the ones that
+# place orders; a new conversation's greeting is the cheapest to turn away.
+# Interim transcripts (speculation only, see speculation.py) rank below any turn.
+PHASE_PRIORITY = {"checkout": 0, "details": 1, "product_inquiry": 2, "greeting": 3, "interim": 4}
+# Weight of the latest turn in the running mean of turn time (for Retry-After)
+SERVICE_TIME_WEIGHT = 0.1
+
+
+class Overloaded(Exception):
+    """A turn was not admitted. retry_after is the suggested wait in whole seconds."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"chat overloaded ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bounded, prioritized admission for blocking chat turns.
+
+    At most `workers` turns run at once (on FastAPI's threadpool) and up to
+    `queue` more wait, by phase priority and then arrival. A new turn is
+    turned away when the queue is full and nothing waiting ranks below it
+    (otherwise the lowest-ranked waiter is shed to make room), when the
+    turns ahead of it would keep it waiting longer than `max_wait` seconds,
+    or when it has waited that long. Used only from the event loop, so it
+    needs no lock.
+    """
+
+    def __init__(self, workers: int = CHAT_WORKERS, queue: int = CHAT_QUEUE, max_wait: float = CHAT_MAX_QUEUE_WAIT):
+        self.workers = workers
+        self.queue = queue
+        self.max_wait = max_wait
+        self.running = 0
+        self.service_time: Optional[float] = None  # running mean of turn seconds
+        self._waiting: List[list] = []  # heap of [priority, arrival, future, phase]
+        self._arrivals = itertools.count()
+
+    async def run(self, phase: str, function: Callable[..., Any], *args) -> Any:
+        """Run function(*args) on a worker thread once admitted; raises Overloaded."""
+        await self._admit(phase)
+        started = time.monotonic()
+        try:
+            return await run_in_threadpool(function, *args)
+        finally:
+            seconds = time.monotonic() - started
+            self.service_time = seconds if self.service_time is None else \
+                self.service_time + SERVICE_TIME_WEIGHT * (seconds - self.service_time)
+            self._release()
+
+    def retry_after(self) -> int:
+        """Seconds until the current backlog should have drained, at least 1."""
+        backlog = (self.running + len(self._waiting)) / self.workers
+        return max(1, math.ceil(backlog * (self.service_time or 1.0)))
+
+    def expected_wait(self, priority: int) -> float:
+        """Estimated queueing time for a turn of `priority` arriving now (0 without a measured turn)."""
+        if self.service_time is None:
+            return 0.0
+        # Turns finish at about workers / service_time per second
+        ahead = sum(1 for entry in self._waiting if entry[0] <= priority)
+        return (ahead + 1) * self.service_time / self.workers
+
+    async def _admit(self, phase: str) -> None:
+        priority = PHASE_PRIORITY.get(phase, len(PHASE_PRIORITY))
+        if self.running < self.workers and not self._waiting:
+            self.running += 1
+            CHAT_ADMISSIONS.inc(result="admitted", phase=phase)
+            return
+        if len(self._waiting) >= self.queue:
+            lowest = max(self._waiting, default=None)
+            if lowest is None or lowest[0] <= priority:
+                raise self._rejected("queue_full", phase)
+            self._remove(lowest)
+            lowest[2].set_exception(self._rejected("shed", lowest[3]))
+        left = remaining()
+        max_wait = self.max_wait if left is None else min(self.max_wait, left)
+        if self.expected_wait(priority) > max_wait:
+            raise self._rejected("delay", phase)
+
+        entry = [priority, next(self._arrivals), asyncio.get_running_loop().create_future(), phase]
+        heapq.heappush(self._waiting, entry)
+        CHAT_QUEUE_DEPTH.set(len(self._waiting))
+        queued = time.monotonic()
+        try:
+            await asyncio.wait_for(entry[2], max_wait)
+        except asyncio.TimeoutError:
+            raise self._rejected("timeout", phase) from None
+        except asyncio.CancelledError:
+            # The slot may have been handed over just as the request went away
+            if entry[2].done() and not entry[2].cancelled() and entry[2].exception() is None:
+                self._release()
+            raise
+        finally:
+            if entry in self._waiting:
+                self._remove(entry)
+            CHAT_QUEUE_WAIT.observe(time.monotonic() - queued, phase=phase)
+        CHAT_ADMISSIONS.inc(result="admitted", phase=phase)
+
+    def _release(self) -> None:
+        """Hand the finished turn's slot to the first waiter, if any."""
+        while self._waiting:
+            entry = heapq.heappop(self._waiting)
+            CHAT_QUEUE_DEPTH.set(len(self._waiting))
+            if not entry[2].done():
+                entry[2].set_result(None)
+                return
+        self.running -= 1
+
+    def _remove(self, entry: list) -> None:
+        self._waiting.remove(entry)
+        heapq.heapify(self._waiting)
+        CHAT_QUEUE_DEPTH.set(len(self._waiting))
+
+    def _rejected(self, reason: str, phase: str) -> Overloaded:
+        CHAT_ADMISSIONS.inc(result=reason, phase=phase)
+        return Overloaded(reason, self.retry_after())
+
+
+_controller: Optional[AdmissionController] = None
+
+
+def chat_admission() -> AdmissionController:
+    """Process-wide controller shared by /chat and /ws/voice turns (created on the event loop)."""
+    global _controller
+    if _controller is None:
+        _controller = AdmissionController()
+    return _controller
@@ -0,0 +1,714 @@
+import hashlib
+import logging
+import threading
+import time
+import uuid
+from typing import Dict, List, Any, Tuple
+
+# Gemini AI
+import google.generativeai as genai
+
+from cart import Cart, parse_quantity
+from catalog import format_price
+from deadline import DeadlineExceeded, check_remaining, deadline, expired, remaining
+from fallback import fallback_reply
+from generation import generation_config, read_stream
+from intents import Utterance, analyze, detect_event, next_phase, product_index
+from metrics import (span, CACHE_LOOKUPS, FALLBACK_REPLIES, LLM_IN_FLIGHT, MODEL_FAILOVERS, PHASE_TRANSITIONS,
+                     PROMPT_TOKENS, REPLIES_CUT)
+from model_router import ModelRouter, shared_router
+from products import ProductService
+from prompt_cache import ContextCache, estimate_tokens, shared_context_cache
+from recorder import Recorder, default_recorder
+from settings import GEMINI_API_KEY, TURN_DEADLINE
+from tools import MAX_TOOL_ROUNDS, TOOLS, ModelReply, ShoppingTools, follow_up
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+genai.configure(api_key=GEMINI_API_KEY)
+
+# Per-turn part of each phase's prompt; the static part comes from
+# ShoppingAgent._get_static_prefix
+TURN_TEMPLATES = {
+    "greeting": """
+            The customer has just started the conversation.
+            """,
+    
+    "product_inquiry": """
+            Conversation history:
+            {conversation_history}
+            
+            Customer's message: {user_input}
+            """,
+    
+    "details": """
+            Conversation history:
+            {conversation_history}
+            
+            Customer's message: {user_input}
+            """,
+    
+    "checkout": """
+            Conversation history:
+            {conversation_history}
+            
+            Order: {order_summary}
+            
+            Customer's message: {user_input}
+            """,
+}
+
+# Said by the agent (not the model) once add_to_cart has succeeded
+CHECKOUT_PHRASE = "I have added to cart....Thank You!!!"
+
+# (phase, catalog version) -> (prefix id, static prefix), shared by all sessions
+_static_prefixes: Dict[Tuple[str, str], Tuple[str, str]] = {}
+_static_prefixes_lock = threading.Lock()
+
+
+class ConversationMemory:
+    """Manages conversation state and history."""
+    
+    def __init__(self):
+        """Initialize conversation memory."""
+        self.context = {"customer_info": {}, "order_info": {}}
+        self.messages = []
+        self.conversation_phase = "greeting"  # greeting, product_inquiry, details, checkout
+        
+    def add_user_message(self, message: str) -> None:
+        """Add user message to conversation history."""
+        self.messages.append({"role": "user", "content": message})
+        
+    def add_agent_message(self, message: str) -> None:
+        """Add agent message to conversation history."""
+        self.messages.append({"role": "agent", "content": message})
+        
+    def get_conversation_history(self, max_messages: int = 6, pending: str = None) -> str:
+        """Get formatted conversation history (limited to recent messages).
+        
+        `pending` is a user message not yet added, for planning a turn ahead.
+        """
+        messages = self.messages if pending is None else self.messages + [{"role": "user", "content": pending}]
+        # Get only the last N messages to keep prompts manageable
+        recent_messages = messages[-max_messages:] if len(messages) > max_messages else messages
+        
+        history = ""
+        for msg in recent_messages:
+            prefix = "Customer" if msg["role"] == "user" else "Assistant"
+            history += f"{prefix}: {msg['content']}\n"
+        return history
+    
+    def set_context(self, key: str, data: Dict[str, Any]) -> None:
+        """Set context information."""
+        self.context[key] = data
+        
+    def get_context(self, key: str, default: Any = None) -> Any:
+        """Get context information."""
+        return self.context.get(key, default)
+
+
+class ShoppingAgent:
+    """AI agent for conducting shopping assistance in Hinglish using Gemini API."""
+    
+    def __init__(self, model_name: str = "gemini-1.5-flash", product_service: ProductService = None,
+                 context_cache: ContextCache = None, recorder: Recorder = None, router: ModelRouter = None):
+        """Initialize the shopping agent."""
+        self.memory = ConversationMemory()
+        self.session_id = uuid.uuid4().hex
+        # Turn recording (settings.RECORD_PATH by default); per thread, so a
+        # speculative model call on another thread is never mixed in
+        self.recorder = recorder if recorder is not None else default_recorder()
+        self._recording = threading.local()
+        self._turns_recorded = 0
+        # Cart loaded outside a recorded turn (plan_turn for a speculation);
+        # recorded with the next turn, which replays the load
+        self._unrecorded_cart_sync = None
+        self._speech_handler = None
+        self.product_service = product_service or ProductService.shared()
+        self.running = False
+        self.last_product_mentioned = None  # Track last mentioned product
+        self.quantity = 1  # Pieces asked for ("do piece"), used at checkout
+        self.cart = Cart()  # Local mirror of the cart API, synced on first use
+        # Held by a turn and by speculative planning (see speculation.py), so
+        # they never change this session's memory or cart at the same time
+        self.turn_lock = threading.Lock()
+        
+        # Set up Gemini model; static prompt prefixes go through the context
+        # cache (the shared one from settings by default, False disables it).
+        # Cart and catalog actions are function calls (see tools.py)
+        self.model_name = model_name
+        self.model = genai.GenerativeModel(model_name, tools=TOOLS)
+        self._models = {model_name: self.model}
+        # Picks a model per turn (settings.MODEL_ROUTES by default); False
+        # sends every turn to model_name
+        self.router = router if router is not None else shared_router()
+        self.tools = ShoppingTools(self)
+        self.context_cache = context_cache if context_cache is not None else shared_context_cache()
+        
+        # One load per service, however many agents start at once; a service
+        # that already holds a catalog is used as-is
+        self.product_service.ensure_loaded()
+        
+        logger.info("Shopping agent initialized with database products")
+        logger.info(f"Loaded {len(self.product_service.catalog)} products")
+    
+    @property
+    def speech_handler(self):
+        """Voice I/O, created on first use so text-only servers never load audio libraries."""
+        if self._speech_handler is None:
+            from speech import SpeechHandler
+            self._speech_handler = SpeechHandler()
+        return self._speech_handler
+    
+    @property
+    def products(self) -> Dict[str, Any]:
+        """Legacy catalog view (ProductService.products_cache); follows background refreshes."""
+        return self.product_service.products_cache
+    
+    def _get_static_prefix(self, phase: str) -> Tuple[str, str]:
+        """(prefix id, prompt prefix) for a phase: persona, catalog and instructions.
+        
+        The prefix is identical for every turn of every session until the
+        catalog changes, so it is built once per catalog version and can be
+        cached with the model provider.
+        """
+        phase = phase if phase in TURN_TEMPLATES else "product_inquiry"
+        key = (phase, self.product_service.catalog.version)
+        cached = _static_prefixes.get(key)
+        if cached is not None:
+            CACHE_LOOKUPS.inc(cache="prompt_prefix", result="hit")
+            return cached
+        CACHE_LOOKUPS.inc(cache="prompt_prefix", result="miss")
+        
+        prefix = self._build_static_prefix(phase)
+        cached = (hashlib.blake2b(prefix.encode("utf-8"), digest_size=8).hexdigest(), prefix)
+        with _static_prefixes_lock:
+            # Only the current catalog's prefixes are worth keeping
+            for stale in [k for k in _static_prefixes if k[1] != key[1]]:
+                del _static_prefixes[stale]
+            _static_prefixes[key] = cached
+        return cached
+    
+    def prime_caches(self) -> None:
+        """Build what every first turn would otherwise build: the product index
+        and each phase's static prompt prefix for the current catalog."""
+        product_index(self.product_service.catalog)
+        for phase in TURN_TEMPLATES:
+            self._get_static_prefix(phase)
+    
+    def ping_model(self) -> int:
+        """Count the tokens of the product inquiry prefix: opens the model
+        client's connection without generating a reply or running tools."""
+        _, prefix = self._get_static_prefix("product_inquiry")
+        left = remaining()
+        request_options = {"timeout": max(left, 0.01)} if left is not None else None
+        return self.model.count_tokens(prefix, request_options=request_options).total_tokens
+    
+    def _build_static_prefix(self, phase: str) -> str:
+        """Build the static part of the prompt for a phase."""
+        
+        # Product list straight from the catalog columns (follows background refreshes)
+        catalog = self.product_service.catalog
+        products_list = ", ".join(catalog.names)
+        
+        # Products with ids and prices for detailed view
+        products_detailed = ", ".join(
+            f"{name} (id {int(catalog.ids[row])}, {format_price(catalog.prices[row])})"
+            for row, name in enumerate(catalog.names))
+        
+        templates = {
+            "greeting": f"""
+            You are a friendly shopping assistant speaking in Hinglish (mix of Hindi and English).
+            
+            Your goal is to help customers find and buy products.
+            Available products: {products_list}
+            
+            Start with a warm greeting in Hinglish.
+            Ask what they would like to buy today.
+            Keep your response concise (2-3 sentences).
+            """,
+            
+            "product_inquiry": f"""
+            You are a friendly shopping assistant speaking in Hinglish (mix of Hindi and English).
+            
+            Available products: {products_detailed}
+            
+            Help the customer by:
+            1. Understanding what they want to buy
+            2. Providing product details and benefits
+            3. Answering their questions
+            4. Moving toward finalizing their choice
+            
+            Use search_products or get_price for exact products and prices.
+            If the customer clearly orders something, call add_to_cart with its id and quantity.
+            
+            Respond in Hinglish with enthusiasm.
+            Keep your response concise (2-4 sentences).
+            """,
+            
+            "details": """
+            You are a friendly shopping assistant speaking in Hinglish (mix of Hindi and English).
+            
+            The customer has shown interest in a product. Now gather details like:
+            - Quantity needed
+            - Color preference (if applicable)
+            - Any specific requirements
+            - Confirm their choice
+            
+            Be helpful and move toward checkout.
+            Respond in Hinglish.
+            Keep your response concise (2-3 sentences).
+            """,
+            
+            "checkout": """
+            You are a friendly shopping assistant speaking in Hinglish (mix of Hindi and English).
+            
+            The customer is ready to buy. Complete the purchase by:
+            1. Calling add_to_cart with the product_id and quantity from the Order line
+            2. Confirming their order in Hinglish
+            3. Stating the order total exactly as given in the Order line (do not calculate it)
+            
+            Only call add_to_cart for what the customer confirmed. The cart confirmation is added for you.
+            Keep your response concise (2-3 sentences).
+            """
+        }
+        
+        return templates[phase]
+    
+    def _get_prompt_template(self, phase: str) -> str:
+        """Get the per-turn part of the prompt for the conversation phase."""
+        return TURN_TEMPLATES.get(phase, TURN_TEMPLATES["product_inquiry"])
+    
+    def _format_prompt(self, template: str, user_input: str = "") -> str:
+        """Format prompt template with context variables."""
+        return template.format(
+            conversation_history=self.memory.get_conversation_history(),
+            user_input=user_input,
+            order_summary=self._order_summary(template)
+        )
+    
+    def _order_summary(self, template: str, product: Dict[str, Any] = None, quantity: int = None) -> str:
+        """Exact order and cart total for the checkout prompt, from the local cart."""
+        if "{order_summary}" not in template:
+            return ""
+        self._sync_cart()
+        product = product or self.last_product_mentioned
+        if product and (self.memory.get_context("last_purchase") or {}).get("id") == product["id"]:
+            # Already ordered: an Order line for it would be placed again
+            product = None
+        return self.cart.describe_order(product, quantity or self.quantity)
+    
+    def _describe_cart(self) -> str:
+        """Answer to "cart mein kya hai": the cart, plus the product being discussed."""
+        self._sync_cart()
+        answer = self.cart.describe()
+        product = self.last_product_mentioned
+        if (product and self.memory.conversation_phase in ("details", "checkout")
+                and (self.memory.get_context("last_purchase") or {}).get("id") != product["id"]):
+            total = format_price(self.cart.total_with(product, self.quantity))
+            answer += f" {self.quantity} x {product['name']} add karne par total {total} hoga."
+        return answer
+    
+    def _sync_cart(self) -> None:
+        """Load the cart API's contents into the local cart, once per session."""
+        if self.cart.synced:
+            return
+        items = self.product_service.get_cart()
+        if items is not None:
+            self.cart.load(items)
+            if getattr(self._recording, "turn", None) is not None:
+                self._note_turn(cart_sync=items)
+            else:
+                self._unrecorded_cart_sync = items
+    
+    def generate_response(self, prompt: str, phase: str = None, user_input: str = "") -> str:
+        """Generate response using Gemini API, running any functions it calls.
+        
+        A turn the model cannot answer, or not before the turn's deadline,
+        is answered from local templates instead (see fallback.py).
+        """
+        try:
+            reply = self.draft_response(prompt, phase, user_input)
+        except Exception as e:
+            return self._fallback(e, phase)
+        return self.complete_response(reply)
+    
+    def _fallback(self, error: Exception, phase: str = None) -> str:
+        """Template reply from the catalog, the phase and the local cart; counted by reason."""
+        reason = "deadline" if isinstance(error, TimeoutError) or expired() else "error"
+        logger.error(f"Answering from templates ({reason}): {error}")
+        FALLBACK_REPLIES.inc(reason=reason)
+        self._note_turn(fallback=reason)
+        return fallback_reply(phase or self.memory.conversation_phase, self.product_service.catalog,
+                              self.last_product_mentioned, self.quantity, self.cart)
+    
+    def draft_response(self, prompt: str, phase: str = None, user_input: str = "") -> ModelReply:
+        """First model call of a turn; function calls are returned, not run.
+        
+        The router picks the model from the phase and the customer's message;
+        a failed call is retried on its next choice. With a phase, the
+        phase's static prefix goes first: as cached content when the context
+        cache has it, otherwise prepended to the prompt. Safe to call
+        speculatively (see speculation.py).
+        """
+        logger.info("Generating response...")
+        prefix_id, prefix = self._get_static_prefix(phase) if phase else (None, "")
+        candidates = (self.router.candidates(phase, user_input) if self.router else None) or [self.model_name]
+        error = None
+        for attempt, model_name in enumerate(candidates):
+            if expired():
+                error = DeadlineExceeded(f"turn deadline passed after {attempt} model attempts")
+                break
+            if attempt:
+                MODEL_FAILOVERS.inc(from_model=candidates[attempt - 1], to_model=model_name)
+                logger.warning(f"{candidates[attempt - 1]} failed ({error}), retrying on {model_name}")
+            model, contents, prefix_tokens = self._model(model_name), prompt, 0
+            if phase:
+                cached_model = None
+                if self.context_cache:
+                    cached_model = self.context_cache.model_for(model_name, phase, prefix_id, prefix, TOOLS)
+                if cached_model is not None:
+                    model, prefix_tokens = cached_model, estimate_tokens(prefix)
+                else:
+                    contents = prefix + prompt
+            
+            started = time.perf_counter()
+            try:
+                reply = self._call_model(model, contents, prefix_tokens, phase)
+            except Exception as e:
+                error = e
+                if self.router:
+                    self.router.record(model_name, time.perf_counter() - started, ok=False)
+                continue
+            elapsed = time.perf_counter() - started
+            if self.router:
+                self.router.record(model_name, elapsed, ok=True)
+            self._note_turn(prompt=prompt, prefix_id=prefix_id, model=model_name, model_s=round(elapsed, 6))
+            return reply
+        
+        self._note_turn(prompt=prompt, error=str(error))
+        raise error
+    
+    def draft_speculatively(self, prompt: str, phase: str = None,
+                            user_input: str = "") -> Tuple[ModelReply, Dict[str, Any]]:
+        """draft_response off the turn's thread, with what it noted for the turn record.
+        
+        The turn is recorded on the thread that commits it, so the noted
+        fields (prompt, model, model_s) go to run_conversation_chain with
+        the reply.
+        """
+        self._recording.turn = noted = {}
+        try:
+            return self.draft_response(prompt, phase, user_input), noted
+        finally:
+            self._recording.turn = None
+    
+    def _model(self, model_name: str) -> Any:
+        """Uncached model for a routed model name, one per name and agent."""
+        model = self._models.get(model_name)
+        if model is None:
+            model = self._models[model_name] = genai.GenerativeModel(model_name, tools=TOOLS)
+        return model
+    
+    def complete_response(self, reply: ModelReply) -> str:
+        """Run the functions a reply calls and return the turn's text.
+        
+        A confirmed add_to_cart is answered locally; results of the lookup
+        functions go back to the model, for at most MAX_TOOL_ROUNDS calls.
+        """
+        texts, error = [], None
+        for round_number in range(1, MAX_TOOL_ROUNDS + 1):
+            self._note_round(reply)
+            if reply.text:
+                texts.append(reply.text)
+            if not reply.calls:
+                break
+            results = [self.tools.execute(call) for call in reply.calls]
+            if all(call.name == "add_to_cart" for call in reply.calls):
+                texts.append(self._cart_confirmation(results))
+                break
+            if round_number == MAX_TOOL_ROUNDS:
+                logger.warning("Tool calls still pending after the last model round")
+                break
+            try:
+                check_remaining("tool results")
+                reply = self._call_model(reply.model, follow_up(reply, results),
+                                         phase=self.memory.conversation_phase)
+            except Exception as e:
+                logger.error(f"Gemini API error: {e}")
+                error = e
+                break
+        if not texts:
+            return self._fallback(error or ValueError("empty reply"))
+        return " ".join(texts)
+    
+    def _call_model(self, model: Any, contents: Any, prefix_tokens: int = 0, phase: str = None) -> ModelReply:
+        """One streamed model call with the phase's generation settings (see generation.py)."""
+        LLM_IN_FLIGHT.inc()
+        try:
+            # The call may take what is left of the turn's deadline, if one is set
+            left = remaining()
+            request_options = {"timeout": max(left, 0.01)} if left is not None else None
+            with span("model"):
+                response = model.generate_content(contents, generation_config=generation_config(phase),
+                                                  stream=True, request_options=request_options)
+                reply, cut = read_stream(response, phase, model, contents)
+            if cut:
+                REPLIES_CUT.inc(phase=phase)
+            self._record_prompt_tokens(response, estimate_tokens(str(contents)) + prefix_tokens)
+            return reply
+        finally:
+            LLM_IN_FLIGHT.dec()
+    
+    def _cart_confirmation(self, results: List[Dict[str, Any]]) -> str:
+        """What the customer hears after add_to_cart calls, from their results."""
+        added = [f"{r['quantity']} x {r['name']}" for r in results if r.get("ok")]
+        failed = [r.get("name") or r.get("error", "item") for r in results if not r.get("ok")]
+        parts = []
+        if failed:
+            parts.append(f"Sorry, {', '.join(failed)} cart mein add nahi ho paya. Kya main phir se try karun?")
+        if added:
+            # add_to_cart synced the mirror with the server cart first; without
+            # that sync the mirror may be missing items, so no total is said
+            total = f"Cart total: {format_price(self.cart.total())}. " if self.cart.synced else ""
+            parts.append(f"{', '.join(added)} aapke cart mein add ho gaya. {total}{CHECKOUT_PHRASE}")
+        return " ".join(parts)
+    
+    def _record_prompt_tokens(self, response: Any, estimated: int) -> None:
+        """Count input tokens, using the API's usage numbers when it reports them."""
+        usage = getattr(response, "usage_metadata", None)
+        total = getattr(usage, "prompt_token_count", None) or estimated
+        cached = getattr(usage, "cached_content_token_count", None) or 0
+        PROMPT_TOKENS.inc(cached, kind="cached")
+        PROMPT_TOKENS.inc(total - cached, kind="uncached")
+    
+    def _update_conversation_phase(self, user_input: str, utterance: Utterance = None) -> None:
+        """Update conversation phase based on the user's message."""
+        if utterance is None:
+            utterance = self._analyze(user_input)
+        # One event per turn (decline > confirm > product), looked up in the
+        # intents.TRANSITIONS table
+        self._advance_phase(detect_event(utterance))
+    
+    def _advance_phase(self, event: str) -> None:
+        previous_phase = self.memory.conversation_phase
+        self.memory.conversation_phase = next_phase(previous_phase, event)
+        if self.memory.conversation_phase != previous_phase:
+            PHASE_TRANSITIONS.inc(from_phase=previous_phase, to_phase=self.memory.conversation_phase)
+        logger.info(f"Updated phase to: {self.memory.conversation_phase}")
+    
+    @span("checkout")
+    def add_to_cart(self, product: Dict[str, Any], quantity: int = 1) -> bool:
+        """Add a product through the cart API (the add_to_cart tool); ends the conversation on success."""
+        # Load what the server cart already holds before mirroring this add
+        self._sync_cart()
+        synced = self.cart.synced
+        success = self.product_service.add_to_cart(product['id'], quantity)
+        self._note_cart(product['id'], quantity, success)
+        if not success:
+            logger.error(f"Failed to add {product['name']} to cart")
+            return False
+        
+        if not synced:
+            # The earlier read failed; one made now already includes this add
+            self._sync_cart()
+        if synced or not self.cart.synced:
+            self.cart.add(product, quantity)
+        self.memory.set_context("last_purchase", product)
+        # The order is done; the next one starts from a new mention
+        self.last_product_mentioned = None
+        self.quantity = 1
+        logger.info(f"Added {quantity} x {product['name']} to cart successfully")
+        self._advance_phase("cart_added")
+        self.running = False
+        logger.info("Conversation ending - checkout complete")
+        return True
+    
+    def _analyze(self, user_input: str) -> Utterance:
+        """Intents and product mentions of a message against the current catalog."""
+        return analyze(user_input, product_index(self.product_service.catalog))
+    
+    def _is_product_mentioned(self, user_input: str) -> bool:
+        """Check if user mentioned any product from the database."""
+        return self._analyze(user_input).mentions_product
+
+    def _track_product_mention(self, user_input: str, utterance: Utterance = None) -> None:
+        """Remember the first product named in the user's message."""
+        catalog = self.product_service.catalog
+        if utterance is None:
+            utterance = analyze(user_input, product_index(catalog))
+        if utterance.product_row is not None:
+            self.last_product_mentioned = catalog.record(utterance.product_row)
+            # Naming the last purchase again asks for another one
+            if (self.memory.get_context("last_purchase") or {}).get("id") == self.last_product_mentioned["id"]:
+                self.memory.set_context("last_purchase", None)
+    
+    def _begin_turn_record(self, kind: str, user_input: str = "") -> None:
+        if not self.recorder:
+            return
+        self._recording.started = time.perf_counter()
+        self._recording.turn = {
+            "session": self.session_id,
+            "turn": self._turns_recorded,
+            "kind": kind,
+            "ts": round(time.time(), 3),
+            "input": user_input,
+            "phase_before": self.memory.conversation_phase,
+            "catalog": self.product_service.catalog.version,
+            "cart": [],
+        }
+        if self._unrecorded_cart_sync is not None:
+            self._recording.turn["cart_sync"], self._unrecorded_cart_sync = self._unrecorded_cart_sync, None
+    
+    def _note_turn(self, **fields) -> None:
+        turn = getattr(self._recording, "turn", None)
+        if turn is not None:
+            turn.update(fields)
+    
+    def _note_round(self, reply: ModelReply) -> None:
+        turn = getattr(self._recording, "turn", None)
+        if turn is not None:
+            turn.setdefault("rounds", []).append(
+                {"text": reply.text, "calls": [{"name": call.name, "args": call.args} for call in reply.calls]})
+    
+    def _note_cart(self, product_id: int, quantity: int, success: bool) -> None:
+        turn = getattr(self._recording, "turn", None)
+        if turn is not None:
+            turn["cart"].append({"product_id": product_id, "quantity": quantity, "ok": success})
+    
+    def _end_turn_record(self, output: str) -> None:
+        turn = getattr(self._recording, "turn", None)
+        if turn is None:
+            return
+        self._recording.turn = None
+        turn["output"] = output
+        turn["phase"] = self.memory.conversation_phase
+        turn["turn_s"] = round(time.perf_counter() - self._recording.started, 6)
+        self._turns_recorded += 1
+        self.recorder.record(turn)
+    
+    def run_greeting_chain(self) -> str:
+        """Generate greeting message to start the conversation."""
+        self._begin_turn_record("greeting")
+        with span("prompt_build"):
+            template = self._get_prompt_template("greeting")
+            prompt = self._format_prompt(template)
+        
+        result = self.generate_response(prompt, "greeting")
+        
+        # Add to conversation history
+        self.memory.add_agent_message(result)
+        self._end_turn_record(result)
+        return result
+    
+    def plan_turn(self, user_input: str) -> Tuple[str, str]:
+        """(phase, prompt) that the next turn would use for this message.
+        
+        Changes no state, so a reply can be generated speculatively while the
+        customer is still speaking and passed to run_conversation_chain later.
+        """
+        utterance = self._analyze(user_input)
+        phase = next_phase(self.memory.conversation_phase, detect_event(utterance))
+        history = self.memory.get_conversation_history(pending=user_input)
+        product = None if utterance.product_row is None else self.product_service.catalog.record(utterance.product_row)
+        template = self._get_prompt_template(phase)
+        order_summary = self._order_summary(template, product, parse_quantity(user_input))
+        prompt = template.format(conversation_history=history, user_input=user_input, order_summary=order_summary)
+        return phase, prompt
+    
+    @span("turn")
+    def run_conversation_chain(self, user_input: str, reply: Any = None, noted: Dict[str, Any] = None) -> str:
+        """Generate response to user input during the conversation.
+        
+        `reply` is a response already drafted for this turn (see plan_turn
+        and draft_speculatively); the model is then not called again for it,
+        though its function calls run now. `noted` is what the draft noted
+        for the turn record.
+        """
+        self._begin_turn_record("turn", user_input)
+        if noted is not None:
+            self._note_turn(speculative=True, **noted)
+        
+        # Add user input to memory
+        self.memory.add_user_message(user_input)
+        
+        # Track mentioned products; the message is scanned once for both
+        # product mentions and intents
+        with span("mention_detection"):
+            utterance = self._analyze(user_input)
+            self._track_product_mention(user_input, utterance)
+            self.quantity = parse_quantity(user_input) or self.quantity
+        
+        if "cart_query" in utterance.intents:
+            # Contents and totals come from the local cart, not the model;
+            # the phase stays where it was
+            with span("cart_query"):
+                result = self._describe_cart()
+        else:
+            # Update conversation phase BEFORE generating response
+            with span("phase_update"):
+                self._update_conversation_phase(user_input, utterance)
+            
+            if isinstance(reply, ModelReply):
+                result = self.complete_response(reply)
+            elif reply is not None:
+                result = reply
+            else:
+                # Get appropriate template based on current phase
+                with span("prompt_build"):
+                    template = self._get_prompt_template(self.memory.conversation_phase)
+                    prompt = self._format_prompt(template, user_input)
+                
+                result = self.generate_response(prompt, self.memory.conversation_phase, user_input)
+        
+        # Add response to memory
+        self.memory.add_agent_message(result)
+        
+        self._end_turn_record(result)
+        return result
+    
+    def start_shopping(self) -> None:
+        """Start the shopping conversation."""
+        self.running = True
+        logger.info("Starting shopping session")
+        
+        try:
+            # Greeting; every turn gets TURN_DEADLINE seconds from here on
+            with deadline(TURN_DEADLINE):
+                greeting = self.run_greeting_chain()
+            self.speech_handler.speak(greeting)
+            
+            # Main conversation loop
+            while self.running:
+                user_input = self.speech_handler.recognize_speech()
+                
+                # Check for exit commands
+                if user_input.lower() in ["bye", "goodbye", "end", "quit", "exit", "bye-bye"]:
+                    break
+                
+                # Process non-empty input
+                if user_input:
+                    with deadline(TURN_DEADLINE):
+                        response = self.run_conversation_chain(user_input)
+                    self.speech_handler.speak(response)
+                    
+                    # add_to_cart ends the conversation
+                    if not self.running:
+                        break
+            
+        except Exception as e:
+            logger.error(f"Error during shopping: {e}")
+            print(f"An error occurred: {e}")
+        finally:
+            self.end_shopping()
+    
+    def end_shopping(self) -> None:
+        """End the shopping session."""
+        self.running = False
+        logger.info("Shopping session ended")
+        print("Shopping session ended!")
@@ -0,0 +1,210 @@
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Devanagari -> Latin, by code point. Consonants carry an inherent "a" that
+# a vowel sign (matra) replaces and the virama removes.
+CONSONANTS: Dict[str, str] = dict(zip(
+    map(chr, range(0x0915, 0x093A)),
+    "k kh g gh n ch chh j jh n t th d dh n t th d dh n n p ph b bh m y r r l l l v sh sh s h".split(),
+))
+# Precomposed nukta letters (qa, khha, ghha, za, dddha, rha, fa, yya)
+CONSONANTS.update(zip(map(chr, range(0x0958, 0x0960)), "k kh g z d dh f y".split()))
+VOWELS: Dict[str, str] = dict(zip(
+    map(chr, range(0x0905, 0x0915)),
+    "a aa i ii u uu ri li e e e ai o o o au".split(),
+))
+MATRAS: Dict[str, str] = dict(zip(
+    map(chr, range(0x093E, 0x094D)),
+    "aa i ii u uu ri ri e e e ai o o o au".split(),
+))
+# Consonant + nukta written as two code points
+NUKTA_FORMS = {"ph": "f", "j": "z"}
+NASALS = {"\u0901": "n", "\u0902": "n", "\u0903": "h"}  # chandrabindu, anusvara, visarga
+VIRAMA = "\u094D"
+NUKTA = "\u093C"
+DEVANAGARI_RE = re.compile(r"[\u0900-\u097F]")
+
+# Curated Hindi / Hinglish words for product-name words, for what
+# transliteration cannot guess ("ghadi" is not a spelling of "watch").
+# Keys are matched against the words of catalog names. Spoken forms are
+# matched exactly (lowercased), never by phonetic key: the keys of these
+# short words are shared by everyday verbs ("juta" ~ "jata", "ghadi" ~
+# "gud"), so every accepted spelling is listed.
+SYNONYMS: Dict[str, List[str]] = {
+    "watch": ["ghadi", "ghadee", "ghari", "घड़ी", "घडी"],
+    "shoes": ["joote", "joota", "juta", "जूते", "जूता"],
+    "shoe": ["joota", "juta", "जूता"],
+    "bag": ["jhola", "thaila", "थैला", "झोला"],
+    "backpack": ["bag", "basta", "bastaa", "बस्ता", "बैग"],
+    "shirt": ["kameez", "kamiz", "कमीज़", "कमीज"],
+    "kurta": ["कुर्ता"],
+    "saree": ["sari", "saadi", "साड़ी", "साडी"],
+    "sunglasses": ["chashma", "chasma", "चश्मा"],
+    "glasses": ["chashma", "chasma", "चश्मा"],
+    "bottle": ["botal", "बोतल"],
+    "smartphone": ["mobile", "phone", "फोन", "फ़ोन", "मोबाइल"],
+    "phone": ["mobile", "मोबाइल"],
+    "umbrella": ["chhata", "chhaata", "chata", "छाता"],
+    "book": ["kitab", "kitaab", "किताब"],
+    "pen": ["kalam", "कलम"],
+    "toy": ["khilona", "खिलौना"],
+    "perfume": ["itr", "itra", "attar", "इत्र"],
+    "chair": ["kursi", "कुर्सी"],
+    "table": ["mez", "mej", "मेज़", "मेज"],
+    "blanket": ["kambal", "कंबल", "कम्बल"],
+    "socks": ["moze", "moje", "मोज़े", "मोजे"],
+    "wallet": ["batua", "batwa", "बटुआ"],
+    "headphones": ["earphone", "earphones", "ईयरफोन"],
+}
+
+# Everyday words never read as a product name, whatever key they share
+# with one ("cart" ~ "kurta", "ghar" ~ "ghari")
+COMMON_WORDS = {
+    "cart", "order", "price", "total", "size", "color", "rang", "ghar", "gaadi", "gadi", "gaddi",
+    "kart", "kar", "karo", "karna", "kitna", "kitne", "kaisa", "wala", "wali", "waala",
+    # Verbs and particles heard in almost every message
+    "jata", "jaata", "jaate", "jate", "jati", "jaati", "jana", "jaana", "jao", "jeet", "gud",
+    "hai", "hain", "ho", "hoga", "hogi", "tha", "thi", "raha", "rahi", "rahe", "baste", "basti",
+    "कार्ट", "घर", "गाड़ी", "रंग", "जाता", "जाती", "जाते", "है", "हैं",
+}
+
+# Automatic (non-curated) keys shorter than this are not indexed: short
+# keys collide with everyday Hinglish ("mein", "hai")
+MIN_KEY_LENGTH = 4
+
+
+def transliterate(text: str) -> str:
+    """Romanize Devanagari the way Hinglish is typed (हेडफोन -> hedphon).
+
+    Inherent vowels are dropped at the end of a word and between a vowel
+    and a following syllable with a vowel sign, a simplified form of Hindi
+    schwa deletion. Other characters pass through unchanged.
+    """
+    if not DEVANAGARI_RE.search(text):
+        return text
+    out = []
+    syllables: List[List[str]] = []  # [consonant, vowel, coda, inherent]
+
+    def flush():
+        for i, (consonant, vowel, coda, inherent) in enumerate(syllables):
+            if inherent:
+                last = i == len(syllables) - 1
+                # Nearest vowel before, across a cluster (स्मार्टफोन -> smaartphon)
+                j = i - 1
+                while j >= 0 and not syllables[j][1] and not syllables[j][3]:
+                    j -= 1
+                after_vowel = j >= 0 and syllables[j][1]
+                # The next syllable keeps a vowel of its own (a sign, or an
+                # inherent one that is not itself word-final)
+                before_vowel = i + 1 < len(syllables) and syllables[i + 1][1] and not (
+                    syllables[i + 1][3] and i + 2 == len(syllables))
+                if last or (after_vowel and before_vowel):
+                    vowel = syllables[i][1] = ""
+            out.append(consonant + vowel + coda)
+        syllables.clear()
+
+    for char in text:
+        if char in CONSONANTS:
+            syllables.append([CONSONANTS[char], "a", "", True])
+        elif char in VOWELS:
+            syllables.append(["", VOWELS[char], "", False])
+        elif char in MATRAS and syllables:
+            syllables[-1][1] = MATRAS[char]
+            syllables[-1][3] = False
+        elif char == VIRAMA and syllables:
+            syllables[-1][1] = ""
+            syllables[-1][3] = False
+        elif char == NUKTA and syllables:
+            syllables[-1][0] = NUKTA_FORMS.get(syllables[-1][0], syllables[-1][0])
+        elif char in NASALS and syllables:
+            syllables[-1][2] += NASALS[char]
+        elif DEVANAGARI_RE.match(char):
+            continue  # other signs (avagraha, dandas, digits) carry no sound we key on
+        else:
+            flush()
+            out.append(char)
+    flush()
+    return "".join(out)
+
+
+# Spellings of one sound, applied in order to a lowercased romanized word
+PHONETIC_RULES: List[Tuple[re.Pattern, str]] = [(re.compile(pattern), replacement) for pattern, replacement in [
+    (r"[^a-z]", ""),
+    (r"ph", "f"),
+    (r"ck", "k"),
+    (r"tch", "ch"),
+    (r"c(?!h)", "k"),
+    (r"ch", "c"),
+    (r"sh", "s"),
+    (r"x", "ks"),
+    (r"(?<=ss)es$", ""),   # "sunglasses" ~ "sunglass"
+    (r"q", "k"),
+    (r"z", "j"),
+    (r"w", "v"),
+    (r"(?<=.)h", ""),      # aspiration: "ghadi" ~ "gadi", "kh" ~ "k"
+    (r"(.)\1+", r"\1"),    # doubled letters: "kitaab" ~ "kitab"
+    (r"(?<=...)s$", ""),   # plurals: "headphones" ~ "headphone"
+    (r"[aeiou]+", "a"),    # vowel quality varies too much across spellings
+    (r"(?<=.)a$", ""),     # final vowel: "phone" ~ "fon"
+]]
+
+
+@lru_cache(maxsize=65536)
+def phonetic_key(word: str) -> str:
+    """Common key for English, Hinglish and Devanagari spellings of a word.
+
+    Vowel runs collapse to one "a" and aspiration, doubled letters and
+    plural "s" are dropped, so "headphones", "hedfon" and हेडफोन all give
+    "hadfan".
+    """
+    key = transliterate(word).lower()
+    for pattern, replacement in PHONETIC_RULES:
+        key = pattern.sub(replacement, key)
+    return key
+
+
+class AliasIndex:
+    """Alias lookup of product rows for one catalog version.
+
+    Curated synonyms are indexed by their exact (lowercased) spoken form and
+    every product-name word under its phonetic key, if that key is long
+    enough to be distinctive, so a Devanagari or Hinglish mention is one or
+    two dict lookups per token.
+    """
+
+    def __init__(self, names: Iterable[Tuple[int, List[str]]], synonyms: Dict[str, List[str]] = SYNONYMS):
+        names = list(names)
+        self.exact: Dict[str, int] = {}
+        self.keys: Dict[str, int] = {}
+        word_rows: Dict[str, int] = {}
+        for row, tokens in names:
+            for token in tokens:
+                word_rows.setdefault(token, row)
+        for word, spoken_forms in synonyms.items():
+            row = word_rows.get(word)
+            if row is None:
+                continue
+            for spoken in spoken_forms:
+                self.exact.setdefault(spoken.lower(), row)
+        # word_rows already holds each word's first row
+        for word, row in word_rows.items():
+            if word.isdigit():
+                continue
+            key = phonetic_key(word)
+            if len(key) >= MIN_KEY_LENGTH:
+                self.keys.setdefault(key, row)
+
+    def find(self, tokens: List[str]) -> Optional[int]:
+        """Row of the first token (or adjacent pair, "head phone") that is a curated alias or has a known key."""
+        for start, token in enumerate(tokens):
+            if token in COMMON_WORDS:
+                continue
+            row = self.exact.get(token)
+            if row is None:
+                row = self.keys.get(phonetic_key(token))
+            if row is None and start + 1 < len(tokens):
+                row = self.keys.get(phonetic_key(token + tokens[start + 1]))
+            if row is not None:
+                return row
+        return None
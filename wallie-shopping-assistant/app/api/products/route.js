@@ -2,22 +2,72 @@
 import { NextResponse } from "next/server";
 import { db } from "@/utils/db";
 import { Product } from "@/utils/schema";
+import { and, asc, count, gt, lte, max } from "drizzle-orm";
+import { encode } from "@/lib/msgpack";
 
-export async function GET() {
+const MAX_PAGE_SIZE = 5000;
+
+const productColumns = {
+  id: Product.id,
+  name: Product.name,
+  description: Product.description,
+  price: Product.price,
+  imageUrl: Product.imageUrl,
+  category: Product.category,
+};
+
+export async function GET(req) {
   try {
-    // Fetch all products from database
-    const products = await db
-      .select({
-        id: Product.id,
-        name: Product.name,
-        description: Product.description,
-        price: Product.price,
-        imageUrl: Product.imageUrl,
-        category: Product.category,
-      })
-      .from(Product);
-
-    return NextResponse.json(products);
+    const params = req.nextUrl.searchParams;
+
+    // No limit: return every product as a plain array (original behaviour)
+    if (!params.has("limit")) {
+      const products = await db.select(productColumns).from(Product);
+      return NextResponse.json(products);
+    }
+
+    // Keyset pagination on id: ?limit=N&cursor=<last id>&until=<max id>
+    const limit = Math.min(
+      Math.max(parseInt(params.get("limit"), 10) || 1, 1),
+      MAX_PAGE_SIZE
+    );
+    const cursor = parseInt(params.get("cursor"), 10);
+    const until = parseInt(params.get("until"), 10);
+
+    const conditions = [];
+    if (!Number.isNaN(cursor)) conditions.push(gt(Product.id, cursor));
+    if (!Number.isNaN(until)) conditions.push(lte(Product.id, until));
+
+    const items = await db
+      .select(productColumns)
+      .from(Product)
+      .where(conditions.length ? and(...conditions) : undefined)
+      .orderBy(asc(Product.id))
+      .limit(limit);
+
+    const body = {
+      items,
+      nextCursor: items.length === limit ? items[items.length - 1].id : null,
+    };
+
+    // The first page also describes the whole table so clients can
+    // split the remaining id range and fetch it in parallel
+    if (Number.isNaN(cursor)) {
+      const [stats] = await db
+        .select({ total: count(), maxId: max(Product.id) })
+        .from(Product);
+      body.total = stats.total;
+      body.maxId = stats.maxId;
+    }
+
+    // Compact binary encoding for clients that ask for it
+    if ((req.headers.get("accept") || "").includes("application/x-msgpack")) {
+      return new NextResponse(encode(body), {
+        headers: { "Content-Type": "application/x-msgpack" },
+      });
+    }
+
+    return NextResponse.json(body);
   } catch (error) {
     console.error("Error fetching products:", error);
     return NextResponse.json(
@@ -2,7 +2,7 @@
 import { NextResponse } from "next/server";
 import { db } from "@/utils/db";
 import { CartItem, Product } from "@/utils/schema";
-import { eq } from "drizzle-orm";
+import { and, eq } from "drizzle-orm";
 
 export async function POST(req) {
   try {
@@ -33,8 +33,7 @@ export async function POST(req) {
     const existingItem = await db
       .select()
       .from(CartItem)
-      .where(eq(CartItem.productId, productId))
-      .where(eq(CartItem.email, email))
+      .where(and(eq(CartItem.productId, productId), eq(CartItem.email, email)))
       .limit(1);
 
     if (existingItem.length > 0) {
@@ -65,3 +64,37 @@ export async function POST(req) {
     );
   }
 }
+
+// Lets the voice assistant mirror the cart: ?email= gives its items with
+// current names and prices
+export async function GET(req) {
+  try {
+    const email = new URL(req.url).searchParams.get("email");
+
+    if (!email) {
+      return NextResponse.json(
+        { error: "Email is required" },
+        { status: 400 }
+      );
+    }
+
+    const items = await db
+      .select({
+        productId: CartItem.productId,
+        quantity: CartItem.quantity,
+        name: Product.name,
+        price: Product.price,
+      })
+      .from(CartItem)
+      .innerJoin(Product, eq(CartItem.productId, Product.id))
+      .where(eq(CartItem.email, email));
+
+    return NextResponse.json({ success: true, items });
+  } catch (error) {
+    console.error("Error reading cart:", error);
+    return NextResponse.json(
+      { error: "Failed to read cart" },
+      { status: 500 }
+    );
+  }
+}
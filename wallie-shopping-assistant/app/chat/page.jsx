@@ -1,9 +1,20 @@
 "use client";
-import { useState } from "react";
+import { useRef, useState } from "react";
+
+const BACKEND_URL = "http://localhost:8000";
+// Send an interim transcript at most this often while the user is speaking
+const INTERIM_INTERVAL_MS = 300;
 
 export default function ChatPage() {
   const [listening, setListening] = useState(false);
   const [chat, setChat] = useState([]); // { role: 'user' | 'agent', text: string }
+  const sessionId = useRef(null);
+  const lastInterim = useRef({ text: "", sentAt: 0 });
+
+  const getSessionId = () => {
+    if (!sessionId.current) sessionId.current = crypto.randomUUID();
+    return sessionId.current;
+  };
 
   const handleVoiceInput = () => {
     if (!("webkitSpeechRecognition" in window)) {
@@ -14,13 +25,20 @@ export default function ChatPage() {
     const recognition = new window.webkitSpeechRecognition();
     recognition.lang = "en-IN";
     recognition.continuous = false;
-    recognition.interimResults = false;
+    // Interim results let the server start on the reply before we finish speaking
+    recognition.interimResults = true;
 
     setListening(true);
+    lastInterim.current = { text: "", sentAt: 0 };
     recognition.start();
 
     recognition.onresult = async (event) => {
-      const transcript = event.results[0][0].transcript;
+      const result = event.results[0];
+      const transcript = result[0].transcript;
+      if (!result.isFinal) {
+        sendInterim(transcript);
+        return;
+      }
       setListening(false);
       addMessage("user", transcript);
       await sendToBackend(transcript);
@@ -34,12 +52,24 @@ export default function ChatPage() {
     recognition.onend = () => setListening(false);
   };
 
+  const sendInterim = (text) => {
+    const now = Date.now();
+    const last = lastInterim.current;
+    if (!text.trim() || text === last.text || now - last.sentAt < INTERIM_INTERVAL_MS) return;
+    lastInterim.current = { text, sentAt: now };
+    fetch(`${BACKEND_URL}/chat/interim`, {
+      method: "POST",
+      headers: { "Content-Type": "application/json" },
+      body: JSON.stringify({ text, session_id: getSessionId() }),
+    }).catch((err) => console.error("Interim transcript error:", err));
+  };
+
   const sendToBackend = async (text) => {
     try {
-      const res = await fetch("http://localhost:8000/chat", {
+      const res = await fetch(`${BACKEND_URL}/chat`, {
         method: "POST",
         headers: { "Content-Type": "application/json" },
-        body: JSON.stringify({ text }),
+        body: JSON.stringify({ text, session_id: getSessionId() }),
       });
       const data = await res.json();
       const reply = data.reply;
@@ -52,6 +82,17 @@ export default function ChatPage() {
 
   const speak = (text) => {
     if (!text.trim()) return;
+    // Server-side TTS streams MP3 and is cached by ETag; the browser voice is
+    // only a fallback, as hi-IN is missing or slow on many low-end devices
+    const audio = new Audio(`${BACKEND_URL}/tts?text=${encodeURIComponent(text)}`);
+    audio.play().catch((err) => {
+      console.error("TTS playback error:", err);
+      speakInBrowser(text);
+    });
+  };
+
+  const speakInBrowser = (text) => {
+    if (!("speechSynthesis" in window)) return;
     const utterance = new SpeechSynthesisUtterance(text);
     utterance.lang = "hi-IN";
     window.speechSynthesis.speak(utterance);
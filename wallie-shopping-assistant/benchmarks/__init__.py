@@ -0,0 +1,2 @@
+# Offline benchmarks for the shopping assistant; run from the project root,
+# e.g. `python -m benchmarks.startup`.
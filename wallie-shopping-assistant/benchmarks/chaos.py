@@ -0,0 +1,175 @@
+"""Chaos harness: scripted conversations against injected model, catalog and cart faults.
+
+Each scenario file (see benchmarks/scenarios/) sets delays, errors,
+partial responses and dropped connections for the fake model fleet
+("model", see fakes.FakeFleetModel) and for the fake catalog and cart API
+("backend", see fake_backend.FakeBackend), plus the SLOs the run must meet.
+Every turn runs under the scenario's turn deadline. Besides the SLOs, each
+run checks that no turn raised or answered with nothing, that the catalog
+loaded, and that no order was confirmed to the customer which the cart API
+did not apply:
+
+    python -m benchmarks.chaos benchmarks/scenarios/*.json
+    python -m benchmarks.chaos benchmarks/scenarios/cart_drops.json --output chaos.json
+
+Exits with status 1 if any check fails.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+from benchmarks import fakes
+from benchmarks.fake_backend import FakeBackend
+from benchmarks.turn_latency import CONVERSATIONS, percentile, summarize
+
+
+def converse(service, router, script: List[str], turn_deadline: float) -> Dict[str, Any]:
+    """One scripted conversation; the replies, turn times, recorded turns and any error."""
+    from agent import ShoppingAgent
+    from deadline import deadline
+    from recorder import MemoryRecorder
+
+    recorder = MemoryRecorder()
+    agent = ShoppingAgent(product_service=service, context_cache=False, recorder=recorder, router=router)
+    conversation = {"replies": [], "turns": [], "records": recorder.entries, "error": None}
+    try:
+        for user_input in [None] + script:
+            started = time.perf_counter()
+            with deadline(turn_deadline):
+                if user_input is None:
+                    reply = agent.run_greeting_chain()
+                else:
+                    reply = agent.run_conversation_chain(user_input)
+            conversation["turns"].append(time.perf_counter() - started)
+            conversation["replies"].append(reply)
+    except Exception as e:
+        conversation["error"] = f"{type(e).__name__}: {e}"
+    return conversation
+
+
+def check_orders(conversations: List[Dict[str, Any]], applied: Counter) -> List[str]:
+    """Orders the customer was told about that the cart API never applied."""
+    from agent import CHECKOUT_PHRASE
+
+    problems = []
+    confirmed: Counter = Counter()
+    for conversation in conversations:
+        for record in conversation["records"]:
+            ok = [call for call in record.get("cart", []) if call["ok"]]
+            for call in ok:
+                confirmed[int(call["product_id"])] += call["quantity"]
+            if CHECKOUT_PHRASE in (record.get("output") or "") and not ok:
+                problems.append(f"turn {record['turn']} confirmed an order without a successful cart call")
+    for product_id, quantity in confirmed.items():
+        if quantity > applied[product_id]:
+            problems.append(f"product {product_id}: {quantity} confirmed, {applied[product_id]} in the cart")
+    return problems
+
+
+def run(scenario: Dict[str, Any]) -> Dict[str, Any]:
+    import settings
+    from metrics import FALLBACK_REPLIES
+    from model_router import ModelRouter
+    from products import ProductService
+
+    seed = scenario.get("seed", 42)
+    fleet = fakes.fake_fleet_class(scenario.get("model", {}), seed)
+    fakes.install(fleet)
+    router = ModelRouter(settings.MODEL_ROUTES, window=settings.ROUTER_WINDOW,
+                         max_error_rate=settings.ROUTER_MAX_ERROR_RATE,
+                         latency_budget=scenario.get("latency_budget", settings.ROUTER_LATENCY_BUDGET),
+                         cooldown=scenario.get("cooldown", settings.ROUTER_COOLDOWN))
+    scripts = CONVERSATIONS * scenario.get("repeats", 1)
+    turn_deadline = scenario.get("turn_deadline", settings.TURN_DEADLINE)
+    fallbacks_before = sum(FALLBACK_REPLIES.value(reason=reason) for reason in ("deadline", "error"))
+
+    with FakeBackend(product_count=scenario.get("product_count", 10), faults=scenario.get("backend"),
+                     seed=seed) as backend, tempfile.TemporaryDirectory() as tmp:
+        service = ProductService(base_url=backend.base_url, snapshot_path=os.path.join(tmp, "catalog.snapshot"),
+                                 timeout=scenario.get("api_timeout", settings.API_TIMEOUT))
+        started = time.perf_counter()
+        service.ensure_loaded()
+        catalog_load = time.perf_counter() - started
+        with ThreadPoolExecutor(max_workers=scenario.get("concurrency", 1)) as pool:
+            conversations = list(pool.map(lambda script: converse(service, router, script, turn_deadline),
+                                          scripts))
+        applied: Counter = Counter()
+        for payload in backend.cart:
+            applied[int(payload["productId"])] += int(payload.get("quantity", 1))
+        injected = {f"{route}/{outcome}": count for (route, outcome), count in sorted(backend.injected.items())}
+
+    turns = [seconds for conversation in conversations for seconds in conversation["turns"]]
+    replies = [reply for conversation in conversations for reply in conversation["replies"]]
+    fallbacks = sum(FALLBACK_REPLIES.value(reason=reason) for reason in ("deadline", "error")) - fallbacks_before
+    checkouts = sum(any(call["ok"] for record in conversation["records"] for call in record.get("cart", []))
+                    for conversation in conversations)
+
+    checks = {
+        "no_errors": [c["error"] for c in conversations if c["error"]],
+        "no_empty_replies": [f"{sum(not reply.strip() for reply in replies)} empty replies"]
+        if not all(reply.strip() for reply in replies) else [],
+        "catalog_loaded": [] if len(service.catalog) else ["no catalog after ensure_loaded"],
+        "no_phantom_orders": check_orders(conversations, applied),
+    }
+    slo = scenario.get("slo", {})
+    observed = {
+        "turn_p95_ms": percentile(turns, 95) * 1000 if turns else 0.0,
+        "turn_max_ms": max(turns, default=0.0) * 1000,
+        "fallback_rate_max": fallbacks / max(len(turns), 1),
+        "checkout_rate_min": checkouts / len(conversations),
+    }
+    for name, limit in slo.items():
+        value = observed[name]
+        met = value >= limit if name.endswith("_min") else value <= limit
+        checks[f"slo_{name}"] = [] if met else [f"{value:.3f} against {limit}"]
+
+    return {
+        "turn": summarize(turns) if turns else {},
+        "catalog_load_ms": round(catalog_load * 1000, 1),
+        "catalog_products": len(service.catalog),
+        "conversations": len(conversations),
+        "checkouts": checkouts,
+        "fallback_replies": int(fallbacks),
+        "model_calls": dict(fleet.counts),
+        "model_failures": dict(fleet.failures),
+        "backend_faults": injected,
+        "cart_units_applied": sum(applied.values()),
+        "observed": {name: round(value, 3) for name, value in observed.items()},
+        "checks": {name: problems or "PASS" for name, problems in checks.items()},
+        "passed": not any(checks.values()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scenarios", nargs="+", help="scenario JSON files")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+    results = {}
+    for path in args.scenarios:
+        name = os.path.splitext(os.path.basename(path))[0]
+        with open(path) as f:
+            scenario = json.load(f)
+        print(f"Running {name}...", file=sys.stderr)
+        results[name] = run(scenario)
+
+    print(json.dumps(results, indent=2))
+    for name, result in results.items():
+        print(f"{'PASS' if result['passed'] else 'FAIL'} {name}", file=sys.stderr)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0 if all(result["passed"] for result in results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
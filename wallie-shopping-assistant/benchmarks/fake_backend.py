@@ -0,0 +1,235 @@
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import urlparse, parse_qs
+
+from benchmarks.fakes import LatencyDistribution
+
+# Same rows as lib/seed.js, so scripted conversations can name real products
+SEED_PRODUCTS = [
+    ("Wireless Headphones", "199.99", "Electronics"),
+    ("Smart Watch", "149.99", "Wearables"),
+    ("Bluetooth Speaker", "89.99", "Audio"),
+    ("Gaming Mouse", "59.99", "Gaming"),
+    ("Backpack", "69.99", "Accessories"),
+    ("LED Desk Lamp", "39.99", "Home"),
+    ("Running Shoes", "129.99", "Footwear"),
+    ("Wireless Charger", "29.99", "Electronics"),
+    ("Notebook", "14.99", "Stationery"),
+    ("Sunglasses", "24.99", "Fashion"),
+]
+
+_ADJECTIVES = ["Classic", "Pro", "Ultra", "Eco", "Compact", "Deluxe", "Travel", "Smart"]
+_NOUNS = ["Bottle", "Kettle", "Jacket", "Tripod", "Keyboard", "Pillow", "Stand", "Organizer"]
+_CATEGORIES = ["Home", "Electronics", "Fashion", "Kitchen", "Sports", "Office"]
+
+# Route names used in `faults`
+ROUTES = {
+    ("GET", "/api/products"): "products",
+    ("GET", "/api/voice-cart"): "cart_get",
+    ("POST", "/api/voice-cart"): "cart_post",
+}
+
+
+def make_product(product_id: int) -> Dict[str, Any]:
+    """Deterministic synthetic product; ids 1-10 are the seed products."""
+    if product_id <= len(SEED_PRODUCTS):
+        name, price, category = SEED_PRODUCTS[product_id - 1]
+    else:
+        name = f"{_ADJECTIVES[product_id % 8]} {_NOUNS[(product_id // 8) % 8]} {product_id}"
+        price = f"{(product_id * 7919) % 200000 / 100 + 5:.2f}"
+        category = _CATEGORIES[product_id % len(_CATEGORIES)]
+    return {
+        "id": product_id,
+        "name": name,
+        "description": f"{name} for everyday use.",
+        "price": price,
+        "imageUrl": f"/products/{product_id}.png",
+        "category": category,
+    }
+
+
+class FakeBackend:
+    """In-process stand-in for the Next.js /api/products and /api/voice-cart routes.
+
+    Products are generated from their id on demand, so a million-row catalog
+    costs no memory until it is paged out. Pagination follows the real route
+    (?limit, ?cursor, ?until; total and maxId on the first page).
+
+    `faults` injects failures per route name (see ROUTES): {"latency": spec,
+    "errors": p, "status": 500, "drop": p, "partial": p}. An error answers
+    with `status`, a drop closes the connection without an answer, and a
+    partial answer is cut off half-way (a cart POST is applied first, so
+    the client cannot know it went through). Probabilities are per request.
+    """
+
+    def __init__(self, product_count: int = 10, latency: float = 0.0, port: int = 0,
+                 faults: Optional[Dict[str, Dict[str, Any]]] = None, seed: Optional[int] = None):
+        self.product_count = product_count
+        self.latency = latency
+        self.faults = faults or {}
+        self.requests = Counter()
+        self.injected = Counter()  # (route, outcome) -> requests
+        self.cart = []
+        self._random = random.Random(seed)
+        self._delays = {route: LatencyDistribution(fault["latency"], self._random.random())
+                        for route, fault in self.faults.items() if "latency" in fault}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_port}"
+
+    def start(self) -> "FakeBackend":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-backend", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeBackend":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def count(self, path: str, method: Optional[str] = None) -> int:
+        """Requests made to a path, optionally only those with one HTTP method."""
+        with self._lock:
+            return self.requests[(method, path) if method else path]
+
+    def inject(self, method: str, path: str) -> Tuple[float, Optional[str]]:
+        """(delay, outcome) for one request: outcome is None, "error", "drop" or "partial"."""
+        route = ROUTES.get((method, path))
+        fault = self.faults.get(route)
+        if not fault:
+            return 0.0, None
+        with self._lock:
+            delay = self._delays[route].sample() if route in self._delays else 0.0
+            draw = self._random.random()
+            outcome = None
+            for kind in ("errors", "drop", "partial"):
+                draw -= fault.get(kind, 0)
+                if draw < 0:
+                    outcome = "error" if kind == "errors" else kind
+                    self.injected[(route, outcome)] += 1
+                    break
+        return delay, outcome
+
+    def products_page(self, query: Dict[str, list]) -> Any:
+        if "limit" not in query:
+            return [make_product(i) for i in range(1, self.product_count + 1)]
+
+        limit = max(1, min(int(query["limit"][0]), 5000))
+        cursor = int(query["cursor"][0]) if "cursor" in query else 0
+        until = min(int(query["until"][0]), self.product_count) if "until" in query else self.product_count
+        items = [make_product(i) for i in range(cursor + 1, min(cursor + limit, until) + 1)]
+        body = {"items": items, "nextCursor": items[-1]["id"] if len(items) == limit else None}
+        if "cursor" not in query:
+            body["total"] = self.product_count
+            body["maxId"] = self.product_count
+        return body
+
+    def add_to_cart(self, payload: Dict[str, Any]) -> Any:
+        product_id = payload.get("productId")
+        if not product_id or not payload.get("email"):
+            return 400, {"error": "Product ID and email are required"}
+        if not 1 <= int(product_id) <= self.product_count:
+            return 404, {"error": "Product not found"}
+        with self._lock:
+            self.cart.append(payload)
+        return 200, {"success": True, "message": "Item added to cart successfully",
+                     "product": make_product(int(product_id))}
+
+    def cart_items(self, query: Dict[str, list]) -> Any:
+        if "email" not in query:
+            return 400, {"error": "Email is required"}
+        quantities: Dict[int, int] = {}
+        with self._lock:
+            for payload in self.cart:
+                if payload["email"] == query["email"][0]:
+                    product_id = int(payload["productId"])
+                    quantities[product_id] = quantities.get(product_id, 0) + int(payload.get("quantity", 1))
+        items = []
+        for product_id, quantity in quantities.items():
+            product = make_product(product_id)
+            items.append({"productId": product_id, "quantity": quantity,
+                          "name": product["name"], "price": product["price"]})
+        return 200, {"success": True, "items": items}
+
+    def _handler_class(self):
+        backend = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, status: int, body: Any) -> None:
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                try:
+                    if self.outcome == "partial":
+                        # Content-Length promises more than is sent
+                        self.wfile.write(data[:len(data) // 2])
+                        self.close_connection = True
+                    else:
+                        self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up waiting (e.g. an injected delay past its timeout)
+                    self.close_connection = True
+
+            def _record(self, path: str) -> bool:
+                """Count the request and apply injected faults; False when it gets no answer."""
+                with backend._lock:
+                    backend.requests[path] += 1
+                    backend.requests[(self.command, path)] += 1
+                delay, self.outcome = backend.inject(self.command, path)
+                if backend.latency or delay:
+                    time.sleep(backend.latency + delay)
+                if self.outcome == "drop":
+                    self.close_connection = True
+                    return False
+                if self.outcome == "error":
+                    status = backend.faults[ROUTES[(self.command, path)]].get("status", 500)
+                    self._reply(status, {"error": "Injected fault"})
+                    return False
+                return True
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if not self._record(url.path):
+                    return
+                if url.path == "/api/products":
+                    self._reply(200, backend.products_page(parse_qs(url.query)))
+                elif url.path == "/api/voice-cart":
+                    self._reply(*backend.cart_items(parse_qs(url.query)))
+                else:
+                    self._reply(404, {"error": "Not found"})
+
+            def do_POST(self):
+                url = urlparse(self.path)
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length) or b"{}")
+                if not self._record(url.path):
+                    return
+                if url.path == "/api/voice-cart":
+                    self._reply(*backend.add_to_cart(payload))
+                else:
+                    self._reply(404, {"error": "Not found"})
+
+        return Handler
@@ -0,0 +1,282 @@
+import random
+import re
+import threading
+import time
+from collections import Counter
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+import google.generativeai as genai
+
+from prompt_cache import estimate_tokens
+
+CHECKOUT_PHRASE = "I have added to cart....Thank You!!!"
+
+# What a chatty model adds after its answer (see FakeGenerativeModel.verbosity)
+FILLER_SENTENCES = [
+    "Yeh hamare sabse popular products mein se ek hai.",
+    "Iski quality aur durability dono kamaal ki hain.",
+    "Bahut saare customers ne ise 5 star rating di hai.",
+    "Aapko yeh zaroor pasand aayega.",
+    "Delivery bhi jaldi ho jaati hai.",
+    "Aur koi sawal ho toh zaroor puchiye.",
+]
+# Words per chunk of a streamed fake response
+CHUNK_WORDS = 4
+
+
+class LatencyDistribution:
+    """Samples delays in seconds from a spec string.
+
+    Specs: "0.2" or "const:0.2", "uniform:0.1,0.4", "normal:0.3,0.05" and
+    "lognormal:mu,sigma" (parameters of the underlying normal, in log-seconds).
+    """
+
+    def __init__(self, spec: str = "0", seed: int = None):
+        self.spec = str(spec)
+        kind, _, params = self.spec.partition(":")
+        if not params:
+            kind, params = "const", kind
+        self.kind = kind
+        self.params = [float(p) for p in params.split(",")]
+        self.random = random.Random(seed)
+
+    def sample(self) -> float:
+        if self.kind == "const":
+            return self.params[0]
+        if self.kind == "uniform":
+            return self.random.uniform(*self.params)
+        if self.kind == "normal":
+            return max(0.0, self.random.gauss(*self.params))
+        if self.kind == "lognormal":
+            return self.random.lognormvariate(*self.params)
+        raise ValueError(f"Unknown latency distribution: {self.spec}")
+
+
+def reply_for_prompt(prompt: str, tools: bool = False) -> str:
+    """Canned Hinglish reply that matches the phase template in the prompt.
+
+    With tools the checkout reply leaves the cart confirmation to the agent,
+    which adds it after the add_to_cart call (see calls_for_prompt).
+    """
+    prompt = prompt.lower()
+    if "ready to buy" in prompt:
+        total = re.search(r"cart total after this order: (\S+?)\.(?:\s|$)", prompt)
+        amount = f" Total {total.group(1)} hai." if total else ""
+        if tools:
+            return f"Perfect choice! Aapka order confirm ho gaya hai.{amount}"
+        return f"Perfect choice! Aapka order confirm ho gaya hai.{amount} {CHECKOUT_PHRASE}"
+    if "gather details" in prompt:
+        return "Bahut badhiya! Aapko kitne pieces chahiye, aur koi color preference hai?"
+    if "customer's message" in prompt:
+        return "Yeh product bahut accha hai, quality top class hai. Kya aap ise lena chahenge?"
+    return "Namaste! Main aapki shopping assistant hoon. Aaj aap kya khareedna chahenge?"
+
+
+def calls_for_prompt(prompt: str) -> List[Tuple[str, Dict[str, Any]]]:
+    """Function calls a tool-using model would make: add_to_cart from the checkout Order line."""
+    order = re.search(r"order: (\d+) x .*?\(product_id (\d+)\)", prompt.lower())
+    if "ready to buy" not in prompt.lower() or not order:
+        return []
+    # Struct numbers come back as floats from the real API
+    return [("add_to_cart", {"product_id": float(order.group(2)), "quantity": float(order.group(1))})]
+
+
+def model_response(text: str, calls: List[Tuple[str, Dict[str, Any]]] = (), usage: Any = None) -> SimpleNamespace:
+    """A generate_content response shaped like the SDK's: text and function_call parts."""
+    parts = [SimpleNamespace(text=text, function_call=None)] if text else []
+    parts += [SimpleNamespace(text="", function_call=SimpleNamespace(name=name, args=args)) for name, args in calls]
+    return SimpleNamespace(
+        text=text,
+        parts=parts,
+        candidates=[SimpleNamespace(content=SimpleNamespace(role="model", parts=parts))],
+        usage_metadata=usage,
+    )
+
+
+def limit_output(text: str, generation_config: Dict[str, Any] = None) -> str:
+    """Apply stop_sequences and max_output_tokens (about 4 characters each) like the API."""
+    if not generation_config:
+        return text
+    for stop in generation_config.get("stop_sequences") or []:
+        text = text.split(stop)[0]
+    max_tokens = generation_config.get("max_output_tokens")
+    return text[:max_tokens * 4] if max_tokens else text
+
+
+class FakeStream:
+    """Streamed generate_content response: CHUNK_WORDS words per chunk.
+
+    Each chunk takes `decode` seconds per output token. Function calls come
+    in a last chunk. Like the SDK's response, text, parts and candidates
+    hold the whole reply. With `break_after`, the connection drops after
+    that many chunks.
+    """
+
+    def __init__(self, text: str, calls: List[Tuple[str, Dict[str, Any]]] = (), usage: Any = None,
+                 decode: float = 0.0, break_after: Optional[int] = None):
+        self._response = model_response(text, calls, usage)
+        self._calls = list(calls)
+        self._decode = decode
+        self._break_after = break_after
+
+    def __iter__(self):
+        words = re.findall(r"\S+\s*", self._response.text)
+        for start in range(0, len(words), CHUNK_WORDS):
+            if self._break_after is not None and start // CHUNK_WORDS >= self._break_after:
+                raise ConnectionResetError("stream closed mid-response")
+            piece = "".join(words[start:start + CHUNK_WORDS])
+            if self._decode:
+                time.sleep(self._decode * estimate_tokens(piece))
+            yield model_response(piece)
+        if self._calls:
+            yield model_response("", self._calls)
+
+    def __getattr__(self, name):
+        return getattr(self._response, name)
+
+
+class FakeGenerativeModel:
+    """Local stand-in for genai.GenerativeModel with configurable latency.
+
+    `prefill` adds seconds per 1,000 uncached input tokens to each call, so
+    time to first token grows with the prompt. A system instruction is
+    prefilled on the first call only and reported as cached afterwards,
+    like a provider-side prefix cache. `decode` is seconds per output token
+    and `verbosity` the filler sentences a chatty model adds to its answer;
+    generation_config limits both as the API would.
+    """
+
+    latency = "0"
+    seed = None
+    prefill = 0.0
+    decode = 0.0
+    verbosity = 0
+
+    def __init__(self, model_name: str = "fake-model", system_instruction: str = None, tools: Any = None,
+                 **kwargs):
+        self.model_name = model_name
+        self.system_instruction = system_instruction or ""
+        self.tools = tools
+        self.delays = LatencyDistribution(self.latency, self.seed)
+        self.calls = 0
+
+    def behaviour(self) -> Tuple[float, Optional[str], bool]:
+        """(delay in seconds, error message or None, partial) for the next call.
+
+        A partial call streams part of its reply and then drops.
+        """
+        return self.delays.sample(), None, False
+
+    def generate_content(self, contents, generation_config: Dict[str, Any] = None, stream: bool = False,
+                         request_options: Dict[str, Any] = None, **kwargs):
+        self.calls += 1
+        follow_up = isinstance(contents, list)  # tool results sent back
+        contents = str(contents)
+        cached = estimate_tokens(self.system_instruction) if self.calls > 1 else 0
+        total = estimate_tokens(self.system_instruction) + estimate_tokens(contents)
+        latency, error, partial = self.behaviour()
+        delay = latency + self.prefill * (total - cached) / 1000
+        # request_options timeout: give up like the client library would
+        timeout = (request_options or {}).get("timeout")
+        if timeout is not None and delay > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"504 Deadline Exceeded after {timeout:.2f}s")
+        if delay:
+            time.sleep(delay)
+        if error:
+            raise RuntimeError(error)
+        usage = SimpleNamespace(prompt_token_count=total, cached_content_token_count=cached)
+        if follow_up:
+            text, calls = "Ji, yeh rahi details. Kya aap ise lena chahenge?", []
+        else:
+            prompt = self.system_instruction + contents
+            calls = calls_for_prompt(prompt) if self.tools else []
+            text = reply_for_prompt(prompt, bool(self.tools))
+        text = limit_output(" ".join([text] + FILLER_SENTENCES[:self.verbosity]), generation_config)
+        if stream:
+            return FakeStream(text, calls, usage, self.decode, break_after=1 if partial else None)
+        if partial:
+            raise ConnectionResetError("connection closed before the response was complete")
+        if self.decode:
+            time.sleep(self.decode * estimate_tokens(text))
+        return model_response(text, calls, usage)
+
+    def count_tokens(self, contents, request_options: Dict[str, Any] = None, **kwargs):
+        """Token count of the system instruction and contents, after the call's latency."""
+        latency, error, _ = self.behaviour()
+        timeout = (request_options or {}).get("timeout")
+        if timeout is not None and latency > timeout:
+            time.sleep(timeout)
+            raise TimeoutError(f"504 Deadline Exceeded after {timeout:.2f}s")
+        if latency:
+            time.sleep(latency)
+        if error:
+            raise RuntimeError(error)
+        return SimpleNamespace(total_tokens=estimate_tokens(self.system_instruction) + estimate_tokens(str(contents)))
+
+
+def fake_model_class(latency: str = "0", seed: int = None, prefill: float = 0.0, decode: float = 0.0,
+                     verbosity: int = 0) -> type:
+    """FakeGenerativeModel subclass bound to one latency distribution."""
+    return type("FakeGenerativeModel", (FakeGenerativeModel,), {
+        "latency": latency, "seed": seed, "prefill": prefill, "decode": decode, "verbosity": verbosity,
+    })
+
+
+class FakeFleetModel(FakeGenerativeModel):
+    """FakeGenerativeModel whose latency and failures depend on the model name.
+
+    `profiles` maps a model name (or "*" for any other) to {"latency": spec,
+    "errors": probability, "partial": probability} plus an optional
+    "degraded" dict with "seconds": [start, end] and the settings that apply
+    in that window. The window is timed from the
+    fleet's first call, whichever instance made it, like a provider
+    incident that every session sees at once.
+    """
+
+    profiles: Dict[str, Dict[str, Any]] = {}
+    counts: Counter = Counter()
+    failures: Counter = Counter()
+    _delays: Dict[str, LatencyDistribution] = {}
+    _random = random.Random()
+    _lock = threading.Lock()
+    _started = None
+
+    def behaviour(self) -> Tuple[float, Optional[str], bool]:
+        name = self.model_name.split("/")[-1]
+        profile = self.profiles.get(name, self.profiles.get("*", {}))
+        with self._lock:
+            fleet = type(self)
+            if fleet._started is None:
+                fleet._started = time.monotonic()
+            elapsed = time.monotonic() - fleet._started
+            self.counts[name] += 1
+            degraded = profile.get("degraded")
+            if degraded and degraded["seconds"][0] <= elapsed <= degraded["seconds"][1]:
+                profile = {**profile, **degraded}
+            spec = str(profile.get("latency", "0"))
+            if spec not in self._delays:
+                self._delays[spec] = LatencyDistribution(spec, self._random.random())
+            delay = self._delays[spec].sample()
+            failed = self._random.random() < profile.get("errors", 0)
+            partial = not failed and self._random.random() < profile.get("partial", 0)
+            if failed or partial:
+                self.failures[name] += 1
+        return delay, f"503 {name} is overloaded" if failed else None, partial
+
+
+def fake_fleet_class(profiles: Dict[str, Dict[str, Any]], seed: int = None) -> type:
+    """FakeFleetModel subclass with its own profiles and call counters."""
+    return type("FakeFleetModel", (FakeFleetModel,), {
+        "profiles": profiles, "counts": Counter(), "failures": Counter(),
+        "_delays": {}, "_random": random.Random(seed), "_lock": threading.Lock(), "_started": None,
+    })
+
+
+def install(model_class=FakeGenerativeModel) -> None:
+    """Make every genai.GenerativeModel(...) built after this call a fake."""
+    import settings
+    genai.GenerativeModel = model_class
+    # The provider's context cache cannot serve a fake model
+    settings.CONTEXT_CACHE = "local"
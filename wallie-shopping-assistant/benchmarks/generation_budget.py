@@ -0,0 +1,116 @@
+"""Generation budget benchmark: reply length, model time and TTS time per turn.
+
+Runs the scripted conversations from benchmarks.turn_latency against a
+chatty fake model (it adds --verbosity filler sentences and takes
+--decode-ms per output token) twice: with no generation settings, and with
+the per-phase max_output_tokens, stop sequences and sentence cut-off from
+generation.py. TTS time is estimated from the reply length
+(--tts-ms-per-char) unless --tts gtts synthesizes every reply for real,
+which needs network access:
+
+    python -m benchmarks.generation_budget --repeats 5
+    python -m benchmarks.generation_budget --tts gtts --repeats 1
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from benchmarks import fakes
+from benchmarks.fake_backend import FakeBackend
+from benchmarks.turn_latency import CONVERSATIONS, StageTimer, summarize
+
+# Rough Hinglish speaking rate of the gTTS voice, for audio length
+CHARS_PER_AUDIO_SECOND = 14
+
+
+def sentences(text: str) -> int:
+    from generation import SENTENCE_END_RE
+    return len(SENTENCE_END_RE.findall(text))
+
+
+def tts_seconds(text: str, mode: str, ms_per_char: float) -> float:
+    if mode == "gtts":
+        from tts import synthesize
+        started = time.perf_counter()
+        for _ in synthesize(text):
+            pass
+        return time.perf_counter() - started
+    return len(text) * ms_per_char / 1000
+
+
+def run(budgeted: bool, repeats: int, decode: float, verbosity: int, tts: str,
+        ms_per_char: float) -> Dict[str, Any]:
+    import generation
+    from agent import ShoppingAgent
+    from products import ProductService
+
+    fakes.install(fakes.fake_model_class(decode=decode, verbosity=verbosity))
+    phase_generation = generation.PHASE_GENERATION
+    if not budgeted:
+        generation.PHASE_GENERATION = {}
+    replies: List[str] = []
+    try:
+        with FakeBackend(product_count=10) as backend, tempfile.TemporaryDirectory() as tmp:
+            service = ProductService(base_url=backend.base_url,
+                                     snapshot_path=os.path.join(tmp, "catalog.snapshot"))
+            service.fetch_products()
+            timer = StageTimer()
+            for _ in range(repeats):
+                for script in CONVERSATIONS:
+                    agent = ShoppingAgent(product_service=service, context_cache=False, router=False)
+                    timer.instrument(agent)
+                    with timer.turn("turn"):
+                        replies.append(agent.run_greeting_chain())
+                    for user_input in script:
+                        with timer.turn("turn"):
+                            replies.append(agent.run_conversation_chain(user_input))
+    finally:
+        generation.PHASE_GENERATION = phase_generation
+
+    speech = [tts_seconds(reply, tts, ms_per_char) for reply in replies]
+    return {
+        "turn": summarize(timer.samples["turn"]),
+        "model": summarize(timer.samples["model"]),
+        "tts": summarize(speech),
+        "reply_chars_mean": round(sum(map(len, replies)) / len(replies), 1),
+        "reply_sentences_mean": round(sum(map(sentences, replies)) / len(replies), 2),
+        "audio_seconds_mean": round(sum(map(len, replies)) / len(replies) / CHARS_PER_AUDIO_SECOND, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeats", type=int, default=5, help="times to run every scripted conversation")
+    parser.add_argument("--decode-ms", type=float, default=6, help="fake model time per output token")
+    parser.add_argument("--verbosity", type=int, default=4, help="filler sentences the fake model adds")
+    parser.add_argument("--tts", choices=["estimate", "gtts"], default="estimate")
+    parser.add_argument("--tts-ms-per-char", type=float, default=2.0, help="TTS time per character for estimate")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    results = {"decode_ms": args.decode_ms, "verbosity": args.verbosity, "tts": args.tts, "results": {}}
+    for name, budgeted in (("unbounded", False), ("budgeted", True)):
+        print(f"Running {name}...", file=sys.stderr)
+        results["results"][name] = run(budgeted, args.repeats, args.decode_ms / 1000, args.verbosity,
+                                       args.tts, args.tts_ms_per_char)
+    before, after = results["results"]["unbounded"], results["results"]["budgeted"]
+    results["change"] = {
+        stage: f"{before[stage]['mean_ms']:.1f} -> {after[stage]['mean_ms']:.1f} ms mean"
+        for stage in ("model", "tts", "turn")
+    }
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,260 @@
+"""Concurrent load test for the FastAPI /chat server.
+
+Starts main.py in a subprocess with a fake Gemini model and an in-process
+fake Next.js backend, then runs N virtual shoppers. Each shopper has its own
+session_id and walks greeting -> inquiry -> details -> checkout scripts with
+exponential think times. Reports throughput, latency percentiles, error rate
+and server RSS over time:
+
+    python -m benchmarks.load_test --shoppers 50 --duration 60 --output load.json
+"""
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+import requests
+
+from benchmarks.fake_backend import FakeBackend
+from benchmarks.fakes import CHECKOUT_PHRASE
+from benchmarks.turn_latency import CONVERSATIONS, percentile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def read_rss_mb(pid: int) -> Optional[float]:
+    """Resident set size of a process in MB (Linux /proc only)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+class LoadTest:
+    def __init__(self, url: str, shoppers: int, duration: float, think_time: float,
+                 ramp_up: float, timeout: float, seed: int):
+        self.url = url
+        self.shoppers = shoppers
+        self.duration = duration
+        self.think_time = think_time
+        self.ramp_up = ramp_up
+        self.timeout = timeout
+        self.seed = seed
+        self.records: List[Dict] = []
+        self.checkouts = 0
+        self._lock = threading.Lock()
+        self._started = 0.0
+
+    def _record(self, latency: float, ok: bool, error: str = None) -> None:
+        with self._lock:
+            self.records.append({"t": time.perf_counter() - self._started, "latency": latency,
+                                 "ok": ok, "error": error})
+
+    def _shopper(self, index: int) -> None:
+        rng = random.Random(self.seed + index)
+        deadline = self._started + self.duration
+        time.sleep(self.ramp_up * index / max(1, self.shoppers))
+        with requests.Session() as session:
+            while time.perf_counter() < deadline:
+                session_id = uuid.uuid4().hex
+                for text in rng.choice(CONVERSATIONS):
+                    if time.perf_counter() >= deadline:
+                        return
+                    started = time.perf_counter()
+                    try:
+                        response = session.post(self.url, json={"text": text, "session_id": session_id},
+                                                timeout=self.timeout)
+                        latency = time.perf_counter() - started
+                        if response.ok:
+                            self._record(latency, True)
+                            if CHECKOUT_PHRASE.lower() in response.json()["reply"].lower():
+                                with self._lock:
+                                    self.checkouts += 1
+                                break
+                        else:
+                            self._record(latency, False, f"HTTP {response.status_code}")
+                    except requests.exceptions.RequestException as e:
+                        self._record(time.perf_counter() - started, False, type(e).__name__)
+                    time.sleep(rng.expovariate(1 / self.think_time) if self.think_time else 0)
+
+    def run(self, server_pid: int) -> Dict:
+        rss = []
+        self._started = time.perf_counter()
+        threads = [threading.Thread(target=self._shopper, args=(i,), daemon=True) for i in range(self.shoppers)]
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads):
+            rss.append((round(time.perf_counter() - self._started, 1), read_rss_mb(server_pid)))
+            time.sleep(1)
+        for thread in threads:
+            thread.join()
+        return self.summary(time.perf_counter() - self._started, rss)
+
+    def summary(self, elapsed: float, rss: List) -> Dict:
+        latencies = [r["latency"] for r in self.records if r["ok"]]
+        errors = [r for r in self.records if not r["ok"]]
+        per_second = {}
+        for r in self.records:
+            per_second[int(r["t"])] = per_second.get(int(r["t"]), 0) + 1
+        rss_values = [mb for _, mb in rss if mb is not None]
+        latency = {}
+        if latencies:
+            latency = {f"p{p}_ms": round(percentile(latencies, p) * 1000, 2) for p in (50, 90, 95, 99)}
+            latency["max_ms"] = round(max(latencies) * 1000, 2)
+        return {
+            "shoppers": self.shoppers,
+            "duration_s": round(elapsed, 2),
+            "requests": len(self.records),
+            "throughput_rps": round(len(self.records) / elapsed, 2) if elapsed else 0,
+            "peak_rps": max(per_second.values(), default=0),
+            "checkouts": self.checkouts,
+            "error_rate": round(len(errors) / len(self.records), 4) if self.records else 0,
+            # Turned away by admission control (503 + Retry-After)
+            "rejected": sum(e["error"] == "HTTP 503" for e in errors),
+            "errors": sorted({e["error"] for e in errors}),
+            "latency": latency,
+            "rss_mb": {"start": rss_values[0] if rss_values else None,
+                       "peak": max(rss_values, default=None),
+                       "end": rss_values[-1] if rss_values else None,
+                       "timeline": rss},
+        }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def serve_command(port: int, backend_url: str, model_latency: str, snapshot_dir: str,
+                  workers: int = 1) -> List[str]:
+    return [sys.executable, "-m", "benchmarks.load_test", "--serve", str(port), "--workers", str(workers),
+            "--backend", backend_url, "--model-latency", model_latency, "--snapshot-dir", snapshot_dir]
+
+
+def start_server(port: int, backend_url: str, model_latency: str, snapshot_dir: str,
+                 workers: int = 1) -> subprocess.Popen:
+    server = subprocess.Popen(
+        serve_command(port, backend_url, model_latency, snapshot_dir, workers),
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    started = time.perf_counter()
+    while time.perf_counter() - started < 120:
+        try:
+            requests.post(f"http://127.0.0.1:{port}/chat", json={"text": "hello", "session_id": "warmup"}, timeout=5)
+            return server
+        except requests.exceptions.ConnectionError:
+            if server.poll() is not None:
+                raise RuntimeError("server exited during startup")
+            time.sleep(0.05)
+    server.terminate()
+    raise TimeoutError("server did not start")
+
+
+def serve(port: int, backend_url: str, model_latency: str, snapshot_dir: str,
+          workers: int = 1, worker: bool = False) -> None:
+    """Child process: main:app pointed at the fake backend, with the fake model.
+
+    With workers > 1 this is serve.py's router and supervisor instead, and
+    each worker is another child started with worker=True.
+    """
+    import logging
+    import settings
+    from benchmarks import fakes
+
+    settings.BASE_URL = backend_url
+    settings.CATALOG_SNAPSHOT_PATH = os.path.join(snapshot_dir, "catalog.snapshot")
+    fakes.install(fakes.fake_model_class(model_latency))
+    logging.disable(logging.INFO)
+
+    if workers > 1:
+        import serve as multiprocess
+        multiprocess.run(workers, "127.0.0.1", port, settings.CATALOG_SNAPSHOT_PATH,
+                         lambda worker_port, _: serve_command(worker_port, backend_url, model_latency,
+                                                             snapshot_dir) + ["--worker"])
+        return
+
+    if worker:
+        settings.CATALOG_REFRESH = "follow"
+    import uvicorn
+    uvicorn.run("main:app", host="127.0.0.1", port=port, log_level="warning")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--shoppers", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30, help="seconds")
+    parser.add_argument("--think-time", type=float, default=1.0, help="mean seconds between a shopper's turns")
+    parser.add_argument("--ramp-up", type=float, default=5, help="seconds to start all shoppers")
+    parser.add_argument("--timeout", type=float, default=30, help="per-request timeout in seconds")
+    parser.add_argument("--products", type=int, default=1000, help="fake catalog size")
+    parser.add_argument("--model-latency", default="lognormal:-1.2,0.4", help="fake model delay distribution")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=1, help="serve with serve.py and this many worker processes")
+    parser.add_argument("--url", help="test an already running server instead of starting one")
+    parser.add_argument("--output", help="write the summary as JSON to this file")
+    parser.add_argument("--max-p95-ms", type=float)
+    parser.add_argument("--max-error-rate", type=float)
+    parser.add_argument("--min-throughput", type=float, help="requests per second")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("--backend", help=argparse.SUPPRESS)
+    parser.add_argument("--snapshot-dir", help=argparse.SUPPRESS)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.backend, args.model_latency, args.snapshot_dir, args.workers, args.worker)
+        return 0
+
+    server = None
+    with FakeBackend(product_count=args.products) as backend, tempfile.TemporaryDirectory() as tmp:
+        try:
+            if args.url:
+                url, pid = args.url, None
+            else:
+                port = _free_port()
+                server = start_server(port, backend.base_url, args.model_latency, tmp, args.workers)
+                url, pid = f"http://127.0.0.1:{port}/chat", server.pid
+            test = LoadTest(url, args.shoppers, args.duration, args.think_time,
+                            args.ramp_up, args.timeout, args.seed)
+            summary = test.run(pid)
+            summary["cart_posts"] = backend.count("/api/voice-cart", "POST")
+            summary["catalog_requests"] = backend.count("/api/products")
+        finally:
+            if server:
+                server.terminate()
+                server.wait()
+
+    # The RSS timeline only goes to the JSON file
+    printable = dict(summary, rss_mb={k: v for k, v in summary["rss_mb"].items() if k != "timeline"})
+    print(json.dumps(printable, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+
+    failures = []
+    if args.max_p95_ms and summary["latency"].get("p95_ms", float("inf")) > args.max_p95_ms:
+        failures.append(f"p95 {summary['latency'].get('p95_ms')} ms > {args.max_p95_ms} ms")
+    if args.max_error_rate is not None and summary["error_rate"] > args.max_error_rate:
+        failures.append(f"error rate {summary['error_rate']} > {args.max_error_rate}")
+    if args.min_throughput and summary["throughput_rps"] < args.min_throughput:
+        failures.append(f"throughput {summary['throughput_rps']} rps < {args.min_throughput} rps")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
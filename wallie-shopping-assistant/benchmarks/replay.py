@@ -0,0 +1,210 @@
+"""Deterministic offline replay of recorded conversations.
+
+Feeds every session from a RECORD_PATH log (see recorder.py) back through
+ShoppingAgent.run_greeting_chain / run_conversation_chain. The model is
+answered with the recorded outputs and the cart API with the recorded
+results, so a replay needs no network and no API key. Each replayed turn is
+compared with the recording (phase, per-turn prompt, static prefix id and
+cart calls), which turns production traffic into a regression test:
+
+    python -m benchmarks.replay conversations.jsonl --snapshot catalog.snapshot
+
+Sessions are replayed in parallel across --jobs processes; the summary
+reports sessions per second and CPU time per turn.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from collections import defaultdict, deque
+from typing import Any, Dict, List
+
+import google.generativeai as genai
+
+from benchmarks.fakes import FakeStream, model_response
+from benchmarks.turn_latency import percentile
+
+# Recorded fields a replayed turn must reproduce
+COMPARED = ("phase", "prompt", "prefix_id", "cart")
+MAX_EXAMPLES = 10
+
+
+class Script:
+    """The recorded answers for the turn being replayed."""
+
+    def __init__(self):
+        self.outputs = deque()
+        self.cart = deque()
+        self.cart_sync = None
+        self.error = None
+
+    def load(self, record: Dict[str, Any]) -> None:
+        # One recorded model response per call (text and function calls);
+        # older records only have the turn's output
+        rounds = record.get("rounds") or [{"text": record.get("output", ""), "calls": []}]
+        self.outputs = deque(rounds)
+        self.cart = deque(call["ok"] for call in record.get("cart", []))
+        self.cart_sync = record.get("cart_sync")
+        self.error = record.get("error")
+
+
+_script = Script()
+
+
+class ReplayModel:
+    """genai.GenerativeModel stand-in that answers from the recording."""
+
+    def __init__(self, model_name: str = "replay", system_instruction: str = None, **kwargs):
+        self.model_name = model_name
+
+    def generate_content(self, contents, stream: bool = False, **kwargs):
+        if _script.error:
+            raise RuntimeError(_script.error)
+        recorded = _script.outputs.popleft() if _script.outputs else {"text": "", "calls": []}
+        calls = [(call["name"], call["args"]) for call in recorded["calls"]]
+        return FakeStream(recorded["text"], calls) if stream else model_response(recorded["text"], calls)
+
+
+def replay_product_service(snapshot_path: str):
+    from products import ProductService
+
+    class ReplayProductService(ProductService):
+        """Catalog from a snapshot; the cart API answers as recorded."""
+
+        def add_to_cart(self, product_id: int, quantity: int = 1) -> bool:
+            return _script.cart.popleft() if _script.cart else True
+
+        def get_cart(self):
+            return _script.cart_sync
+
+    service = ReplayProductService(base_url="http://replay.invalid", snapshot_path=snapshot_path)
+    if not service.load_snapshot():
+        raise SystemExit(f"Cannot read catalog snapshot {snapshot_path}")
+    return service
+
+
+_service = None
+
+
+def init_worker(snapshot_path: str) -> None:
+    global _service
+    logging.disable(logging.CRITICAL)
+    genai.GenerativeModel = ReplayModel
+    _service = replay_product_service(snapshot_path)
+
+
+def compare_turn(recorded: Dict[str, Any], replayed: Dict[str, Any]) -> List[str]:
+    differences = []
+    for field in COMPARED:
+        # Speculative turns record no prompt: their first model call was a draft
+        if field in recorded and recorded[field] != replayed.get(field):
+            differences.append(field)
+    return differences
+
+
+def replay_session(records: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Replay one session's turns in order; returns mismatches and CPU time per turn."""
+    from agent import ShoppingAgent
+    from recorder import MemoryRecorder
+
+    recorder = MemoryRecorder()
+    agent = ShoppingAgent(product_service=_service, context_cache=False, recorder=recorder)
+    agent.session_id = records[0]["session"]
+    cpu = []
+    mismatches = []
+    stale_catalog = any(record.get("catalog") != _service.catalog.version for record in records)
+    for record in records:
+        _script.load(record)
+        started = time.process_time()
+        if record["kind"] == "greeting":
+            agent.run_greeting_chain()
+        elif "prompt" in record or "rounds" in record:
+            agent.run_conversation_chain(record["input"])
+        else:
+            agent.run_conversation_chain(record["input"], reply=record.get("output", ""))
+        cpu.append(time.process_time() - started)
+
+        replayed = recorder.entries[-1] if recorder.entries else {}
+        differences = compare_turn(record, replayed)
+        if differences:
+            mismatches.append({
+                "session": record["session"],
+                "turn": record["turn"],
+                "fields": {field: {"recorded": record.get(field), "replayed": replayed.get(field)}
+                           for field in differences},
+            })
+    return {"turns": len(records), "cpu": cpu, "mismatches": mismatches, "stale_catalog": stale_catalog}
+
+
+def load_sessions(paths: List[str]) -> List[List[Dict[str, Any]]]:
+    from recorder import read_records
+
+    sessions = defaultdict(list)
+    for path in paths:
+        for record in read_records(path):
+            sessions[record["session"]].append(record)
+    return [sorted(records, key=lambda record: record["turn"]) for records in sessions.values()]
+
+
+def replay(sessions: List[List[Dict[str, Any]]], snapshot_path: str, jobs: int) -> Dict[str, Any]:
+    started = time.perf_counter()
+    if jobs == 1:
+        init_worker(snapshot_path)
+        results = [replay_session(records) for records in sessions]
+    else:
+        chunksize = max(1, len(sessions) // (jobs * 8))
+        with multiprocessing.Pool(jobs, initializer=init_worker, initargs=(snapshot_path,)) as pool:
+            results = list(pool.imap_unordered(replay_session, sessions, chunksize=chunksize))
+    elapsed = time.perf_counter() - started
+
+    cpu = [seconds for result in results for seconds in result["cpu"]]
+    mismatches = [mismatch for result in results for mismatch in result["mismatches"]]
+    return {
+        "sessions": len(results),
+        "turns": len(cpu),
+        "jobs": jobs,
+        "seconds": round(elapsed, 3),
+        "sessions_per_sec": round(len(results) / elapsed, 1) if elapsed else None,
+        "turns_per_sec": round(len(cpu) / elapsed, 1) if elapsed else None,
+        "cpu_us_per_turn": {
+            "p50": round(percentile(cpu, 50) * 1e6, 1) if cpu else None,
+            "p95": round(percentile(cpu, 95) * 1e6, 1) if cpu else None,
+        },
+        "stale_catalog_sessions": sum(result["stale_catalog"] for result in results),
+        "mismatched_turns": len(mismatches),
+        "mismatch_examples": mismatches[:MAX_EXAMPLES],
+    }
+
+
+def main():
+    import settings
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("records", nargs="+", help="JSONL files written with RECORD_PATH")
+    parser.add_argument("--snapshot", default=settings.CATALOG_SNAPSHOT_PATH,
+                        help="catalog snapshot the sessions were recorded against")
+    parser.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="replay processes")
+    parser.add_argument("--output", help="write the summary as JSON to this file")
+    args = parser.parse_args()
+
+    # The replay itself must not append to the log it reads
+    settings.RECORD_PATH = None
+    sessions = load_sessions(args.records)
+    print(f"Replaying {len(sessions)} sessions...", file=sys.stderr)
+    summary = replay(sessions, args.snapshot, args.jobs)
+
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+    if summary["stale_catalog_sessions"]:
+        print(f"WARNING: {summary['stale_catalog_sessions']} sessions were recorded against "
+              f"another catalog version", file=sys.stderr)
+    return 1 if summary["mismatched_turns"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
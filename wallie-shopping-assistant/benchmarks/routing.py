@@ -0,0 +1,144 @@
+"""Model routing benchmark against a fake fleet of Gemini models.
+
+Runs the scripted conversations from benchmarks.turn_latency with every
+turn sent to one model ("single") and through model_router.ModelRouter
+("routed"), under scenarios where one model of the fleet fails or slows
+down part-way through. Reports turn latency, fallback replies and calls per
+model:
+
+    python -m benchmarks.routing --repeats 20
+    python -m benchmarks.routing --scenarios outage --output routing.json
+
+Latencies and incident windows are scaled down (milliseconds, not
+seconds) so a run takes seconds; --scale multiplies them.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List
+
+from benchmarks import fakes
+from benchmarks.fake_backend import FakeBackend
+from benchmarks.turn_latency import CONVERSATIONS, summarize
+
+SMALL, LARGE = "gemini-1.5-flash-8b", "gemini-1.5-flash"
+ROUTES = {"simple": [SMALL, LARGE], "complex": [LARGE, SMALL]}
+
+# Model profiles per scenario (see fakes.FakeFleetModel); seconds at --scale 1
+SCENARIOS: Dict[str, Dict[str, Dict[str, Any]]] = {
+    "steady": {
+        SMALL: {"latency": "normal:0.004,0.001"},
+        LARGE: {"latency": "normal:0.010,0.002"},
+    },
+    # The small model answers nothing for a while
+    "outage": {
+        SMALL: {"latency": "normal:0.004,0.001", "degraded": {"seconds": [0.5, 1.5], "errors": 1.0}},
+        LARGE: {"latency": "normal:0.010,0.002"},
+    },
+    # The large model slows down well past the latency budget
+    "slowdown": {
+        SMALL: {"latency": "normal:0.004,0.001"},
+        LARGE: {"latency": "normal:0.010,0.002", "degraded": {"seconds": [0.5, 2.0], "latency": "normal:0.060,0.01"}},
+    },
+    # Both models drop some calls all the time
+    "flaky": {
+        SMALL: {"latency": "normal:0.004,0.001", "errors": 0.1},
+        LARGE: {"latency": "normal:0.010,0.002", "errors": 0.05},
+    },
+}
+
+
+def scaled(profiles: Dict[str, Dict[str, Any]], scale: float) -> Dict[str, Dict[str, Any]]:
+    """Profiles with every latency and incident window multiplied by `scale`."""
+
+    def scale_spec(spec: str) -> str:
+        kind, _, params = spec.partition(":")
+        values = ",".join(str(float(p) * scale) for p in params.split(","))
+        return f"{kind}:{values}"
+
+    result = {}
+    for name, profile in profiles.items():
+        profile = dict(profile)
+        if "latency" in profile:
+            profile["latency"] = scale_spec(profile["latency"])
+        if "degraded" in profile:
+            degraded = profile["degraded"] = scaled({"d": profile["degraded"]}, scale)["d"]
+            degraded["seconds"] = [seconds * scale for seconds in degraded["seconds"]]
+        result[name] = profile
+    return result
+
+
+def run(mode: str, profiles: Dict[str, Dict[str, Any]], repeats: int, seed: int,
+        latency_budget: float, cooldown: float) -> Dict[str, Any]:
+    from agent import ShoppingAgent
+    from metrics import FALLBACK_REPLIES
+    from model_router import ModelRouter
+    from products import ProductService
+
+    fleet = fakes.fake_fleet_class(profiles, seed)
+    fakes.install(fleet)
+    router = ModelRouter(ROUTES, window=20, latency_budget=latency_budget, cooldown=cooldown) \
+        if mode == "routed" else False
+    turns: List[float] = []
+    fallbacks_before = FALLBACK_REPLIES.value(reason="error")
+    with FakeBackend(product_count=10) as backend, tempfile.TemporaryDirectory() as tmp:
+        service = ProductService(base_url=backend.base_url, snapshot_path=os.path.join(tmp, "catalog.snapshot"))
+        service.fetch_products()
+        started = time.perf_counter()
+        for _ in range(repeats):
+            for script in CONVERSATIONS:
+                agent = ShoppingAgent(model_name=LARGE, product_service=service, context_cache=False,
+                                      router=router)
+                for user_input in [None] + script:
+                    turn_started = time.perf_counter()
+                    if user_input is None:
+                        agent.run_greeting_chain()
+                    else:
+                        agent.run_conversation_chain(user_input)
+                    turns.append(time.perf_counter() - turn_started)
+        elapsed = time.perf_counter() - started
+    return {
+        "turn": summarize(turns),
+        "seconds": round(elapsed, 3),
+        "fallback_replies": int(FALLBACK_REPLIES.value(reason="error") - fallbacks_before),
+        "calls": dict(fleet.counts),
+        "failed_calls": dict(fleet.failures),
+        "models": router.snapshot() if router else {},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated scenario names")
+    parser.add_argument("--repeats", type=int, default=10, help="times to run every scripted conversation")
+    parser.add_argument("--scale", type=float, default=1.0, help="multiply every fake latency by this")
+    parser.add_argument("--latency-budget-ms", type=float, default=30,
+                        help="router p95 budget at --scale 1 (scaled too)")
+    parser.add_argument("--cooldown", type=float, default=0.5, help="seconds a degraded model is skipped")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    args = parser.parse_args()
+
+    logging.disable(logging.ERROR)
+    results = {"repeats": args.repeats, "scale": args.scale, "routes": ROUTES, "results": {}}
+    for scenario in args.scenarios.split(","):
+        profiles = scaled(SCENARIOS[scenario], args.scale)
+        results["results"][scenario] = {}
+        for mode in ("single", "routed"):
+            print(f"Running {scenario} / {mode}...", file=sys.stderr)
+            results["results"][scenario][mode] = run(mode, profiles, args.repeats, args.seed,
+                                                     args.latency_budget_ms / 1000 * args.scale, args.cooldown)
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,145 @@
+"""Startup-time benchmark for the FastAPI server.
+
+Measures `python -X importtime -c "import main"`, the wall time from
+spawning `uvicorn main:app` until /readyz reports the warm-up done, and how
+long the first /chat after that takes, using a fake Gemini model. Fails if
+audio libraries are imported or a budget is exceeded:
+
+    python -m benchmarks.startup --runs 5 --max-import-ms 1500 --output startup.json
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+AUDIO_MODULES = ("speech_recognition", "gtts", "pygame")
+
+
+def profile_imports() -> dict:
+    """Run `import main` under -X importtime and summarise the result."""
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    if result.returncode != 0:
+        raise RuntimeError(f"import main failed:\n{result.stderr[-2000:]}")
+
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        if not self_us.strip().isdigit():
+            continue  # header row
+        # Nested imports are indented by two spaces per level
+        modules.append((name[1:].rstrip(), int(self_us), int(cumulative_us)))
+
+    # main itself plus the modules it imports directly
+    shallow = [m for m in modules if len(m[0]) - len(m[0].lstrip()) <= 2]
+    slowest = sorted(shallow, key=lambda m: m[2], reverse=True)[:10]
+    names = {m[0].strip() for m in modules}
+    return {
+        "wall_ms": round(wall_ms, 1),
+        "main_cumulative_ms": next((m[2] / 1000 for m in modules if m[0] == "main"), None),
+        "module_count": len(modules),
+        "slowest_imports_ms": {m[0].strip(): m[2] / 1000 for m in slowest},
+        "audio_modules_imported": sorted(n for n in names if n.split(".")[0] in AUDIO_MODULES),
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_to_first_chat(timeout: float = 60) -> dict:
+    """Milliseconds from spawning the server to /readyz and to the first /chat reply sent after it."""
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.startup", "--serve", str(port)],
+        cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                if requests.get(f"http://127.0.0.1:{port}/readyz", timeout=5).ok:
+                    break
+            except requests.exceptions.ConnectionError:
+                pass
+            time.sleep(0.01)
+        else:
+            raise TimeoutError("server did not get ready in time")
+        ready = time.perf_counter()
+        response = requests.post(f"http://127.0.0.1:{port}/chat", json={"text": "hello"}, timeout=timeout)
+        response.raise_for_status()
+        done = time.perf_counter()
+        return {"ready_ms": (ready - started) * 1000, "first_chat_ms": (done - started) * 1000,
+                "first_reply_ms": (done - ready) * 1000}
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def serve(port: int) -> None:
+    """Child process: main:app with the fake model installed."""
+    from benchmarks import fakes
+    fakes.install()
+    import uvicorn
+    uvicorn.run("main:app", host="127.0.0.1", port=port, log_level="warning")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--max-import-ms", type=float, help="fail if median import wall time exceeds this")
+    parser.add_argument("--max-first-chat-ms", type=float, help="fail if median time to first /chat exceeds this")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve)
+        return 0
+
+    imports = [profile_imports() for _ in range(args.runs)]
+    first_chat = [time_to_first_chat() for _ in range(args.runs)]
+    results = {
+        "python": sys.version.split()[0],
+        "import_wall_ms": statistics.median(r["wall_ms"] for r in imports),
+        "import_profile": imports[-1],
+        "ready_ms": statistics.median(run["ready_ms"] for run in first_chat),
+        "first_chat_ms": statistics.median(run["first_chat_ms"] for run in first_chat),
+        # The first real request, once /readyz is 200: should cost no more than a warm turn
+        "first_reply_ms": statistics.median(run["first_reply_ms"] for run in first_chat),
+        "first_chat_runs_ms": [round(run["first_chat_ms"], 1) for run in first_chat],
+    }
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    failures = []
+    if results["import_profile"]["audio_modules_imported"]:
+        failures.append(f"audio modules imported at startup: {results['import_profile']['audio_modules_imported']}")
+    if args.max_import_ms and results["import_wall_ms"] > args.max_import_ms:
+        failures.append(f"import took {results['import_wall_ms']:.0f} ms > {args.max_import_ms:.0f} ms")
+    if args.max_first_chat_ms and results["first_chat_ms"] > args.max_first_chat_ms:
+        failures.append(f"first /chat took {results['first_chat_ms']:.0f} ms > {args.max_first_chat_ms:.0f} ms")
+    for failure in failures:
+        print(f"FAIL: {failure}", file=sys.stderr)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
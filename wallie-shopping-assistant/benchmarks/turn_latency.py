@@ -0,0 +1,216 @@
+"""End-to-end turn-latency benchmark with fake Gemini and Next.js backends.
+
+Drives ShoppingAgent.run_greeting_chain / run_conversation_chain through
+scripted Hinglish conversations for several catalog sizes and reports
+p50/p95/p99 per stage. Results are written as JSON so two commits can be
+compared:
+
+    python -m benchmarks.turn_latency --sizes 10,1000,100000 --output before.json
+    python -m benchmarks.turn_latency --sizes 10,1000,100000 --compare before.json
+
+--context-cache local with --prefill-ms shows the input tokens and model
+time saved by caching the static prompt prefix. --deadline runs every turn
+under a turn deadline and counts the turns answered from templates.
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict, List
+
+from benchmarks import fakes
+from benchmarks.fake_backend import FakeBackend
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CONVERSATIONS = [
+    ["hello", "mujhe wireless headphones chahiye", "haan, yeh lena hai", "ok order kar do"],
+    ["hi, kya aapke paas smart watch hai?", "iska price kya hai?", "theek hai, haan", "yes buy kar do"],
+    ["namaste", "running shoes dikhao", "size 9 mein chahiye, ok", "haan order confirm karo"],
+    ["bluetooth speaker ka bass kaisa hai?", "accha, sure", "do piece lena hai", "okay"],
+    ["kuch gift dikhao", "backpack kitne ka hai?", "ok", "haan lena hai", "order kar do"],
+]
+
+# Agent methods timed for each stage; a stage sums all its calls in one turn
+STAGES = {
+    "mention_detection": ["_analyze", "_track_product_mention"],
+    "prompt_build": ["_get_prompt_template", "_format_prompt"],
+    "model": ["_call_model"],
+    "checkout": ["add_to_cart"],
+}
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(samples)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    return {
+        "count": len(samples),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 4),
+        "p50_ms": round(percentile(samples, 50) * 1000, 4),
+        "p95_ms": round(percentile(samples, 95) * 1000, 4),
+        "p99_ms": round(percentile(samples, 99) * 1000, 4),
+    }
+
+
+class StageTimer:
+    """Wraps agent methods and accumulates their time per turn."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self._current = None
+
+    def instrument(self, agent) -> None:
+        for stage, methods in STAGES.items():
+            for method in methods:
+                setattr(agent, method, self._timed(getattr(agent, method), stage))
+
+    def _timed(self, function, stage):
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                if self._current is not None:
+                    self._current[stage] += time.perf_counter() - started
+        return timed
+
+    @contextmanager
+    def turn(self, name: str):
+        self._current = defaultdict(float)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples[name].append(time.perf_counter() - started)
+            for stage in STAGES:
+                self.samples[stage].append(self._current[stage])
+            self._current = None
+
+
+def run_size(size: int, repeats: int, model_latency: str, seed: int,
+             context_cache: str = "off", prefill: float = 0.0,
+             turn_deadline: float = None) -> Dict[str, Dict[str, float]]:
+    from agent import ShoppingAgent
+    from deadline import deadline
+    from metrics import FALLBACK_REPLIES, PROMPT_TOKENS
+    from products import ProductService
+    from prompt_cache import create_context_cache
+
+    fakes.install(fakes.fake_model_class(model_latency, seed, prefill))
+    cache = create_context_cache(context_cache)
+    tokens_before = {kind: PROMPT_TOKENS.value(kind=kind) for kind in ("cached", "uncached")}
+    fallbacks_before = {reason: FALLBACK_REPLIES.value(reason=reason) for reason in ("deadline", "error")}
+    with FakeBackend(product_count=size) as backend, tempfile.TemporaryDirectory() as tmp:
+        service = ProductService(base_url=backend.base_url,
+                                 snapshot_path=os.path.join(tmp, "catalog.snapshot"))
+        started = time.perf_counter()
+        service.fetch_products()
+        catalog_load = time.perf_counter() - started
+
+        timer = StageTimer()
+        for _ in range(repeats):
+            for script in CONVERSATIONS:
+                agent = ShoppingAgent(product_service=service, context_cache=cache or False)
+                timer.instrument(agent)
+                with timer.turn("greeting_turn"), deadline(turn_deadline):
+                    agent.run_greeting_chain()
+                for user_input in script:
+                    with timer.turn("turn"), deadline(turn_deadline):
+                        agent.run_conversation_chain(user_input)
+
+        results = {name: summarize(samples) for name, samples in timer.samples.items()}
+        results["catalog_load"] = summarize([catalog_load])
+        results["cart_posts"] = {"count": backend.count("/api/voice-cart", "POST")}
+        results["fallback_replies"] = {
+            reason: int(FALLBACK_REPLIES.value(reason=reason) - before) for reason, before in fallbacks_before.items()
+        }
+        calls = len(timer.samples["turn"]) + len(timer.samples["greeting_turn"])
+        results["prompt_tokens_per_call"] = {
+            kind: round((PROMPT_TOKENS.value(kind=kind) - before) / calls, 1)
+            for kind, before in tokens_before.items()
+        }
+        return results
+
+
+def compare(current: dict, baseline: dict, threshold: float, floor_ms: float) -> List[str]:
+    """Stages whose p95 grew by more than threshold x (and floor_ms) vs baseline."""
+    regressions = []
+    for size, stages in current["results"].items():
+        for stage, stats in stages.items():
+            before = baseline.get("results", {}).get(size, {}).get(stage, {})
+            if "p95_ms" not in stats or "p95_ms" not in before:
+                continue
+            if stats["p95_ms"] > before["p95_ms"] * threshold and stats["p95_ms"] - before["p95_ms"] > floor_ms:
+                regressions.append(f"{size} products, {stage}: p95 {before['p95_ms']:.3f} -> {stats['p95_ms']:.3f} ms")
+    return regressions
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10,1000,100000", help="comma-separated catalog sizes (up to 1000000)")
+    parser.add_argument("--repeats", type=int, default=5, help="times to run every scripted conversation")
+    parser.add_argument("--model-latency", default="0", help='fake model delay, e.g. "lognormal:-1.2,0.4"')
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--context-cache", choices=["off", "local"], default="off",
+                        help="send static prompt prefixes through the local prefix cache")
+    parser.add_argument("--prefill-ms", type=float, default=0,
+                        help="fake model time per 1,000 uncached input tokens")
+    parser.add_argument("--deadline", type=float, help="turn deadline in seconds (default: none)")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="baseline JSON from an earlier run")
+    parser.add_argument("--threshold", type=float, default=1.2, help="allowed p95 ratio vs baseline")
+    parser.add_argument("--floor-ms", type=float, default=0.05, help="ignore p95 changes smaller than this")
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    results = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "model_latency": args.model_latency,
+        "context_cache": args.context_cache,
+        "prefill_ms": args.prefill_ms,
+        "deadline": args.deadline,
+        "results": {},
+    }
+    for size in (int(s) for s in args.sizes.split(",")):
+        print(f"Running {size} products...", file=sys.stderr)
+        results["results"][str(size)] = run_size(size, args.repeats, args.model_latency, args.seed,
+                                                  args.context_cache, args.prefill_ms / 1000, args.deadline)
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold, args.floor_ms)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}", file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
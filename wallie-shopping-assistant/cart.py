@@ -0,0 +1,98 @@
+import re
+from typing import Any, Dict, Iterable, NamedTuple, Optional
+
+from catalog import format_price, parse_price
+from intents import WORD_CHARS
+
+# "do piece", "3 pcs", "तीन पीस": a count only counts next to a unit, since
+# "kar do" and "size 9" are not quantities
+NUMBER_WORDS: Dict[str, int] = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6,
+    "ek": 1, "do": 2, "teen": 3, "char": 4, "chaar": 4, "paanch": 5, "panch": 5, "chhe": 6,
+    "एक": 1, "दो": 2, "तीन": 3, "चार": 4, "पांच": 5, "पाँच": 5, "छह": 6,
+}
+UNITS = ["piece", "pieces", "pcs", "pc", "unit", "units", "item", "items", "nag", "pair", "pairs",
+         "jodi", "jode", "पीस", "नग", "जोड़ी", "जोड़े"]
+QUANTITY_RE = re.compile(
+    rf"(?<![{WORD_CHARS}])(\d{{1,3}}|{'|'.join(map(re.escape, NUMBER_WORDS))})\s*"
+    rf"(?:{'|'.join(map(re.escape, sorted(UNITS, key=len, reverse=True)))})(?![{WORD_CHARS}])",
+    re.IGNORECASE,
+)
+
+
+def parse_quantity(text: str) -> Optional[int]:
+    """Quantity asked for in a message ("do piece lena hai" -> 2), or None."""
+    match = QUANTITY_RE.search(text)
+    if not match:
+        return None
+    count = match.group(1).lower()
+    quantity = int(count) if count.isdigit() else NUMBER_WORDS[count]
+    return quantity or None
+
+
+class CartLine(NamedTuple):
+    product_id: int
+    name: str
+    price: int  # integer paise per unit, as in the catalog
+    quantity: int
+
+    @property
+    def amount(self) -> int:
+        return self.price * self.quantity
+
+
+class Cart:
+    """Local mirror of the customer's cart, with exact integer-paise totals.
+
+    Loaded once from GET /api/voice-cart and updated after each successful
+    add, so "cart mein kya hai" and the checkout total never need the model.
+    """
+
+    def __init__(self):
+        self.lines: Dict[int, CartLine] = {}
+        self.synced = False
+
+    def load(self, items: Iterable[Dict[str, Any]]) -> None:
+        """Replace the contents with the cart API's items."""
+        self.lines = {}
+        for item in items:
+            self._add(int(item["productId"]), item.get("name", ""), item.get("price", 0), int(item.get("quantity", 1)))
+        self.synced = True
+
+    def add(self, product: Dict[str, Any], quantity: int = 1) -> None:
+        """Mirror an add that the cart API accepted."""
+        self._add(int(product["id"]), product["name"], product["price"], quantity)
+
+    def _add(self, product_id: int, name: str, price: Any, quantity: int) -> None:
+        line = self.lines.get(product_id)
+        if line:
+            self.lines[product_id] = line._replace(quantity=line.quantity + quantity)
+        else:
+            self.lines[product_id] = CartLine(product_id, name, parse_price(price), quantity)
+
+    def total(self) -> int:
+        return sum(line.amount for line in self.lines.values())
+
+    def total_with(self, product: Dict[str, Any], quantity: int = 1) -> int:
+        """Total after adding `quantity` of a product, without adding it."""
+        return self.total() + parse_price(product["price"]) * quantity
+
+    def __len__(self) -> int:
+        return sum(line.quantity for line in self.lines.values())
+
+    def describe(self) -> str:
+        """Hinglish summary of the cart and its total."""
+        if not self.lines:
+            return "Aapka cart abhi khaali hai."
+        items = ", ".join(f"{line.quantity} x {line.name} ({format_price(line.amount)})"
+                          for line in self.lines.values())
+        return f"Aapke cart mein hai: {items}. Total: {format_price(self.total())}."
+
+    def describe_order(self, product: Optional[Dict[str, Any]], quantity: int = 1) -> str:
+        """The order about to be placed and the cart total after it, for the checkout prompt."""
+        if not product:
+            return f"Cart total: {format_price(self.total())}."
+        price = parse_price(product["price"])
+        return (f"{quantity} x {product['name']} (product_id {product['id']}) at {format_price(price)} each "
+                f"= {format_price(price * quantity)}. "
+                f"Cart total after this order: {format_price(self.total_with(product, quantity))}.")
@@ -0,0 +1,335 @@
+import hashlib
+import json
+import mmap
+import os
+import struct
+from array import array
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Dict, List, Any, Iterable, Optional
+
+import numpy as np
+
+SNAPSHOT_MAGIC = b"WALLIECAT"
+SNAPSHOT_FORMAT_VERSION = 1
+_SNAPSHOT_PREFIX = struct.Struct("<9sII")  # magic, format version, header length
+_SNAPSHOT_ALIGN = 64
+
+
+def parse_price(value: Any) -> int:
+    """Convert a price like 199.99, "199.99" or "₹50,000" to integer paise."""
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value * 100
+    text = str(value).replace("₹", "").replace(",", "").strip()
+    # Fast path for the plain "199.99" strings the products API returns
+    whole, _, fraction = text.partition('.')
+    if whole.isdigit() and len(fraction) <= 2 and (fraction.isdigit() or not fraction):
+        return int(whole) * 100 + int(fraction.ljust(2, '0'))
+    try:
+        amount = Decimal(text)
+    except InvalidOperation:
+        raise ValueError(f"Invalid price: {value!r}")
+    return int((amount * 100).quantize(Decimal("1"), rounding=ROUND_HALF_UP))
+
+
+def format_price(paise: int) -> str:
+    """Format integer paise the way prompts and the UI show prices ("-₹1.50" when negative)."""
+    paise = int(paise)
+    sign, paise = ("-", -paise) if paise < 0 else ("", paise)
+    return f"{sign}₹{paise // 100}.{paise % 100:02d}"
+
+
+def product_key(name: str) -> str:
+    """Search-friendly key of a product name ("Smart Watch" -> "smartwatch")."""
+    return name.lower().replace(' ', '').replace('-', '')
+
+
+class StringColumn:
+    """Variable-length strings stored as one UTF-8 buffer plus offsets."""
+
+    def __init__(self, buffer: bytes, offsets: np.ndarray):
+        self.buffer = buffer
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, row: int) -> str:
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return bytes(self.buffer[start:end]).decode('utf-8')
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self[row]
+
+
+class CatalogBuilder:
+    """Accumulates product records into compact columns, one record at a time."""
+
+    def __init__(self):
+        self.ids = array('q')
+        self.prices = array('q')
+        self.category_codes = array('i')
+        self.categories: List[str] = []
+        self._category_lookup: Dict[str, int] = {}
+        self.names = bytearray()
+        self.name_offsets = array('q', [0])
+        self.descriptions = bytearray()
+        self.description_offsets = array('q', [0])
+        self.image_urls = bytearray()
+        self.image_url_offsets = array('q', [0])
+
+    def add(self, product: Dict[str, Any]) -> None:
+        """Append one product in the /api/products shape."""
+        category = product.get('category') or 'General'
+        code = self._category_lookup.get(category)
+        if code is None:
+            code = len(self.categories)
+            self._category_lookup[category] = code
+            self.categories.append(category)
+
+        self.ids.append(int(product['id']))
+        self.prices.append(parse_price(product['price']))
+        self.category_codes.append(code)
+        self.names += product['name'].encode('utf-8')
+        self.name_offsets.append(len(self.names))
+        self.descriptions += (product.get('description') or '').encode('utf-8')
+        self.description_offsets.append(len(self.descriptions))
+        self.image_urls += (product.get('imageUrl') or '').encode('utf-8')
+        self.image_url_offsets.append(len(self.image_urls))
+
+    def extend(self, products: Iterable[Dict[str, Any]]) -> None:
+        for product in products:
+            self.add(product)
+
+    def merge(self, other: "CatalogBuilder") -> None:
+        """Append all rows of another builder, re-interning its categories."""
+        remap = []
+        for category in other.categories:
+            code = self._category_lookup.get(category)
+            if code is None:
+                code = len(self.categories)
+                self._category_lookup[category] = code
+                self.categories.append(category)
+            remap.append(code)
+
+        self.ids.extend(other.ids)
+        self.prices.extend(other.prices)
+        self.category_codes.extend(array('i', (remap[code] for code in other.category_codes)))
+        for buffer, offsets, other_buffer, other_offsets in (
+            (self.names, self.name_offsets, other.names, other.name_offsets),
+            (self.descriptions, self.description_offsets, other.descriptions, other.description_offsets),
+            (self.image_urls, self.image_url_offsets, other.image_urls, other.image_url_offsets),
+        ):
+            base = len(buffer)
+            buffer += other_buffer
+            offsets.extend(array('q', (base + offset for offset in other_offsets[1:])))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def build(self) -> "Catalog":
+        return Catalog(
+            ids=np.frombuffer(self.ids, dtype=np.int64),
+            prices=np.frombuffer(self.prices, dtype=np.int64),
+            category_codes=np.frombuffer(self.category_codes, dtype=np.int32),
+            categories=list(self.categories),
+            names=StringColumn(bytes(self.names), np.frombuffer(self.name_offsets, dtype=np.int64)),
+            descriptions=StringColumn(bytes(self.descriptions), np.frombuffer(self.description_offsets, dtype=np.int64)),
+            image_urls=StringColumn(bytes(self.image_urls), np.frombuffer(self.image_url_offsets, dtype=np.int64)),
+        )
+
+
+class Catalog:
+    """Columnar, read-only product catalog with integer-paise prices."""
+
+    def __init__(self, ids: np.ndarray, prices: np.ndarray, category_codes: np.ndarray,
+                 categories: List[str], names: StringColumn, descriptions: StringColumn,
+                 image_urls: StringColumn):
+        self.ids = ids
+        self.prices = prices
+        self.category_codes = category_codes
+        self.categories = categories
+        self.names = names
+        self.descriptions = descriptions
+        self.image_urls = image_urls
+        self._price_order: Optional[np.ndarray] = None
+        self._category_orders: Dict[Optional[int], Any] = {}
+        self._row_by_id: Optional[Dict[int, int]] = None
+        self._row_by_key: Optional[Dict[str, int]] = None
+        self._version: Optional[str] = None
+        self._mapping: Optional[mmap.mmap] = None
+
+    @classmethod
+    def from_records(cls, products: Iterable[Dict[str, Any]]) -> "Catalog":
+        builder = CatalogBuilder()
+        builder.extend(products)
+        return builder.build()
+
+    @classmethod
+    def empty(cls) -> "Catalog":
+        return CatalogBuilder().build()
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def version(self) -> str:
+        """Content hash, stable across processes for the same catalog."""
+        if self._version is None:
+            digest = hashlib.blake2b(digest_size=8)
+            for column in (self.ids, self.prices, self.category_codes):
+                digest.update(column.tobytes())
+            digest.update("\x00".join(self.categories).encode('utf-8'))
+            for strings in (self.names, self.descriptions, self.image_urls):
+                digest.update(bytes(strings.buffer))
+            self._version = digest.hexdigest()
+        return self._version
+
+    def category_code(self, category: str) -> Optional[int]:
+        """Code for a category name (case-insensitive), or None if unknown."""
+        category = category.lower()
+        for code, name in enumerate(self.categories):
+            if name.lower() == category:
+                return code
+        return None
+
+    def record(self, row: int) -> Dict[str, Any]:
+        """Dict view of one row (the shape the API, tools and prompts use)."""
+        return {
+            "id": int(self.ids[row]),
+            "name": self.names[row],
+            "price": format_price(self.prices[row]),
+            "description": self.descriptions[row],
+            "category": self.categories[self.category_codes[row]],
+            "imageUrl": self.image_urls[row]
+        }
+
+    def as_dict(self) -> Dict[str, Dict[str, Any]]:
+        """Build the legacy key -> product dict (later rows win on key clashes)."""
+        return {product_key(self.names[row]): self.record(row) for row in range(len(self))}
+
+    def row_for_id(self, product_id: int) -> Optional[int]:
+        if self._row_by_id is None:
+            self._row_by_id = {int(pid): row for row, pid in enumerate(self.ids)}
+        return self._row_by_id.get(int(product_id))
+
+    def row_for_key(self, key: str) -> Optional[int]:
+        if self._row_by_key is None:
+            self._row_by_key = {product_key(name): row for row, name in enumerate(self.names)}
+        return self._row_by_key.get(key)
+
+    def _price_index(self, code: Optional[int]):
+        """Rows ordered by price plus their sorted prices, per category."""
+        if self._price_order is None:
+            self._price_order = np.argsort(self.prices, kind='stable')
+        if code not in self._category_orders:
+            rows = self._price_order
+            if code is not None:
+                rows = rows[self.category_codes[rows] == code]
+            self._category_orders[code] = (rows, self.prices[rows])
+        return self._category_orders[code]
+
+    def rows_in_price_range(self, min_price: Any = None, max_price: Any = None,
+                            category: Optional[str] = None) -> np.ndarray:
+        """Rows with min_price <= price <= max_price, cheapest first."""
+        code = None
+        if category is not None:
+            code = self.category_code(category)
+            if code is None:
+                return np.empty(0, dtype=np.int64)
+
+        rows, prices = self._price_index(code)
+        # Binary search (bisect) on the sorted price column for both bounds
+        start = 0 if min_price is None else int(np.searchsorted(prices, parse_price(min_price), side='left'))
+        end = len(rows) if max_price is None else int(np.searchsorted(prices, parse_price(max_price), side='right'))
+        return rows[start:end]
+
+    def products_under(self, max_price: Any, category: Optional[str] = None,
+                       limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Products at or below max_price, e.g. under ₹500 in Electronics."""
+        rows = self.rows_in_price_range(max_price=max_price, category=category)
+        if limit is not None:
+            rows = rows[:limit]
+        return [self.record(int(row)) for row in rows]
+
+    def save_snapshot(self, path: str) -> None:
+        """Write the catalog and its price index to a binary snapshot file.
+
+        Layout: magic, format version, JSON header length, JSON header, then
+        64-byte aligned column blobs that open_snapshot maps without copying.
+        The file is written next to its target and renamed into place.
+        """
+        rows, _ = self._price_index(None)
+        blobs = {
+            "ids": self.ids, "prices": self.prices, "category_codes": self.category_codes,
+            "price_order": rows,
+            "names": self.names.buffer, "name_offsets": self.names.offsets,
+            "descriptions": self.descriptions.buffer, "description_offsets": self.descriptions.offsets,
+            "image_urls": self.image_urls.buffer, "image_url_offsets": self.image_urls.offsets,
+        }
+
+        columns = {}
+        position = 0
+        for name, blob in blobs.items():
+            dtype = blob.dtype.str if isinstance(blob, np.ndarray) else "bytes"
+            size = blob.nbytes if isinstance(blob, np.ndarray) else len(blob)
+            columns[name] = [position, size, dtype]
+            position += -(-size // _SNAPSHOT_ALIGN) * _SNAPSHOT_ALIGN
+
+        header = json.dumps({
+            "catalog_version": self.version,
+            "count": len(self),
+            "categories": self.categories,
+            "columns": columns,
+        }).encode('utf-8')
+        data_start = -(-(_SNAPSHOT_PREFIX.size + len(header)) // _SNAPSHOT_ALIGN) * _SNAPSHOT_ALIGN
+
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(_SNAPSHOT_PREFIX.pack(SNAPSHOT_MAGIC, SNAPSHOT_FORMAT_VERSION, len(header)))
+            f.write(header)
+            for name, blob in blobs.items():
+                f.seek(data_start + columns[name][0])
+                f.write(blob.tobytes() if isinstance(blob, np.ndarray) else bytes(blob))
+            f.truncate(data_start + position)
+        os.replace(temp_path, path)
+
+    @classmethod
+    def open_snapshot(cls, path: str) -> "Catalog":
+        """Memory-map a snapshot written by save_snapshot.
+
+        Columns are read-only views into the mapping, so processes that open
+        the same file share its pages through the OS page cache.
+        """
+        with open(path, 'rb') as f:
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, format_version, header_length = _SNAPSHOT_PREFIX.unpack_from(mapping, 0)
+        if magic != SNAPSHOT_MAGIC or format_version != SNAPSHOT_FORMAT_VERSION:
+            mapping.close()
+            raise ValueError(f"Unsupported catalog snapshot: {path}")
+        header = json.loads(mapping[_SNAPSHOT_PREFIX.size:_SNAPSHOT_PREFIX.size + header_length])
+        data_start = -(-(_SNAPSHOT_PREFIX.size + header_length) // _SNAPSHOT_ALIGN) * _SNAPSHOT_ALIGN
+
+        view = memoryview(mapping)
+
+        def column(name):
+            offset, size, dtype = header["columns"][name]
+            start = data_start + offset
+            if dtype == "bytes":
+                return view[start:start + size]
+            return np.frombuffer(mapping, dtype=np.dtype(dtype), count=size // np.dtype(dtype).itemsize, offset=start)
+
+        catalog = cls(
+            ids=column("ids"),
+            prices=column("prices"),
+            category_codes=column("category_codes"),
+            categories=header["categories"],
+            names=StringColumn(column("names"), column("name_offsets")),
+            descriptions=StringColumn(column("descriptions"), column("description_offsets")),
+            image_urls=StringColumn(column("image_urls"), column("image_url_offsets")),
+        )
+        catalog._version = header["catalog_version"]
+        catalog._price_order = column("price_order")
+        catalog._mapping = mapping
+        return catalog
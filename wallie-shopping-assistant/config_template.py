@@ -21,3 +21,66 @@ TTS_SLOW = False
 API_TIMEOUT = 10
 SPEECH_TIMEOUT = 10
 SPEECH_PHRASE_LIMIT = 15
+
+# Time budget per conversation turn (seconds). The model call gets what is
+# left of it; past it, the reply comes from local catalog templates. API
+# calls (catalog, cart) use at most API_TIMEOUT.
+TURN_DEADLINE = 8.0
+
+# Admission control for /chat and /ws/voice turns: how many run at once, how
+# many may wait (checkout turns first, new greetings last) and for how long.
+# Past either limit the turn is turned away with 503 and Retry-After.
+CHAT_WORKERS = 16
+CHAT_QUEUE = 64
+CHAT_MAX_QUEUE_WAIT = 2.0
+
+# Catalog snapshot used for instant warm starts (memory-mapped at startup)
+CATALOG_SNAPSHOT_PATH = "catalog.snapshot"
+
+# Token for the /debug profiling endpoints (sent as the X-Admin-Token header).
+# Leave as None to disable them.
+ADMIN_TOKEN = None
+
+# Cache the static part of each prompt (persona + catalog) with the provider:
+# "gemini", "local" (offline stand-in for tests/benchmarks) or "off". Gemini
+# only caches prefixes of 32,768 tokens or more, on versioned model names
+# (e.g. "gemini-1.5-flash-002" in MODEL_ROUTES); smaller catalogs gain nothing
+CONTEXT_CACHE = "off"
+CONTEXT_CACHE_TTL = 3600
+
+# Speculative replies from interim transcripts (/chat/interim): how close the
+# final transcript must be to reuse one, and how many may run at once
+SPECULATION_MIN_SIMILARITY = 0.9
+SPECULATION_WORKERS = 8
+
+# Speech-to-text for the /ws/voice WebSocket: "google", or "scripted" to
+# transcribe each utterance as the next line of STT_SCRIPT (offline testing)
+STT_ENGINE = "google"
+STT_SCRIPT = []
+
+# Server-side TTS (/tts and /ws/voice): worker threads, queue length before
+# requests are turned away with 503, and the longest text accepted
+TTS_WORKERS = 4
+TTS_QUEUE = 8
+TTS_MAX_CHARS = 1000
+# Memory for finished /tts audio. Only audio served from here gets a
+# long-lived ETag; a reply streamed while it is synthesized is sent no-store
+TTS_CACHE_MB = 64
+
+# Record every conversation turn to this JSONL file for offline replay
+# (python -m benchmarks.replay). None turns recording off.
+RECORD_PATH = None
+
+# Model for each turn: "simple" turns (greetings, short confirmations) and
+# "complex" ones (open product questions) each list models in order of
+# preference. A model whose error rate or p95 latency over its last
+# ROUTER_WINDOW calls goes over the limits is skipped for ROUTER_COOLDOWN
+# seconds. None sends every turn to gemini-1.5-flash.
+MODEL_ROUTES = {
+    "simple": ["gemini-1.5-flash-8b", "gemini-1.5-flash"],
+    "complex": ["gemini-1.5-flash", "gemini-1.5-flash-8b"],
+}
+ROUTER_WINDOW = 50
+ROUTER_MAX_ERROR_RATE = 0.2
+ROUTER_LATENCY_BUDGET = 3.0
+ROUTER_COOLDOWN = 30
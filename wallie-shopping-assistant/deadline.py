@@ -0,0 +1,61 @@
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+# Monotonic time by which the current turn must have answered. A context
+# variable, so it follows the turn through FastAPI's worker threads and
+# run_in_threadpool without being passed to every function.
+_deadline: ContextVar[Optional[float]] = ContextVar("turn_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The turn's time budget ran out before a stage could finish."""
+
+
+class deadline:
+    """Sets the deadline `seconds` from now for the block.
+
+    A deadline already in force is only ever shortened, so a nested block
+    cannot give a stage more time than the whole turn has left.
+    """
+
+    __slots__ = ("seconds", "_token")
+
+    def __init__(self, seconds: Optional[float]):
+        self.seconds = seconds
+        self._token = None
+
+    def __enter__(self) -> "deadline":
+        if self.seconds is not None:
+            at = time.monotonic() + self.seconds
+            current = _deadline.get()
+            self._token = _deadline.set(at if current is None else min(at, current))
+        return self
+
+    def __exit__(self, *exc) -> None:
+        if self._token is not None:
+            _deadline.reset(self._token)
+            self._token = None
+
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current turn (may be negative), or None without a deadline."""
+    at = _deadline.get()
+    return None if at is None else at - time.monotonic()
+
+
+def expired() -> bool:
+    left = remaining()
+    return left is not None and left <= 0
+
+
+def check_remaining(stage: str) -> None:
+    """Raise DeadlineExceeded if the turn has no time left for `stage`."""
+    if expired():
+        raise DeadlineExceeded(f"no time left for {stage}")
+
+
+def request_timeout(cap: float, floor: float = 0.1) -> float:
+    """Timeout for a blocking call: what the turn has left, between floor and cap seconds."""
+    left = remaining()
+    return cap if left is None else max(floor, min(cap, left))
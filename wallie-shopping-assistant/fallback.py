@@ -0,0 +1,40 @@
+from typing import Any, Dict, Optional
+
+from catalog import format_price, parse_price
+
+# Products named when the reply cannot point at one the customer asked about
+EXAMPLE_PRODUCTS = 3
+
+# Hinglish replies built from the catalog and the conversation phase, for a
+# turn the model could not answer in time. "{...}_product" variants are
+# used when a product has been mentioned. None of them places an order:
+# checkout asks the customer to confirm again, and that turn goes to the
+# model.
+FALLBACK_TEMPLATES: Dict[str, str] = {
+    "greeting": "Namaste! Main aapki shopping assistant hoon. Hamare paas {examples} jaise products hain. "
+                "Aaj aap kya lena chahenge?",
+    "product_inquiry": "Hamare paas {examples} aur bhi bahut kuch hai. Aap kis product ke baare mein jaanna chahenge?",
+    "product_inquiry_product": "{name} ki price {price} hai. Kya aap ise lena chahenge?",
+    "details": "Aapko kitne pieces chahiye? Batayein toh main order aage badhaun.",
+    "details_product": "{name} ({price}) ke kitne pieces chahiye? Batayein toh main order aage badhaun.",
+    "checkout": "Aapka cart total {cart_total} hai. Kya main order confirm kar doon?",
+    "checkout_product": "{quantity} x {name}, total {total}. Kya main yeh order confirm kar doon?",
+}
+
+
+def fallback_reply(phase: str, catalog, product: Optional[Dict[str, Any]] = None, quantity: int = 1,
+                   cart=None) -> str:
+    """Reply for `phase` from the catalog, the product being discussed and the local cart.
+
+    Needs no network: the cart is used as last synced, never fetched.
+    """
+    phase = phase if phase in FALLBACK_TEMPLATES else "product_inquiry"
+    template = FALLBACK_TEMPLATES.get(f"{phase}_product") if product else None
+    examples = ", ".join(catalog.record(row)["name"] for row in range(min(EXAMPLE_PRODUCTS, len(catalog))))
+    # An empty Cart is falsy, hence "is None"
+    cart_total = 0 if cart is None else cart.total()
+    fields = {"examples": examples or "kai", "cart_total": format_price(cart_total)}
+    if template:
+        total = parse_price(product["price"]) * quantity + cart_total
+        fields.update(name=product["name"], price=product["price"], quantity=quantity, total=format_price(total))
+    return (template or FALLBACK_TEMPLATES[phase]).format(**fields)
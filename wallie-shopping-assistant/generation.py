@@ -0,0 +1,91 @@
+import re
+from typing import Any, Dict, Optional, Tuple
+
+from deadline import DeadlineExceeded, expired
+from tools import ModelReply, parse_response
+
+# Per-phase generation settings. max_output_tokens bounds generation time
+# (and what TTS has to read); "sentences" is the client-side budget a
+# streamed reply is cut to. Checkout reads its stream to the end, since the
+# add_to_cart call may come after the confirmation text, and is only trimmed.
+PHASE_GENERATION: Dict[str, Dict[str, Any]] = {
+    "greeting": {"max_output_tokens": 120, "temperature": 0.9, "sentences": 3},
+    "product_inquiry": {"max_output_tokens": 200, "temperature": 0.7, "sentences": 4},
+    "details": {"max_output_tokens": 120, "temperature": 0.5, "sentences": 3},
+    "checkout": {"max_output_tokens": 150, "temperature": 0.2, "sentences": 3, "read_to_end": True},
+}
+# The history in each prompt reads "Customer: ... / Assistant: ...", which
+# the model sometimes carries on past its own reply
+STOP_SEQUENCES = ["\nCustomer:", "\nAssistant:"]
+
+# A sentence ends at . ! ? or the Devanagari danda, followed by a space or the end
+SENTENCE_END_RE = re.compile(r"[.!?।]+(?=\s|$)")
+
+
+def generation_config(phase: Optional[str]) -> Optional[Dict[str, Any]]:
+    """generation_config for generate_content in a phase (None: the model's defaults)."""
+    settings = PHASE_GENERATION.get(phase)
+    if settings is None:
+        return None
+    return {
+        "max_output_tokens": settings["max_output_tokens"],
+        "temperature": settings["temperature"],
+        "stop_sequences": STOP_SEQUENCES,
+    }
+
+
+def cut_to_sentences(text: str, budget: Optional[int]) -> Optional[str]:
+    """The first `budget` complete sentences of text, or None if it has fewer."""
+    if not budget:
+        return None
+    for count, match in enumerate(SENTENCE_END_RE.finditer(text), 1):
+        if count == budget:
+            return text[:match.end()]
+    return None
+
+
+def complete_sentences(text: str) -> str:
+    """Text up to the end of its last complete sentence ("" if there is none)."""
+    end = 0
+    for match in SENTENCE_END_RE.finditer(text):
+        end = match.end()
+    return text[:end]
+
+
+def read_stream(response: Any, phase: Optional[str], model: Any, request: Any) -> Tuple[ModelReply, bool]:
+    """Read a streamed generate_content response into a ModelReply.
+
+    Returns (reply, cut). Once the text holds the phase's sentence budget
+    the rest of the stream is dropped, unless the phase reads to the end
+    or a function call has started; the text is then trimmed to the budget
+    after the whole response is read. If the turn's deadline passes
+    mid-stream, the complete sentences so far are the reply; with none (or
+    a function call under way) DeadlineExceeded is raised.
+    """
+    settings = PHASE_GENERATION.get(phase, {})
+    budget = settings.get("sentences")
+    stop_early = not settings.get("read_to_end")
+    calling = False
+    text = ""
+    for chunk in response:
+        candidates = getattr(chunk, "candidates", None)
+        for part in candidates[0].content.parts if candidates else []:
+            call = getattr(part, "function_call", None)
+            if call is not None and call.name:
+                calling = True
+            elif getattr(part, "text", ""):
+                text += part.text
+        if expired():
+            partial = "" if calling else complete_sentences(text)
+            if not partial:
+                raise DeadlineExceeded("turn deadline passed while the reply was streaming")
+            return ModelReply(partial.strip(), [], model, request, None), True
+        cut = cut_to_sentences(text, budget) if stop_early and not calling else None
+        if cut is not None:
+            return ModelReply(cut.strip(), [], model, request, None), True
+
+    reply = parse_response(response, model, request)
+    cut = cut_to_sentences(reply.text, budget)
+    if cut is None:
+        return reply, False
+    return reply._replace(text=cut.strip()), True
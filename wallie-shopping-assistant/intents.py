@@ -0,0 +1,193 @@
+import re
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from aliases import AliasIndex
+
+# \w alone splits Devanagari words at their vowel signs (matras)
+WORD_CHARS = r"\w\u0900-\u097F"
+TOKEN_RE = re.compile(rf"[{WORD_CHARS}]+")
+
+# Phrases per intent, romanized Hinglish and Devanagari. The longest phrase
+# wins where several start at the same word, so "no problem" is a confirm
+# rather than "no" followed by a word. See EVENT_PRIORITY for messages with
+# more than one intent (so "nahi lena" is a decline).
+INTENT_PHRASES: Dict[str, List[str]] = {
+    "decline": [
+        "no", "nahi", "nahin", "nai", "cancel", "don't", "dont",
+        "नहीं", "नही", "मत", "रहने दो",
+    ],
+    "confirm": [
+        "yes", "haan", "haa", "han", "ok", "okay", "sure", "buy", "order", "lena",
+        "le lo", "theek hai", "thik hai", "chalega", "done", "confirm",
+        "no problem", "koi problem nahi", "koi dikkat nahi", "why not", "kyun nahi", "kyon nahi",
+        "हाँ", "हां", "हा", "ठीक है", "ओके", "लेना", "ले लो", "ऑर्डर", "खरीदना", "चलेगा",
+        "कोई दिक्कत नहीं", "क्यों नहीं",
+    ],
+    # Answered from the local cart (see cart.py); not a phase event
+    "cart_query": [
+        "cart mein kya", "cart me kya", "cart mai kya", "cart dikhao", "cart dikhaiye", "cart batao",
+        "mera cart", "my cart", "cart total", "total kitna", "kitna hua", "bill kitna",
+        "कार्ट में क्या", "कार्ट दिखाओ", "मेरा कार्ट", "कुल कितना",
+    ],
+}
+
+# Phase state machine: (phase, event) -> next phase. Unlisted pairs keep
+# the phase. Message events are detected in EVENT_PRIORITY order, one per
+# turn; "cart_added" comes from a successful add_to_cart function call and
+# ends the order, so the next turn is a new product question rather than
+# another checkout.
+TRANSITIONS: Dict[Tuple[str, str], str] = {
+    ("greeting", "cart_added"): "product_inquiry",
+    ("details", "cart_added"): "product_inquiry",
+    ("checkout", "cart_added"): "product_inquiry",
+    ("greeting", "confirm"): "product_inquiry",
+    ("product_inquiry", "confirm"): "details",
+    ("details", "confirm"): "checkout",
+    ("greeting", "product"): "product_inquiry",
+}
+EVENT_PRIORITY = ("decline", "confirm", "product")
+# Decline words that only negate their neighbour. After a confirm in the same
+# message ("haan, ... nahi") they are a decline only next to one of NEGATABLE
+# ("nahi lena", "don't want"), not in a later aside.
+NEGATIONS = {"no", "nahi", "nahin", "nai", "don't", "dont", "नहीं", "नही", "मत"}
+NEGATABLE = {
+    "lena", "le", "lo", "lunga", "lungi", "buy", "order", "chahiye", "karo", "karna", "want", "need",
+    "add", "confirm", "chalega", "लेना", "ले", "लो", "चाहिए", "करो", "करना", "ऑर्डर", "खरीदना", "चलेगा",
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased words, keeping Devanagari words whole."""
+    return TOKEN_RE.findall(text.lower())
+
+
+def next_phase(phase: str, event: Optional[str]) -> str:
+    return TRANSITIONS.get((phase, event), phase)
+
+
+class IntentMatcher:
+    """All intent phrases compiled into one word-bounded regex.
+
+    One finditer pass reports every intent in a message. Phrases are tried
+    longest first across all intents and mapped back to theirs. Word
+    boundaries are explicit lookarounds so "ok" does not match inside
+    "book" and Devanagari vowel signs count as part of a word. A negation
+    after a confirm counts only when it negates a verb next to it (see
+    NEGATIONS).
+    """
+
+    def __init__(self, phrases: Dict[str, List[str]] = INTENT_PHRASES,
+                 negations: Iterable[str] = NEGATIONS, negatable: Iterable[str] = NEGATABLE):
+        self.intents: Dict[str, str] = {}
+        for intent, words in phrases.items():
+            for word in words:
+                self.intents.setdefault(" ".join(word.lower().split()), intent)
+        # Longest first, so "le lo" is tried before "le" and "no problem" before "no"
+        alternatives = sorted(self.intents, key=len, reverse=True)
+        alternatives = [re.escape(alternative).replace(r"\ ", r"\s+") for alternative in alternatives]
+        self.pattern = re.compile(
+            rf"(?<![{WORD_CHARS}])(?:{'|'.join(alternatives)})(?![{WORD_CHARS}])", re.IGNORECASE
+        )
+        self.negations = set(negations)
+        self.negatable = set(negatable)
+
+    def match(self, text: str) -> Set[str]:
+        found = set()
+        for match in self.pattern.finditer(text):
+            phrase = " ".join(match.group(0).lower().split())
+            intent = self.intents[phrase]
+            if phrase in self.negations and "confirm" in found and not self._negates_verb(text, match):
+                # "haan, koi problem nahi hai" style aside after a yes
+                continue
+            found.add(intent)
+        return found
+
+    def _negates_verb(self, text: str, match: re.Match) -> bool:
+        before = tokenize(text[:match.start()])[-1:]
+        after = tokenize(text[match.end():])[:1]
+        return any(token in self.negatable for token in before + after)
+
+
+class ProductIndex:
+    """Word-level product lookup for one catalog version.
+
+    `words` holds every product-name word longer than two characters, which
+    is enough to tell that some product was mentioned. `phrases` maps full
+    names (spaced and unspaced) to their first row for naming the product.
+    `aliases` catches Devanagari and Hinglish names (हेडफोन, "ghadi") when
+    no English name matched.
+    """
+
+    def __init__(self, names: Iterable[str]):
+        self.words: Set[str] = set()
+        self.phrases: Dict[str, int] = {}
+        self.longest = 1
+        tokenized = []
+        for row, name in enumerate(names):
+            tokens = tokenize(name)
+            if not tokens:
+                continue
+            tokenized.append((row, tokens))
+            self.words.update(token for token in tokens if len(token) > 2)
+            self.phrases.setdefault(" ".join(tokens), row)
+            self.phrases.setdefault("".join(tokens), row)
+            self.longest = max(self.longest, len(tokens))
+        self.aliases = AliasIndex(tokenized)
+
+    def find(self, tokens: List[str]) -> Optional[int]:
+        """Row of the first full product name in the message, longest name first.
+
+        Falls back to the alias index for words that are not English
+        product-name words (those only say that some product was meant).
+        """
+        for start in range(len(tokens)):
+            for length in range(min(self.longest, len(tokens) - start), 0, -1):
+                row = self.phrases.get(" ".join(tokens[start:start + length]))
+                if row is not None:
+                    return row
+        return self.aliases.find([token for token in tokens if token not in self.words])
+
+    def mentions(self, tokens: List[str]) -> bool:
+        return any(token in self.words or token in self.phrases for token in tokens)
+
+
+class Utterance(NamedTuple):
+    intents: Set[str]
+    product_row: Optional[int]
+    mentions_product: bool
+
+
+INTENTS = IntentMatcher()
+
+_index: Tuple[Optional[str], Optional[ProductIndex]] = (None, None)
+_index_lock = threading.Lock()
+
+
+def product_index(catalog) -> ProductIndex:
+    """ProductIndex for the catalog, built once per catalog version."""
+    global _index
+    version, index = _index
+    if version == catalog.version:
+        return index
+    with _index_lock:
+        version, index = _index
+        if version != catalog.version:
+            index = ProductIndex(catalog.names)
+            _index = (catalog.version, index)
+        return index
+
+
+def analyze(text: str, index: ProductIndex) -> Utterance:
+    """Intents and product mentions of one message, tokenized once."""
+    tokens = tokenize(text)
+    row = index.find(tokens)
+    return Utterance(INTENTS.match(text), row, row is not None or index.mentions(tokens))
+
+
+def detect_event(utterance: Utterance) -> Optional[str]:
+    """Highest-priority event in a message, or None."""
+    found = set(utterance.intents)
+    if utterance.mentions_product:
+        found.add("product")
+    return next((event for event in EVENT_PRIORITY if event in found), None)
@@ -0,0 +1,58 @@
+// Minimal MessagePack encoder for API responses (nil, bool, number,
+// string, array and map), so routes don't need an extra dependency.
+const textEncoder = new TextEncoder();
+
+function writeHeader(out, small, smallMax, codes, length) {
+  if (small !== null && length <= smallMax) {
+    out.push(small | length);
+  } else if (codes[0] !== null && length < 0x100) {
+    out.push(codes[0], length);
+  } else if (length < 0x10000) {
+    out.push(codes[1], length >> 8, length & 0xff);
+  } else {
+    out.push(codes[2], (length >>> 24) & 0xff, (length >> 16) & 0xff, (length >> 8) & 0xff, length & 0xff);
+  }
+}
+
+function encodeValue(value, out) {
+  if (value === null || value === undefined) {
+    out.push(0xc0);
+  } else if (typeof value === "boolean") {
+    out.push(value ? 0xc3 : 0xc2);
+  } else if (typeof value === "number") {
+    if (Number.isInteger(value) && value >= 0 && value < 0x80) {
+      out.push(value);
+    } else if (Number.isInteger(value) && value >= -0x80000000 && value <= 0xffffffff) {
+      const view = new DataView(new ArrayBuffer(4));
+      if (value < 0) view.setInt32(0, value);
+      else view.setUint32(0, value);
+      out.push(value < 0 ? 0xd2 : 0xce, ...new Uint8Array(view.buffer));
+    } else {
+      const view = new DataView(new ArrayBuffer(8));
+      view.setFloat64(0, value);
+      out.push(0xcb, ...new Uint8Array(view.buffer));
+    }
+  } else if (typeof value === "string") {
+    const bytes = textEncoder.encode(value);
+    writeHeader(out, 0xa0, 31, [0xd9, 0xda, 0xdb], bytes.length);
+    for (const byte of bytes) out.push(byte);
+  } else if (Array.isArray(value)) {
+    writeHeader(out, 0x90, 15, [null, 0xdc, 0xdd], value.length);
+    for (const item of value) encodeValue(item, out);
+  } else if (value instanceof Date) {
+    encodeValue(value.toISOString(), out);
+  } else {
+    const entries = Object.entries(value);
+    writeHeader(out, 0x80, 15, [null, 0xde, 0xdf], entries.length);
+    for (const [key, item] of entries) {
+      encodeValue(key, out);
+      encodeValue(item, out);
+    }
+  }
+}
+
+export function encode(value) {
+  const out = [];
+  encodeValue(value, out);
+  return Uint8Array.from(out);
+}
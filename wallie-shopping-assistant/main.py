@@ -1,11 +1,62 @@
-from fastapi import FastAPI
+import asyncio
+import hmac
+import json
+import threading
+import uuid
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Optional, Tuple
+
+from fastapi import FastAPI, Header, HTTPException, Response, WebSocket, WebSocketDisconnect
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from fastapi.middleware.cors import CORSMiddleware
-from test import ShoppingAgent  # Import the class from test.py
+from admission import Overloaded, chat_admission
+from agent import ShoppingAgent  # Core agent; speech is loaded only if used
+from deadline import deadline
+from metrics import REGISTRY, TTS_REQUESTS
+from profiler import SamplingProfiler
+from speculation import respond, speculator_for
+from stt import EnergyVAD, create_engine
+from tts import audio_etag, clean_text, etag_matches, tts_pool
+from warmup import Readiness, warm_up
+import settings
+
+# Most recent conversations kept in memory, one agent each
+MAX_SESSIONS = 1000
+# Seconds of new speech between interim transcripts on /ws/voice
+VOICE_INTERIM_SECONDS = 1.0
+# Longest /debug/profile run, and how many per-turn profiles are kept
+MAX_PROFILE_SECONDS = 120
+MAX_STORED_PROFILES = 50
+
+# Default agent (and the catalog it loads), created by the warm-up or the first request
+agent: Optional[ShoppingAgent] = None
+agent_lock = threading.Lock()
+readiness = Readiness()
+sessions = OrderedDict()
+sessions_lock = threading.Lock()
+profiles = OrderedDict()
+profiles_lock = threading.Lock()
+
+
+def default_agent() -> ShoppingAgent:
+    global agent
+    with agent_lock:
+        if agent is None:
+            agent = ShoppingAgent()
+        return agent
+
 
+@asynccontextmanager
+async def lifespan(app):
+    # Warm up in the background: /livez answers straight away, /readyz once warm
+    threading.Thread(target=warm_up, args=(default_agent, readiness), name="warm-up", daemon=True).start()
+    yield
 
-app = FastAPI()
-agent = ShoppingAgent()
+
+app = FastAPI(lifespan=lifespan)
 
 # Allow frontend (Next.js) to talk to backend
 app.add_middleware(
@@ -18,8 +69,291 @@ app.add_middleware(
 
 class Message(BaseModel):
     text: str
+    session_id: Optional[str] = None
+
+
+def get_agent(session_id: Optional[str]) -> ShoppingAgent:
+    """Agent for a session; requests without a session share the default agent.
+
+    Blocks while the catalog loads if called before the warm-up got that far.
+    """
+    if session_id is None:
+        return default_agent()
+    service = default_agent().product_service
+    with sessions_lock:
+        session_agent = sessions.get(session_id)
+        if session_agent is None:
+            # Sessions share the default agent's catalog instead of re-fetching it
+            session_agent = ShoppingAgent(product_service=service)
+            session_agent.session_id = session_id
+            sessions[session_id] = session_agent
+            if len(sessions) > MAX_SESSIONS:
+                sessions.popitem(last=False)
+        else:
+            sessions.move_to_end(session_id)
+        return session_agent
+
+
+def answer(session_agent: ShoppingAgent, text: str) -> str:
+    """One turn within settings.TURN_DEADLINE; past it the agent answers from templates."""
+    with deadline(settings.TURN_DEADLINE):
+        return respond(session_agent, text)
+
+
+def chat_turn(session_agent: ShoppingAgent, text: str, profile: bool) -> Tuple[str, Optional[str]]:
+    """answer() on a worker thread: (reply, profile id). With `profile`, only this thread is sampled."""
+    if not profile:
+        return answer(session_agent, text), None
+    with SamplingProfiler(interval=0.001, thread_ids=[threading.get_ident()]) as profiler:
+        reply = answer(session_agent, text)
+    profile_id = uuid.uuid4().hex
+    with profiles_lock:
+        profiles[profile_id] = profiler
+        if len(profiles) > MAX_STORED_PROFILES:
+            profiles.popitem(last=False)
+    return reply, profile_id
+
+
+def require_admin(token: Optional[str]) -> None:
+    """404 while no ADMIN_TOKEN is configured, 403 for a wrong token."""
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not token or not hmac.compare_digest(token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+
+def profile_response(profiler: SamplingProfiler, fmt: str, name: str) -> Response:
+    if fmt not in ("collapsed", "speedscope"):
+        raise HTTPException(status_code=400, detail="format must be collapsed or speedscope")
+    body, media_type = profiler.export(fmt, name)
+    if fmt == "speedscope":
+        return JSONResponse(body)
+    return PlainTextResponse(body, media_type=media_type)
+
 
 @app.post("/chat")
-def chat(message: Message):
-    response = agent.run_conversation_chain(message.text)
-    return {"reply": response}
+async def chat(message: Message, response: Response,
+               x_profile: Optional[str] = Header(None), x_admin_token: Optional[str] = Header(None)):
+    """One turn, admitted by phase priority (see admission.py); 503 + Retry-After when overloaded.
+
+    Time spent queueing counts toward the turn's deadline.
+    """
+    if x_profile:
+        require_admin(x_admin_token)
+    session_agent = await run_in_threadpool(get_agent, message.session_id)
+    try:
+        with deadline(settings.TURN_DEADLINE):
+            reply, profile_id = await chat_admission().run(session_agent.memory.conversation_phase, chat_turn,
+                                                           session_agent, message.text, bool(x_profile))
+    except Overloaded as e:
+        raise HTTPException(status_code=503, detail="Chat busy", headers={"Retry-After": str(e.retry_after)})
+    if profile_id:
+        response.headers["X-Profile-Id"] = profile_id
+    return {"reply": reply}
+
+
+async def speculate(session_agent: ShoppingAgent, text: str) -> str:
+    """Speculate on an interim transcript, admitted below every turn; "skipped" when overloaded."""
+    try:
+        with deadline(settings.TURN_DEADLINE):
+            return await chat_admission().run("interim", speculator_for(session_agent).interim, text)
+    except Overloaded:
+        return "skipped"
+
+
+@app.post("/chat/interim")
+async def chat_interim(message: Message):
+    """Interim (not yet final) transcript: start generating the reply early.
+
+    The following /chat for the same session uses that reply if its final
+    text is close enough to this one.
+    """
+    session_agent = await run_in_threadpool(get_agent, message.session_id)
+    return {"status": await speculate(session_agent, message.text)}
+
+
+@app.websocket("/ws/voice")
+async def voice(websocket: WebSocket, session_id: Optional[str] = None):
+    """Whole voice conversation over one connection.
+
+    Client -> server: optional {"type": "start", "sample_rate": 16000,
+    "encoding": "pcm16", "audio": true}, then binary frames of 16-bit mono
+    PCM; {"type": "end"} ends the current utterance without waiting for
+    silence. Server -> client: {"type": "interim" | "transcript" | "reply",
+    "text": ...}, the reply as binary MP3 chunks and {"type": "audio_end"}.
+    """
+    await websocket.accept()
+    session_agent = await run_in_threadpool(get_agent, session_id)
+    engine = await run_in_threadpool(create_engine)
+    sample_rate, speak = 16000, True
+    vad = EnergyVAD(sample_rate)
+    interim_at = 0
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            utterances = []
+            if message.get("bytes") is not None:
+                utterances = vad.feed(message["bytes"])
+                if utterances:
+                    interim_at = 0
+                elif vad.in_speech and len(vad.audio) - interim_at >= sample_rate * 2 * VOICE_INTERIM_SECONDS:
+                    interim_at = len(vad.audio)
+                    await voice_interim(websocket, session_agent, engine, vad.audio, sample_rate)
+            else:
+                try:
+                    control = read_control(message.get("text"), sample_rate)
+                except (ValueError, TypeError) as e:
+                    # A bad control message is answered, not a reason to drop the conversation
+                    await websocket.send_json({"type": "error", "message": f"Invalid control message: {e}"})
+                    continue
+                if control.get("type") == "start":
+                    if control.get("encoding", "pcm16") not in engine.encodings:
+                        await websocket.send_json({"type": "error", "message": f"Unsupported encoding, use one of {engine.encodings}"})
+                        continue
+                    sample_rate = control["sample_rate"]
+                    speak = bool(control.get("audio", True))
+                    vad = EnergyVAD(sample_rate)
+                elif control.get("type") == "end":
+                    utterances = [audio for audio in [vad.flush()] if audio]
+                interim_at = 0
+            for audio in utterances:
+                await voice_turn(websocket, session_agent, engine, audio, sample_rate, speak)
+    except WebSocketDisconnect:
+        pass
+
+
+def read_control(text: Optional[str], sample_rate: int) -> dict:
+    """Parse a /ws/voice control message, with "sample_rate" checked and
+    defaulting to the current one; raises ValueError or TypeError."""
+    control = json.loads(text or "{}")
+    if not isinstance(control, dict):
+        raise ValueError("expected a JSON object")
+    control["sample_rate"] = int(control.get("sample_rate", sample_rate))
+    if not 8000 <= control["sample_rate"] <= 48000:
+        raise ValueError("sample_rate must be between 8000 and 48000")
+    return control
+
+
+async def voice_interim(websocket: WebSocket, session_agent: ShoppingAgent, engine, audio: bytes,
+                        sample_rate: int) -> None:
+    text = await run_in_threadpool(engine.interim, audio, sample_rate)
+    if text:
+        await websocket.send_json({"type": "interim", "text": text})
+        await speculate(session_agent, text)
+
+
+async def voice_turn(websocket: WebSocket, session_agent: ShoppingAgent, engine, audio: bytes,
+                     sample_rate: int, speak: bool) -> None:
+    try:
+        text = await run_in_threadpool(engine.transcribe, audio, sample_rate)
+    except Exception as e:
+        await websocket.send_json({"type": "error", "message": f"Speech recognition failed: {e}"})
+        return
+    await websocket.send_json({"type": "transcript", "text": text})
+    if not text:
+        return
+    try:
+        with deadline(settings.TURN_DEADLINE):
+            reply = await chat_admission().run(session_agent.memory.conversation_phase, answer, session_agent, text)
+    except Overloaded as e:
+        await websocket.send_json({"type": "error", "message": "Server busy, please say that again",
+                                   "retry_after": e.retry_after})
+        return
+    await websocket.send_json({"type": "reply", "text": reply})
+    if not speak:
+        return
+    stream = tts_pool().submit(reply)
+    if stream is None:
+        TTS_REQUESTS.inc(result="rejected")
+        await websocket.send_json({"type": "error", "message": "TTS busy, reply not spoken"})
+        return
+    TTS_REQUESTS.inc(result="synthesized")
+    try:
+        async for chunk in stream:
+            await websocket.send_bytes(chunk)
+    except WebSocketDisconnect:
+        raise
+    except Exception as e:
+        await websocket.send_json({"type": "error", "message": f"TTS failed: {e}"})
+    await websocket.send_json({"type": "audio_end"})
+
+
+@app.get("/tts")
+async def tts(text: str, if_none_match: Optional[str] = Header(None)):
+    """Reply text as MP3, streamed while it is synthesized.
+
+    Audio the pool already finished is answered whole with a strong ETag,
+    so browsers and CDNs serve repeated phrases from cache. A stream is
+    sent no-store: its headers leave before synthesis ends, and a body cut
+    short must not be cached. Synthesis runs on a bounded pool and overflow
+    gets 503 + Retry-After.
+    """
+    if len(text) > settings.TTS_MAX_CHARS:
+        raise HTTPException(status_code=413, detail=f"Text longer than {settings.TTS_MAX_CHARS} characters")
+    if not clean_text(text):
+        raise HTTPException(status_code=400, detail="Nothing to say")
+    etag = audio_etag(text)
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=86400"}
+    if etag_matches(if_none_match, etag):
+        TTS_REQUESTS.inc(result="not_modified")
+        return Response(status_code=304, headers=headers)
+    pool = tts_pool()
+    audio = pool.cache.get(etag) if pool.cache else None
+    if audio is not None:
+        TTS_REQUESTS.inc(result="cached")
+        return Response(audio, media_type="audio/mpeg", headers=headers)
+    stream = pool.submit(text)
+    if stream is None:
+        TTS_REQUESTS.inc(result="rejected")
+        raise HTTPException(status_code=503, detail="TTS busy", headers={"Retry-After": "1"})
+    TTS_REQUESTS.inc(result="synthesized")
+    return StreamingResponse(stream, media_type="audio/mpeg", headers={"Cache-Control": "no-store"})
+
+
+@app.get("/debug/profile")
+async def debug_profile(seconds: float = 30, format: str = "collapsed", interval_ms: float = 5,
+                        x_admin_token: Optional[str] = Header(None)):
+    """Sample every thread (request workers and the event loop) for `seconds`."""
+    require_admin(x_admin_token)
+    seconds = max(0.1, min(seconds, MAX_PROFILE_SECONDS))
+    profiler = SamplingProfiler(interval=max(interval_ms, 1) / 1000).start()
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profiler.stop()
+    return profile_response(profiler, format, f"wallie {seconds:g}s")
+
+
+@app.get("/debug/profiles/{profile_id}")
+def debug_profile_result(profile_id: str, format: str = "collapsed",
+                         x_admin_token: Optional[str] = Header(None)):
+    """Profile of one /chat turn sent with the X-Profile header."""
+    require_admin(x_admin_token)
+    with profiles_lock:
+        profiler = profiles.get(profile_id)
+    if profiler is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile_response(profiler, format, f"chat turn {profile_id}")
+
+
+@app.get("/livez")
+def livez():
+    """The process is up and serving HTTP (it may still be warming up)."""
+    return {"status": "alive"}
+
+
+@app.get("/readyz")
+def readyz():
+    """200 once the warm-up has finished (see warmup.py), 503 until then; the body lists each step."""
+    status = readiness.snapshot()
+    if not readiness.ready:
+        return JSONResponse(status, status_code=503, headers={"Retry-After": "1"})
+    return status
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Prometheus scrape endpoint: stage latencies, in-flight LLM calls, counters."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,214 @@
+import functools
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Tuple, Sequence
+
+# Latency buckets in seconds, from sub-millisecond CPU stages to slow LLM calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _format_labels(names: Sequence[str], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, per label set."""
+    kind = "counter"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, value in self._values.items():
+                lines.append(f"{self.name}_total{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Gauge(_Metric):
+    """Value that goes up and down, e.g. calls currently in flight."""
+    kind = "gauge"
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, value in self._values.items():
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {value}")
+        return lines
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram of observed values, per label set."""
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+        # label key -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 2)
+            counts[index] += 1
+            counts[-1] += value
+
+    def count(self, **labels) -> int:
+        counts = self._values.get(self._key(labels))
+        return int(sum(counts[:-1])) if counts else 0
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            snapshot = {key: list(counts) for key, counts in self._values.items()}
+        for key, counts in snapshot.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                labels = _format_labels(self.labelnames, key, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {counts[-1]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Holds all metrics and renders them in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    "wallie_stage_seconds", "Time spent in each stage of a conversation turn", ["stage"]))
+LLM_IN_FLIGHT = REGISTRY.register(Gauge(
+    "wallie_llm_calls_in_flight", "Model calls currently waiting for a response"))
+CACHE_LOOKUPS = REGISTRY.register(Counter(
+    "wallie_cache_lookups", "Cache lookups by cache and result (hit/miss)", ["cache", "result"]))
+PHASE_TRANSITIONS = REGISTRY.register(Counter(
+    "wallie_phase_transitions", "Conversation phase changes", ["from_phase", "to_phase"]))
+CART_FAILURES = REGISTRY.register(Counter(
+    "wallie_cart_failures", "Failed add-to-cart calls by reason", ["reason"]))
+SPECULATIONS = REGISTRY.register(Counter(
+    "wallie_speculations", "Speculative replies from interim transcripts by outcome", ["result"]))
+SPECULATION_SAVED_SECONDS = REGISTRY.register(Histogram(
+    "wallie_speculation_saved_seconds", "Model time already done when the final transcript arrived"))
+TTS_REQUESTS = REGISTRY.register(Counter(
+    "wallie_tts_requests", "Speech synthesis requests by outcome", ["result"]))
+PROMPT_TOKENS = REGISTRY.register(Counter(
+    "wallie_prompt_tokens", "Model input tokens, split into served-from-cache and sent", ["kind"]))
+REPLIES_CUT = REGISTRY.register(Counter(
+    "wallie_replies_cut", "Streamed replies stopped at the phase's sentence budget", ["phase"]))
+FALLBACK_REPLIES = REGISTRY.register(Counter(
+    "wallie_fallback_replies", "Turns answered from local templates, by reason (deadline/error)", ["reason"]))
+MODEL_CALLS = REGISTRY.register(Counter(
+    "wallie_model_calls", "Routed model calls by model and result (ok/error)", ["model", "result"]))
+MODEL_DEGRADATIONS = REGISTRY.register(Counter(
+    "wallie_model_degradations", "Times a model was taken out of routing for errors or latency", ["model"]))
+MODEL_FAILOVERS = REGISTRY.register(Counter(
+    "wallie_model_failovers", "Turns retried on the next model after a failed call", ["from_model", "to_model"]))
+CHAT_ADMISSIONS = REGISTRY.register(Counter(
+    "wallie_chat_admissions", "Chat turns by admission result (admitted/queue_full/delay/timeout/shed) and phase",
+    ["result", "phase"]))
+CHAT_QUEUE_DEPTH = REGISTRY.register(Gauge(
+    "wallie_chat_queue_depth", "Chat turns waiting for a worker"))
+CHAT_QUEUE_WAIT = REGISTRY.register(Histogram(
+    "wallie_chat_queue_wait_seconds", "Time chat turns waited for a worker", ["phase"]))
+
+
+class span:
+    """Times a block (or a decorated function) into STAGE_SECONDS.
+
+    A plain class rather than @contextmanager keeps the per-use cost to two
+    perf_counter calls and one locked histogram update.
+    """
+
+    __slots__ = ("stage", "started")
+
+    def __init__(self, stage: str):
+        self.stage = stage
+        self.started = 0.0
+
+    def __enter__(self) -> "span":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        STAGE_SECONDS.observe(time.perf_counter() - self.started, stage=self.stage)
+
+    def __call__(self, function):
+        stage = self.stage
+
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            with span(stage):
+                return function(*args, **kwargs)
+        return timed
@@ -0,0 +1,165 @@
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from intents import tokenize
+from metrics import MODEL_CALLS, MODEL_DEGRADATIONS
+
+logger = logging.getLogger(__name__)
+
+# Tier each phase starts in. Greetings, detail questions and confirmations
+# are short and formulaic; product questions are open-ended.
+PHASE_TIERS: Dict[str, str] = {
+    "greeting": "simple",
+    "product_inquiry": "complex",
+    "details": "simple",
+    "checkout": "simple",
+}
+# A message this long, or with a question word, needs the "complex" tier
+# whatever the phase
+SHORT_INPUT_WORDS = 6
+QUESTION_WORDS = {
+    "kya", "kaun", "kaunsa", "konsa", "kitna", "kitne", "kaisa", "kaise", "kyun", "kyon", "kahan",
+    "what", "which", "how", "why", "compare", "difference", "better", "best", "recommend", "suggest",
+    "क्या", "कौन", "कौनसा", "कितना", "कितने", "कैसा", "कैसे", "क्यों",
+}
+# Calls a model needs in its window before its stats are trusted
+MIN_SAMPLES = 10
+
+
+def classify(phase: Optional[str], user_input: str = "") -> str:
+    """"simple" or "complex": which tier of models should answer this turn."""
+    tier = PHASE_TIERS.get(phase, "complex")
+    if tier == "simple" and user_input:
+        words = tokenize(user_input)
+        if len(words) > SHORT_INPUT_WORDS or "?" in user_input or QUESTION_WORDS.intersection(words):
+            return "complex"
+    return tier
+
+
+class ModelStats:
+    """Rolling latency and error rate of one model over its last calls.
+
+    A model whose error rate or p95 latency goes over the limits is
+    degraded: skipped for `cooldown` seconds, then given traffic again on
+    probation, where one more failure or slow call degrades it straight away.
+    """
+
+    def __init__(self, window: int, max_error_rate: float, latency_budget: float, cooldown: float):
+        self.samples = deque(maxlen=window)  # (seconds, ok)
+        self.max_error_rate = max_error_rate
+        self.latency_budget = latency_budget
+        self.cooldown = cooldown
+        self.degraded_until = 0.0
+        self.probation = False
+
+    def record(self, seconds: float, ok: bool) -> Optional[str]:
+        """Add a call; returns why the model was just degraded, if it was."""
+        self.samples.append((seconds, ok))
+        if self.probation:
+            if not ok or seconds > self.latency_budget:
+                return self._degrade("failed on probation" if not ok else f"{seconds:.2f}s on probation")
+            if len(self.samples) >= MIN_SAMPLES:
+                self.probation = False
+            return None
+        if len(self.samples) < MIN_SAMPLES:
+            return None
+        if self.error_rate() > self.max_error_rate:
+            return self._degrade(f"error rate {self.error_rate():.0%}")
+        if self.p95() > self.latency_budget:
+            return self._degrade(f"p95 {self.p95():.2f}s")
+        return None
+
+    def _degrade(self, reason: str) -> str:
+        self.degraded_until = time.monotonic() + self.cooldown
+        self.samples.clear()
+        self.probation = True
+        return reason
+
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.degraded_until
+
+    def error_rate(self) -> float:
+        return sum(not ok for _, ok in self.samples) / len(self.samples) if self.samples else 0.0
+
+    def p95(self) -> float:
+        # Failed calls say nothing about how fast the model answers
+        latencies = sorted(seconds for seconds, ok in self.samples if ok)
+        return latencies[int(0.95 * (len(latencies) - 1))] if latencies else 0.0
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "calls": len(self.samples),
+            "error_rate": round(self.error_rate(), 3),
+            "p95_s": round(self.p95(), 4),
+            "healthy": self.healthy(),
+            "probation": self.probation,
+        }
+
+
+class ModelRouter:
+    """Picks the model for each turn from the phase and the message.
+
+    `routes` maps a tier to models in order of preference. Each model keeps
+    rolling stats across all sessions; degraded models move to the back of
+    the list, so a turn fails over to the next model instead of waiting out
+    a slow or failing one. A tier whose models are all degraded still gets
+    them, best first.
+    """
+
+    def __init__(self, routes: Dict[str, List[str]], window: int = 50, max_error_rate: float = 0.2,
+                 latency_budget: float = 3.0, cooldown: float = 30.0):
+        self.routes = routes
+        self.window = window
+        self.max_error_rate = max_error_rate
+        self.latency_budget = latency_budget
+        self.cooldown = cooldown
+        self._stats: Dict[str, ModelStats] = {}
+        self._lock = threading.Lock()
+
+    def _stats_for(self, model_name: str) -> ModelStats:
+        stats = self._stats.get(model_name)
+        if stats is None:
+            stats = self._stats[model_name] = ModelStats(
+                self.window, self.max_error_rate, self.latency_budget, self.cooldown)
+        return stats
+
+    def candidates(self, phase: Optional[str], user_input: str = "") -> List[str]:
+        """Models to try for a turn, first choice first."""
+        tier = classify(phase, user_input)
+        models = self.routes.get(tier) or self.routes.get("complex") or []
+        with self._lock:
+            healthy = [name for name in models if self._stats_for(name).healthy()]
+        return healthy + [name for name in models if name not in healthy]
+
+    def record(self, model_name: str, seconds: float, ok: bool) -> None:
+        MODEL_CALLS.inc(model=model_name, result="ok" if ok else "error")
+        with self._lock:
+            stats = self._stats_for(model_name)
+            reason = stats.record(seconds, ok)
+        if reason:
+            MODEL_DEGRADATIONS.inc(model=model_name)
+            logger.warning(f"Model {model_name} degraded ({reason}); routing around it for {self.cooldown:.0f}s")
+
+    def snapshot(self) -> Dict[str, Dict[str, object]]:
+        with self._lock:
+            return {name: stats.snapshot() for name, stats in self._stats.items()}
+
+
+_shared_router = None
+_shared_lock = threading.Lock()
+
+
+def shared_router() -> Optional[ModelRouter]:
+    """Process-wide router from settings (None when MODEL_ROUTES is not set)."""
+    global _shared_router
+    with _shared_lock:
+        if _shared_router is None:
+            import settings
+            _shared_router = ModelRouter(
+                settings.MODEL_ROUTES, settings.ROUTER_WINDOW, settings.ROUTER_MAX_ERROR_RATE,
+                settings.ROUTER_LATENCY_BUDGET, settings.ROUTER_COOLDOWN,
+            ) if settings.MODEL_ROUTES else False
+        return _shared_router or None
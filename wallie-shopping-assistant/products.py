@@ -0,0 +1,338 @@
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Any, Optional, Tuple
+
+# HTTP client for API calls
+import requests
+
+# Columnar product catalog
+from catalog import Catalog, format_price, product_key
+from catalog_loader import CatalogLoader
+from intents import product_index, tokenize
+from metrics import span, CACHE_LOOKUPS, CART_FAILURES
+from deadline import request_timeout
+from singleflight import SingleFlight
+from settings import API_TIMEOUT, BASE_URL, DEFAULT_USER_EMAIL, CATALOG_SNAPSHOT_PATH, CATALOG_REFRESH
+
+logger = logging.getLogger(__name__)
+
+
+# One catalog fetch per products URL at a time, across all services
+_catalog_fetches = SingleFlight()
+_shared_services: Dict[Tuple[str, str, str], "ProductService"] = {}
+_shared_services_lock = threading.Lock()
+# Seconds between attempts to replace the fallback catalog with the real one
+FALLBACK_RETRY_INTERVAL = 10.0
+
+
+class ProductService:
+    """Handles product fetching and cart operations via API calls."""
+    
+    def __init__(self, base_url: str = BASE_URL, user_email: str = DEFAULT_USER_EMAIL,
+                 snapshot_path: str = CATALOG_SNAPSHOT_PATH, refresh: str = CATALOG_REFRESH,
+                 timeout: float = API_TIMEOUT):
+        """Initialize product service.
+        
+        refresh: "fetch" re-fetches from the API after a snapshot warm start;
+        "follow" instead reloads the snapshot whenever another process (the
+        serve.py supervisor) replaces it. timeout caps every API request
+        (seconds); within a turn the turn's deadline can shorten it.
+        """
+        self.base_url = base_url
+        self.user_email = user_email
+        self.products_url = f"{base_url}/api/products"
+        self.voice_cart_url = f"{base_url}/api/voice-cart"
+        self.snapshot_path = snapshot_path
+        self.refresh = refresh
+        self.timeout = timeout
+        self._snapshot_id = None
+        self.catalog = Catalog.empty()
+        self._products_view = None
+        # True while serving the built-in sample products because the API failed
+        self.degraded = False
+        self._next_retry = 0.0
+        self._retry_lock = threading.Lock()
+        self.session = requests.Session()
+        self.loader = CatalogLoader(self.products_url, timeout=timeout)
+        logger.info("Product service initialized")
+    
+    @classmethod
+    def shared(cls, base_url: str = None, user_email: str = None,
+               snapshot_path: str = None) -> "ProductService":
+        """Process-wide service per backend, so every agent shares one catalog.
+        
+        Unset arguments come from settings as they are now, not as they were
+        when this module was imported.
+        """
+        import settings
+        key = (base_url or settings.BASE_URL, user_email or settings.DEFAULT_USER_EMAIL,
+               snapshot_path or settings.CATALOG_SNAPSHOT_PATH)
+        base_url, user_email, snapshot_path = key
+        with _shared_services_lock:
+            service = _shared_services.get(key)
+            if service is None:
+                service = _shared_services[key] = cls(base_url, user_email, snapshot_path)
+            return service
+    
+    def ensure_loaded(self) -> None:
+        """Load the catalog if this service has none yet.
+        
+        Concurrent callers (e.g. many agents created at once) wait on a single
+        load. Serves from the last snapshot right away and refreshes it in the
+        background; only blocks on the API when there is no snapshot. While
+        the catalog is the degraded fallback, retries the API in the
+        background, at most every FALLBACK_RETRY_INTERVAL seconds.
+        """
+        if not len(self.catalog):
+            _catalog_fetches.do(("initial", id(self)), self._load_initial)
+        elif self.degraded:
+            self._retry_in_background()
+    
+    def _retry_in_background(self) -> None:
+        with self._retry_lock:
+            now = time.monotonic()
+            if now < self._next_retry:
+                return
+            self._next_retry = now + FALLBACK_RETRY_INTERVAL
+        threading.Thread(target=self.fetch_products, name="catalog-retry", daemon=True).start()
+    
+    def _load_initial(self) -> None:
+        if len(self.catalog):
+            return
+        if self.load_snapshot():
+            self.refresh_in_background()
+        else:
+            self.fetch_products()
+    
+    @span("catalog_fetch")
+    def fetch_products(self) -> Dict[str, Any]:
+        """Fetch products from the database via API."""
+        try:
+            # Paged, parallel fetch parsed straight into columns;
+            # products_cache is built from them on demand. Concurrent
+            # fetches of the same URL share one request.
+            catalog = _catalog_fetches.do(self.products_url, lambda: self.loader.load(self.session))
+            if self.degraded or catalog.version != self.catalog.version:
+                self._set_catalog(catalog)
+                self._save_snapshot()
+            
+            logger.info(f"Fetched {len(self.catalog)} products from database")
+            return self.products_cache
+            
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Failed to fetch products: {e}")
+            # Return fallback products if API fails
+            return self._get_fallback_products()
+        except Exception as e:
+            logger.error(f"Unexpected error fetching products: {e}")
+            return self._get_fallback_products()
+    
+    def warm_connection(self) -> bool:
+        """Open a pooled connection to the API (TCP and TLS) before the first turn needs one."""
+        try:
+            response = self.session.get(self.products_url, params={"limit": 1}, timeout=self.timeout)
+            response.raise_for_status()
+            return True
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Could not reach the products API: {e}")
+            return False
+    
+    def load_snapshot(self) -> bool:
+        """Serve from the last saved catalog snapshot, if there is one."""
+        try:
+            snapshot_id = self._stat_snapshot()
+            self._set_catalog(Catalog.open_snapshot(self.snapshot_path))
+            self._snapshot_id = snapshot_id
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable catalog snapshot: {e}")
+            return False
+        
+        logger.info(f"Loaded {len(self.catalog)} products from snapshot {self.catalog.version}")
+        return True
+    
+    def refresh_in_background(self) -> threading.Thread:
+        """Re-fetch the catalog on a daemon thread and swap it in when done."""
+        target = self._follow_snapshot if self.refresh == "follow" else self.fetch_products
+        thread = threading.Thread(target=target, name="catalog-refresh", daemon=True)
+        thread.start()
+        return thread
+    
+    def _stat_snapshot(self):
+        stat = os.stat(self.snapshot_path)
+        return stat.st_ino, stat.st_mtime_ns
+    
+    def _follow_snapshot(self, interval: float = 5.0) -> None:
+        """Reload the snapshot whenever it is replaced (written via rename)."""
+        while True:
+            time.sleep(interval)
+            try:
+                changed = self._stat_snapshot() != self._snapshot_id
+            except OSError:
+                continue
+            if changed:
+                self.load_snapshot()
+    
+    def _save_snapshot(self) -> None:
+        try:
+            self.catalog.save_snapshot(self.snapshot_path)
+        except OSError as e:
+            logger.warning(f"Could not write catalog snapshot: {e}")
+    
+    @property
+    def products_cache(self) -> Dict[str, Any]:
+        """Legacy name-key -> product dict view, built lazily from the catalog.
+        
+        Kept for callers of the old API; the service itself reads the
+        catalog's columns.
+        """
+        catalog, view = self._products_view or (None, None)
+        if catalog is not self.catalog:
+            CACHE_LOOKUPS.inc(cache="products_view", result="miss")
+            catalog = self.catalog
+            view = catalog.as_dict()
+            self._products_view = (catalog, view)
+        else:
+            CACHE_LOOKUPS.inc(cache="products_view", result="hit")
+        return view
+    
+    def _set_catalog(self, catalog: Catalog, degraded: bool = False) -> None:
+        self.catalog = catalog
+        self._products_view = None
+        self.degraded = degraded
+    
+    def _get_fallback_products(self) -> Dict[str, Any]:
+        """Fallback products if API is unavailable; marks the catalog degraded until a fetch succeeds."""
+        # A catalog loaded earlier (e.g. from the snapshot) beats the samples
+        if len(self.catalog):
+            return self.products_cache
+        self._set_catalog(Catalog.from_records([
+            {"id": 1, "name": "Laptop", "price": 50000, "description": "High-performance laptop", "category": "Electronics"},
+            {"id": 2, "name": "Smartphone", "price": 25000, "description": "Latest smartphone", "category": "Electronics"},
+            {"id": 3, "name": "Wireless Headphones", "price": 5000, "description": "Premium audio quality", "category": "Audio"},
+            {"id": 4, "name": "Smart Watch", "price": 15000, "description": "Fitness and health tracking", "category": "Wearables"},
+            {"id": 5, "name": "Tablet", "price": 30000, "description": "Perfect for work and entertainment", "category": "Electronics"}
+        ]), degraded=True)
+        return self.products_cache
+    
+    def search_products(self, query: str) -> List[Dict[str, Any]]:
+        """Search products by name, description, or category."""
+        query = query.lower()
+        catalog = self.catalog
+        # Categories are interned, so each is tested once rather than per row
+        categories = [query in category.lower() for category in catalog.categories]
+        matching_products = []
+        
+        for row, name in enumerate(catalog.names):
+            if (query in name.lower() or
+                categories[catalog.category_codes[row]] or
+                query in product_key(name) or
+                query in catalog.descriptions[row].lower()):
+                matching_products.append(catalog.record(row))
+        
+        return matching_products
+    
+    def find_products_under(self, max_price: Any, category: str = None) -> List[Dict[str, Any]]:
+        """Products at or below a price (e.g. 500 or "₹500"), cheapest first."""
+        return self.catalog.products_under(max_price, category=category)
+    
+    def get_product_by_name(self, name: str) -> Dict[str, Any]:
+        """Get a specific product by name."""
+        name_key = product_key(name)
+        catalog = self.catalog
+        
+        # Direct match
+        row = catalog.row_for_key(name_key)
+        if row is not None:
+            CACHE_LOOKUPS.inc(cache="product_by_name", result="hit")
+            return catalog.record(row)
+        CACHE_LOOKUPS.inc(cache="product_by_name", result="miss")
+        
+        # Devanagari / Hinglish name ("हेडफोन", "ghadi") via the alias index
+        row = product_index(catalog).find(tokenize(name))
+        if row is not None:
+            return catalog.record(row)
+        
+        # Fuzzy search
+        for row, product_name in enumerate(catalog.names):
+            if name.lower() in product_name.lower() or product_key(product_name) in name_key:
+                return catalog.record(row)
+        
+        return None
+    
+    @span("cart_post")
+    def add_to_cart(self, product_id: int, quantity: int = 1) -> bool:
+        """Add product to cart via API."""
+        try:
+            payload = {
+                "productId": product_id,
+                "email": self.user_email,
+                "quantity": quantity
+            }
+            
+            response = self.session.post(
+                self.voice_cart_url, 
+                json=payload,
+                # An order gets a little time even at the deadline: giving up
+                # on a POST the server may have applied leaves the cart unknown
+                timeout=request_timeout(self.timeout, floor=2.0),
+                headers={'Content-Type': 'application/json'}
+            )
+            response.raise_for_status()
+            
+            result = response.json()
+            if result.get('success'):
+                logger.info(f"Successfully added product {product_id} to cart")
+                return True
+            else:
+                logger.error(f"Failed to add to cart: {result.get('error', 'Unknown error')}")
+                CART_FAILURES.inc(reason="rejected")
+                return False
+                
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Failed to add to cart: {e}")
+            CART_FAILURES.inc(reason="http")
+            return False
+        except Exception as e:
+            logger.error(f"Unexpected error adding to cart: {e}")
+            CART_FAILURES.inc(reason="error")
+            return False
+    
+    @span("cart_fetch")
+    def get_cart(self) -> Optional[List[Dict[str, Any]]]:
+        """Items in the user's cart (productId, quantity, name, price), or None if unavailable."""
+        try:
+            response = self.session.get(
+                self.voice_cart_url,
+                params={"email": self.user_email},
+                timeout=request_timeout(self.timeout)
+            )
+            response.raise_for_status()
+            
+            result = response.json()
+            if result.get('success'):
+                return result.get('items', [])
+            logger.error(f"Failed to read cart: {result.get('error', 'Unknown error')}")
+            return None
+            
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Failed to read cart: {e}")
+            return None
+        except Exception as e:
+            logger.error(f"Unexpected error reading cart: {e}")
+            return None
+    
+    def get_products_summary(self) -> str:
+        """Get a formatted summary of available products for AI prompts."""
+        if not len(self.catalog):
+            self.fetch_products()
+        
+        catalog = self.catalog
+        summary = "Available products:\n"
+        for row, name in enumerate(catalog.names):
+            summary += f"- {name} ({format_price(catalog.prices[row])}) - {catalog.descriptions[row]}\n"
+        
+        return summary
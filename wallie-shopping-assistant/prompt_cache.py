@@ -0,0 +1,146 @@
+import datetime
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import google.generativeai as genai
+
+from metrics import CACHE_LOOKUPS
+from singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token) when the API gives none."""
+    return len(text) // 4 + 1 if text else 0
+
+
+class ContextCache:
+    """Registers each phase's static prompt prefix as Gemini cached content.
+
+    There is one entry per (model, phase), tied to the prefix it was built
+    from; a new catalog version gives the catalog phases a new prefix id and
+    replaces their entry. model_for() returns a model bound to the cached
+    prefix, so a turn only sends the conversation history and the user's
+    message. It returns None when the prefix is below the provider's
+    caching minimum or the provider refuses it (e.g. a model without
+    caching), and the caller then sends the full prompt as before; the
+    refusal is kept for the entry's lifetime rather than retried every turn.
+    """
+
+    # Gemini refuses cached content shorter than this many tokens
+    min_tokens = 32768
+    # Seconds a replaced entry stays usable for turns that already hold it
+    stale_grace = 300
+
+    def __init__(self, ttl_seconds: float = 3600):
+        self.ttl_seconds = ttl_seconds
+        # (model, phase) -> (prefix id, model or None, handle, expires at)
+        self._entries: Dict[Tuple[str, str], Tuple[str, Any, Any, float]] = {}
+        self._lock = threading.Lock()
+        # One creation per entry at a time; other keys and cache hits never wait on it
+        self._creations = SingleFlight()
+
+    def model_for(self, model_name: str, phase: str, prefix_id: str, prefix: str,
+                  tools: Optional[List[Any]] = None) -> Optional[Any]:
+        key = (model_name, phase)
+        entry = self._current(key, prefix_id)
+        if entry:
+            CACHE_LOOKUPS.inc(cache="context", result="hit")
+            return entry[1]
+        CACHE_LOOKUPS.inc(cache="context", result="miss")
+        return self._creations.do((key, prefix_id), lambda: self._renew(key, prefix_id, prefix, tools))
+
+    def _current(self, key: Tuple[str, str], prefix_id: str) -> Optional[Tuple[str, Any, Any, float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry and entry[0] == prefix_id and entry[3] > time.monotonic():
+            return entry
+        return None
+
+    def _renew(self, key: Tuple[str, str], prefix_id: str, prefix: str,
+               tools: Optional[List[Any]] = None) -> Optional[Any]:
+        # A creation that finished just before this one started already did the work
+        entry = self._current(key, prefix_id)
+        if entry:
+            return entry[1]
+        model_name, phase = key
+        model, handle = None, None
+        if estimate_tokens(prefix) < self.min_tokens:
+            logger.info(f"{phase} prompt prefix is below the {self.min_tokens}-token caching minimum, "
+                        f"sending full prompts")
+        else:
+            try:
+                model, handle = self._create(model_name, phase, prefix_id, prefix, tools)
+                logger.info(f"Cached {phase} prompt prefix {prefix_id} for {model_name}")
+            except Exception as e:
+                logger.warning(f"Context caching unavailable for {phase} prompt, sending full prompts: {e}")
+        with self._lock:
+            old = self._entries.get(key)
+            # Renew a little before the provider expires the entry
+            self._entries[key] = (prefix_id, model, handle, time.monotonic() + self.ttl_seconds * 0.9)
+        if old and old[0] != prefix_id:
+            self._expire(old[2])
+        return model
+
+    def _create(self, model_name: str, phase: str, prefix_id: str, prefix: str,
+                tools: Optional[List[Any]] = None) -> Tuple[Any, Any]:
+        # Function declarations are part of the cached context too
+        cached = genai.caching.CachedContent.create(
+            model=model_name if model_name.startswith("models/") else f"models/{model_name}",
+            display_name=f"wallie-{phase}-{prefix_id}",
+            system_instruction=prefix,
+            tools=tools,
+            ttl=datetime.timedelta(seconds=self.ttl_seconds),
+        )
+        return genai.GenerativeModel.from_cached_content(cached_content=cached), cached
+
+    def _expire(self, handle: Any) -> None:
+        """Shorten a replaced entry's lifetime instead of deleting it under in-flight turns."""
+        if handle is None:
+            return
+        try:
+            handle.update(ttl=datetime.timedelta(seconds=self.stale_grace))
+        except Exception as e:
+            logger.debug(f"Could not expire stale cached content: {e}")
+
+
+class LocalPrefixCache(ContextCache):
+    """Offline stand-in for ContextCache.
+
+    Binds the prefix as the system instruction of one long-lived model per
+    phase, the same split the provider cache gives. The fake model in
+    benchmarks.fakes charges prefill time for that instruction only on its
+    first call, which is what prefix caching saves.
+    """
+
+    min_tokens = 0
+
+    def _create(self, model_name: str, phase: str, prefix_id: str, prefix: str,
+                tools: Optional[List[Any]] = None) -> Tuple[Any, Any]:
+        return genai.GenerativeModel(model_name, system_instruction=prefix, tools=tools), None
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def create_context_cache(mode: str, ttl_seconds: float = 3600) -> Optional[ContextCache]:
+    """"gemini" (provider cache), "local" (offline stand-in) or "off"."""
+    if mode == "gemini":
+        return ContextCache(ttl_seconds)
+    if mode == "local":
+        return LocalPrefixCache(ttl_seconds)
+    return None
+
+
+def shared_context_cache() -> Optional[ContextCache]:
+    """Process-wide cache from settings, so every session reuses the same entries."""
+    global _shared_cache
+    with _shared_lock:
+        if _shared_cache is None:
+            import settings
+            _shared_cache = create_context_cache(settings.CONTEXT_CACHE, settings.CONTEXT_CACHE_TTL) or False
+        return _shared_cache or None
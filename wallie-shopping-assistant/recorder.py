@@ -0,0 +1,86 @@
+import json
+import logging
+import os
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+RECORD_VERSION = 1
+
+
+class Recorder:
+    """Appends one compact JSON line per conversation turn.
+
+    Fields: session, turn, kind ("greeting" or "turn"), input, phase_before,
+    phase, prompt (the per-turn part), prefix_id (the static prefix, see
+    ShoppingAgent._get_static_prefix), output, model_s, turn_s, cart (the
+    add-to-cart calls and whether they succeeded) and catalog (version).
+    speculative is true when the reply was drafted from an interim
+    transcript; prompt and model_s are then the draft's.
+    Each line is a single O_APPEND write, so several worker processes can
+    share one file. Turns recorded after close() are dropped.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._fd = os.open(path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        # Agents may still hold a closed recorder; never write to its reused fd
+        self._lock = threading.Lock()
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        line = json.dumps(dict(entry, v=RECORD_VERSION), ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            if self._fd is None:
+                logger.debug(f"Recorder for {self.path} is closed, dropping turn")
+                return
+            try:
+                os.write(self._fd, line.encode("utf-8"))
+            except OSError as e:
+                logger.warning(f"Could not record turn: {e}")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+
+class MemoryRecorder(Recorder):
+    """Keeps records in a list instead of a file (used by replay)."""
+
+    def __init__(self):
+        self.entries: List[Dict[str, Any]] = []
+
+    def record(self, entry: Dict[str, Any]) -> None:
+        self.entries.append(dict(entry, v=RECORD_VERSION))
+
+    def close(self) -> None:
+        pass
+
+
+def read_records(path: str) -> Iterator[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+_default: Optional[Recorder] = None
+_default_lock = threading.Lock()
+
+
+def default_recorder() -> Optional[Recorder]:
+    """Process-wide recorder for settings.RECORD_PATH; None while recording is off."""
+    global _default
+    import settings
+    if not settings.RECORD_PATH:
+        return None
+    with _default_lock:
+        if _default is None or _default.path != settings.RECORD_PATH:
+            if _default is not None:
+                _default.close()
+            _default = Recorder(settings.RECORD_PATH)
+        return _default
@@ -0,0 +1,287 @@
+"""Multi-process server: K uvicorn workers behind a session-sticky router.
+
+    python serve.py --workers 4 --port 8000
+
+The supervisor loads the catalog once and writes it as a snapshot to shared
+memory (/dev/shm when available). Every worker memory-maps that same file,
+so the catalog columns and price index exist once per host. The router
+listens on --port and sends each session to worker crc32(session_id) % K on
+port+1..port+K, so a conversation always reaches the agent that holds its
+memory. Chat requests without a session all go to worker 0, whose default
+agent is then the only one they talk to; other requests without a session
+are spread round-robin. ?worker=N picks a worker explicitly (e.g. for
+/metrics or /debug endpoints).
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import signal
+import subprocess
+import sys
+import threading
+import time
+import zlib
+from contextlib import asynccontextmanager
+from typing import Callable, List, Optional
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Hop-by-hop headers are not forwarded (RFC 9110 section 7.6.1)
+HOP_BY_HOP = {"connection", "keep-alive", "proxy-authenticate", "proxy-authorization", "te",
+              "trailer", "transfer-encoding", "upgrade", "host", "content-length"}
+
+# Routes answered by a conversation's agent. Without a session_id a worker
+# answers them with its default agent, so they go to DEFAULT_WORKER only.
+AGENT_PATHS = {"chat", "chat/interim", "ws/voice"}
+DEFAULT_WORKER = 0
+
+logger = logging.getLogger("serve")
+
+
+def worker_index(session_id: str, workers: int) -> int:
+    """Worker that owns a session; stable across restarts and processes."""
+    return zlib.crc32(session_id.encode("utf-8")) % workers
+
+
+def shared_snapshot_path(port: int) -> str:
+    """Snapshot file the workers map: in RAM (/dev/shm) when the host has it."""
+    import settings
+    if os.path.isdir("/dev/shm"):
+        return f"/dev/shm/wallie-{port}/catalog.snapshot"
+    return settings.CATALOG_SNAPSHOT_PATH
+
+
+def prime_catalog(snapshot_path: str, shared_version: Optional[str] = None) -> Optional[str]:
+    """Load the catalog once (warm from the persistent snapshot, then the API) and share it.
+
+    Returns the version now shared. Nothing is written when the catalog
+    is still `shared_version`, or when the API failed and only the
+    built-in sample products are left; workers keep the last real one.
+    Every refresh reuses the process's one service and its HTTP session.
+    """
+    from products import ProductService
+    import settings
+
+    service = ProductService.shared(snapshot_path=settings.CATALOG_SNAPSHOT_PATH)
+    if not len(service.catalog):
+        service.load_snapshot()
+    service.fetch_products()
+    if service.degraded:
+        logger.warning("Products API unavailable, not sharing the sample catalog")
+        return shared_version
+    if service.catalog.version == shared_version:
+        return shared_version
+    if os.path.abspath(snapshot_path) != os.path.abspath(settings.CATALOG_SNAPSHOT_PATH):
+        os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+        service.catalog.save_snapshot(snapshot_path)
+    logger.info(f"Shared {len(service.catalog)} products at {snapshot_path}")
+    return service.catalog.version
+
+
+def create_router(worker_urls: List[str]):
+    """ASGI app forwarding HTTP and WebSocket traffic to the sticky worker."""
+    import httpx
+    from fastapi import FastAPI, Request, WebSocket
+    from fastapi.responses import StreamingResponse
+    from starlette.background import BackgroundTask
+
+    client = httpx.AsyncClient(timeout=None, limits=httpx.Limits(max_connections=1000,
+                                                                 max_keepalive_connections=200))
+    round_robin = itertools.count()
+
+    @asynccontextmanager
+    async def lifespan(app):
+        yield
+        await client.aclose()
+
+    app = FastAPI(lifespan=lifespan)
+
+    def pick(session_id: Optional[str], worker: Optional[str], path: str) -> int:
+        if worker is not None and worker.isdigit():
+            return int(worker) % len(worker_urls)
+        if session_id:
+            return worker_index(session_id, len(worker_urls))
+        if path in AGENT_PATHS:
+            return DEFAULT_WORKER
+        return next(round_robin) % len(worker_urls)
+
+    @app.websocket("/ws/voice")
+    async def proxy_websocket(websocket: WebSocket):
+        import websockets
+
+        index = pick(websocket.query_params.get("session_id"), websocket.query_params.get("worker"), "ws/voice")
+        url = worker_urls[index].replace("http://", "ws://", 1) + "/ws/voice"
+        if websocket.url.query:
+            url += "?" + websocket.url.query
+        await websocket.accept()
+        async with websockets.connect(url, max_size=None) as upstream:
+            async def client_to_worker():
+                while True:
+                    message = await websocket.receive()
+                    if message["type"] == "websocket.disconnect":
+                        return
+                    await upstream.send(message["bytes"] if message.get("bytes") is not None else message["text"])
+
+            async def worker_to_client():
+                async for message in upstream:
+                    if isinstance(message, bytes):
+                        await websocket.send_bytes(message)
+                    else:
+                        await websocket.send_text(message)
+
+            tasks = [asyncio.ensure_future(client_to_worker()), asyncio.ensure_future(worker_to_client())]
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in tasks:
+                task.cancel()
+        try:
+            await websocket.close()
+        except RuntimeError:
+            pass  # already closed by the client
+
+    @app.api_route("/{path:path}", methods=["GET", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "HEAD"])
+    async def proxy(path: str, request: Request):
+        body = await request.body()
+        session_id = request.query_params.get("session_id")
+        if session_id is None and body and request.headers.get("content-type", "").startswith("application/json"):
+            try:
+                payload = json.loads(body)
+                session_id = payload.get("session_id") if isinstance(payload, dict) else None
+            except ValueError:
+                pass
+        index = pick(session_id, request.query_params.get("worker"), path.strip("/"))
+        upstream = client.build_request(
+            request.method, f"{worker_urls[index]}/{path}", params=request.query_params, content=body,
+            headers=[(k, v) for k, v in request.headers.items() if k.lower() not in HOP_BY_HOP],
+        )
+        response = await client.send(upstream, stream=True)
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in HOP_BY_HOP}
+        headers["X-Wallie-Worker"] = str(index)
+        return StreamingResponse(response.aiter_raw(), status_code=response.status_code, headers=headers,
+                                 background=BackgroundTask(response.aclose))
+
+    return app
+
+
+def worker_command(port: int, snapshot_path: str) -> List[str]:
+    return [sys.executable, os.path.join(ROOT, "serve.py"), "--worker", str(port), "--snapshot", snapshot_path]
+
+
+class Supervisor:
+    """Starts the workers and restarts any that exit."""
+
+    def __init__(self, ports: List[int], snapshot_path: str,
+                 command: Callable[[int, str], List[str]] = worker_command):
+        self.ports = ports
+        self.snapshot_path = snapshot_path
+        self.command = command
+        self.processes: List[Optional[subprocess.Popen]] = [None] * len(ports)
+        self._stopping = threading.Event()
+
+    def start(self) -> None:
+        for index in range(len(self.ports)):
+            self._spawn(index)
+        threading.Thread(target=self._watch, name="worker-watch", daemon=True).start()
+
+    def _spawn(self, index: int) -> None:
+        self.processes[index] = subprocess.Popen(self.command(self.ports[index], self.snapshot_path), cwd=ROOT)
+
+    def _watch(self) -> None:
+        while not self._stopping.wait(1):
+            for index, process in enumerate(self.processes):
+                if process.poll() is not None and not self._stopping.is_set():
+                    logger.warning(f"Worker on port {self.ports[index]} exited ({process.returncode}), restarting")
+                    self._spawn(index)
+
+    def stop(self) -> None:
+        self._stopping.set()
+        for process in self.processes:
+            if process and process.poll() is None:
+                process.terminate()
+        for process in self.processes:
+            if process:
+                process.wait()
+
+
+def wait_for_workers(urls: List[str], timeout: float = 120) -> None:
+    """Wait until every worker's /readyz says it has warmed up."""
+    import requests
+
+    deadline = time.monotonic() + timeout
+    for url in urls:
+        while True:
+            try:
+                if requests.get(f"{url}/readyz", timeout=2).ok:
+                    break
+            except requests.exceptions.RequestException:
+                pass
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"worker {url} did not get ready")
+            time.sleep(0.1)
+
+
+def _interrupt(*_) -> None:
+    raise KeyboardInterrupt
+
+
+def run(workers: int, host: str = "0.0.0.0", port: int = 8000, snapshot_path: str = None,
+        command: Callable[[int, str], List[str]] = worker_command, refresh_interval: float = 0) -> None:
+    """Prime the shared catalog, start the workers, then serve the router until stopped."""
+    import uvicorn
+
+    snapshot_path = snapshot_path or shared_snapshot_path(port)
+    shared_version = prime_catalog(snapshot_path)
+    ports = [port + i + 1 for i in range(workers)]
+    urls = [f"http://127.0.0.1:{p}" for p in ports]
+    supervisor = Supervisor(ports, snapshot_path, command)
+    supervisor.start()
+    signal.signal(signal.SIGTERM, _interrupt)  # uvicorn installs its own once it runs
+    if refresh_interval:
+        # Workers follow the snapshot file, so one fetch here refreshes them all
+        def refresh(shared_version):
+            while True:
+                time.sleep(refresh_interval)
+                shared_version = prime_catalog(snapshot_path, shared_version)
+        threading.Thread(target=refresh, args=(shared_version,), name="catalog-refresh", daemon=True).start()
+    try:
+        wait_for_workers(urls)
+        logger.info(f"Routing port {port} to {workers} workers on ports {ports[0]}-{ports[-1]}")
+        uvicorn.run(create_router(urls), host=host, port=port, log_level="warning")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        supervisor.stop()
+
+
+def serve_worker(port: int, snapshot_path: str) -> None:
+    """One worker: main:app on localhost, following the supervisor's snapshot."""
+    import settings
+    import uvicorn
+
+    settings.CATALOG_SNAPSHOT_PATH = snapshot_path
+    settings.CATALOG_REFRESH = "follow"
+    uvicorn.run("main:app", host="127.0.0.1", port=port, log_level="warning")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--snapshot", help="shared catalog snapshot (default: /dev/shm/wallie-PORT/)")
+    parser.add_argument("--refresh-interval", type=float, default=0,
+                        help="seconds between catalog re-fetches (0: only at startup)")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if args.worker:
+        serve_worker(args.worker, args.snapshot)
+    else:
+        run(args.workers, args.host, args.port, args.snapshot, refresh_interval=args.refresh_interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import os
+
+# Configure Gemini API
+try:
+    from config import GEMINI_API_KEY, BASE_URL, DEFAULT_USER_EMAIL
+except ImportError:
+    # Fallback to default values if config.py doesn't exist
+    GEMINI_API_KEY = 'YOUR_API_KEY'  # Replace with your actual key
+    BASE_URL = "http://localhost:3000"
+    DEFAULT_USER_EMAIL = "voice-assistant@example.com"
+
+try:
+    from config import CATALOG_SNAPSHOT_PATH
+except ImportError:
+    CATALOG_SNAPSHOT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "catalog.snapshot")
+
+try:
+    from config import SPEECH_LANGUAGE, SPEECH_TLD, TTS_SLOW
+except ImportError:
+    SPEECH_LANGUAGE = "en-IN"
+    SPEECH_TLD = "co.in"
+    TTS_SLOW = False
+
+try:
+    from config import API_TIMEOUT, SPEECH_TIMEOUT, SPEECH_PHRASE_LIMIT
+except ImportError:
+    API_TIMEOUT = 10
+    SPEECH_TIMEOUT = 10
+    SPEECH_PHRASE_LIMIT = 15
+
+try:
+    from config import TURN_DEADLINE
+except ImportError:
+    TURN_DEADLINE = 8.0  # seconds per turn before answering from local templates
+
+try:
+    from config import CHAT_WORKERS, CHAT_QUEUE, CHAT_MAX_QUEUE_WAIT
+except ImportError:
+    CHAT_WORKERS = 16  # chat turns run at once per process
+    CHAT_QUEUE = 64  # waiting turns before new ones get 503
+    CHAT_MAX_QUEUE_WAIT = 2.0  # seconds a turn may wait for a worker
+
+try:
+    from config import ADMIN_TOKEN
+except ImportError:
+    ADMIN_TOKEN = None  # /debug endpoints are disabled until a token is configured
+
+try:
+    from config import CONTEXT_CACHE, CONTEXT_CACHE_TTL
+except ImportError:
+    CONTEXT_CACHE = "off"  # "gemini", "local" (offline stand-in) or "off"
+    CONTEXT_CACHE_TTL = 3600
+
+try:
+    from config import SPECULATION_MIN_SIMILARITY, SPECULATION_WORKERS
+except ImportError:
+    SPECULATION_MIN_SIMILARITY = 0.9  # final vs interim transcript, 0-1
+    SPECULATION_WORKERS = 8
+
+try:
+    from config import STT_ENGINE, STT_SCRIPT
+except ImportError:
+    STT_ENGINE = "google"  # or "scripted": offline stand-in that replays STT_SCRIPT
+    STT_SCRIPT = []
+
+try:
+    from config import TTS_WORKERS, TTS_QUEUE, TTS_MAX_CHARS
+except ImportError:
+    TTS_WORKERS = 4  # concurrent gTTS syntheses
+    TTS_QUEUE = 8  # waiting syntheses before /tts answers 503
+    TTS_MAX_CHARS = 1000
+
+try:
+    from config import TTS_CACHE_MB
+except ImportError:
+    TTS_CACHE_MB = 64  # finished audio kept in memory for cacheable /tts answers
+
+try:
+    from config import CATALOG_REFRESH
+except ImportError:
+    CATALOG_REFRESH = "fetch"  # serve.py workers use "follow" (reload the shared snapshot)
+
+try:
+    from config import RECORD_PATH
+except ImportError:
+    RECORD_PATH = None  # JSONL file to record every turn to (for benchmarks.replay)
+
+try:
+    from config import MODEL_ROUTES
+except ImportError:
+    # Models per tier (see model_router.py), first choice first; None sends
+    # every turn to gemini-1.5-flash
+    MODEL_ROUTES = {
+        "simple": ["gemini-1.5-flash-8b", "gemini-1.5-flash"],
+        "complex": ["gemini-1.5-flash", "gemini-1.5-flash-8b"],
+    }
+
+try:
+    from config import ROUTER_WINDOW, ROUTER_MAX_ERROR_RATE, ROUTER_LATENCY_BUDGET, ROUTER_COOLDOWN
+except ImportError:
+    ROUTER_WINDOW = 50  # recent calls per model in the rolling stats
+    ROUTER_MAX_ERROR_RATE = 0.2
+    ROUTER_LATENCY_BUDGET = 3.0  # p95 seconds
+    ROUTER_COOLDOWN = 30  # seconds a degraded model is skipped
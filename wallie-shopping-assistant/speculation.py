@@ -0,0 +1,166 @@
+import logging
+import threading
+import time
+import weakref
+from concurrent.futures import Future, ThreadPoolExecutor
+from difflib import SequenceMatcher
+from typing import Optional
+
+from deadline import remaining
+from intents import tokenize
+from metrics import SPECULATION_SAVED_SECONDS, SPECULATIONS
+from settings import SPECULATION_MIN_SIMILARITY, SPECULATION_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# Speculative model calls run here, so they cannot take over /chat's threads.
+# Nothing queues behind them: with every worker busy an interim transcript is
+# skipped, since a speculation that waits is rarely done before the turn.
+_executor = ThreadPoolExecutor(max_workers=SPECULATION_WORKERS, thread_name_prefix="speculation")
+_executor_slots = threading.BoundedSemaphore(SPECULATION_WORKERS)
+_speculators = weakref.WeakKeyDictionary()
+_speculators_lock = threading.Lock()
+
+
+def normalize(text: str) -> str:
+    """Lowercased words only, so punctuation and spacing from STT don't count."""
+    return " ".join(tokenize(text))
+
+
+def similarity(a: str, b: str) -> float:
+    if a == b:
+        return 1.0
+    return SequenceMatcher(None, a, b).ratio()
+
+
+class _Speculation:
+    __slots__ = ("text", "phase", "history_length", "future", "started", "finished")
+
+    def __init__(self, text: str, phase: str, history_length: int, future: Future):
+        self.text = text
+        self.phase = phase
+        self.history_length = history_length
+        self.future = future
+        self.started = time.perf_counter()
+        self.finished = None
+        future.add_done_callback(self._done)
+
+    def _done(self, future: Future) -> None:
+        self.finished = time.perf_counter()
+
+
+class Speculator:
+    """Starts a session's next reply from interim transcripts.
+
+    interim() plans the turn for the latest partial transcript and starts
+    the model call on a small shared pool; a new transcript that is still
+    close enough to the one being generated keeps the running call. final()
+    commits the speculative reply when the final transcript is close enough
+    to it and nothing else changed the conversation meanwhile, otherwise it
+    drops it and runs the turn normally. Planning and the turn both hold
+    the agent's turn_lock; an interim transcript that arrives during a turn
+    is skipped.
+    """
+
+    def __init__(self, agent, min_similarity: float = SPECULATION_MIN_SIMILARITY):
+        # Weak, so the speculator does not keep its own entry in _speculators alive
+        self._agent = weakref.ref(agent)
+        self.min_similarity = min_similarity
+        self._pending: Optional[_Speculation] = None
+        self._lock = threading.Lock()
+
+    @property
+    def agent(self):
+        return self._agent()
+
+    def interim(self, text: str) -> str:
+        """Speculate on a partial transcript: "started", "kept" or "skipped"."""
+        normalized = normalize(text)
+        if not normalized:
+            return "skipped"
+        agent = self.agent
+        # While a turn runs, the session's state is about to change anyway
+        if not agent.turn_lock.acquire(blocking=False):
+            return "skipped"
+        try:
+            with self._lock:
+                pending = self._pending
+                if pending and similarity(pending.text, normalized) >= self.min_similarity:
+                    return "kept"
+                if pending:
+                    self._cancel(pending)
+                if not _executor_slots.acquire(blocking=False):
+                    self._pending = None
+                    SPECULATIONS.inc(result="busy")
+                    return "skipped"
+                try:
+                    phase, prompt = agent.plan_turn(text)
+                    # Drafted only: function calls (add_to_cart) run when the turn commits
+                    future = _executor.submit(agent.draft_speculatively, prompt, phase, text)
+                except BaseException:
+                    _executor_slots.release()
+                    raise
+                future.add_done_callback(lambda _: _executor_slots.release())
+                self._pending = _Speculation(normalized, phase, len(agent.memory.messages), future)
+        finally:
+            agent.turn_lock.release()
+        SPECULATIONS.inc(result="started")
+        return "started"
+
+    def final(self, text: str) -> str:
+        """Run the turn for the final transcript, reusing a matching speculation."""
+        with self.agent.turn_lock:
+            return self._final(text)
+
+    def _final(self, text: str) -> str:
+        with self._lock:
+            pending, self._pending = self._pending, None
+        if pending is not None:
+            arrived = time.perf_counter()
+            if self._matches(pending, text):
+                try:
+                    # No longer than the turn has left; past that the turn
+                    # runs normally and falls back to templates
+                    reply, noted = pending.future.result(timeout=remaining())
+                except Exception as e:
+                    logger.warning(f"Speculative generation failed: {e}")
+                else:
+                    SPECULATIONS.inc(result="hit")
+                    # Model time spent before the final transcript arrived
+                    SPECULATION_SAVED_SECONDS.observe(min(pending.finished or arrived, arrived) - pending.started)
+                    return self.agent.run_conversation_chain(text, reply=reply, noted=noted)
+            self._cancel(pending, result="miss")
+        return self.agent.run_conversation_chain(text)
+
+    def _matches(self, pending: _Speculation, text: str) -> bool:
+        if len(self.agent.memory.messages) != pending.history_length:
+            return False
+        if similarity(pending.text, normalize(text)) < self.min_similarity:
+            return False
+        # Close wording can still change the phase ("lena" vs "nahi lena")
+        phase, _ = self.agent.plan_turn(text)
+        return phase == pending.phase
+
+    def _cancel(self, pending: _Speculation, result: str = "cancelled") -> None:
+        # A call already sent to the model cannot be recalled; its reply is dropped
+        pending.future.cancel()
+        SPECULATIONS.inc(result=result)
+
+
+def speculator_for(agent) -> Speculator:
+    """The agent's Speculator; it goes away with the agent (e.g. an evicted session)."""
+    with _speculators_lock:
+        speculator = _speculators.get(agent)
+        if speculator is None:
+            speculator = _speculators[agent] = Speculator(agent)
+        return speculator
+
+
+def respond(agent, text: str) -> str:
+    """Run a turn, using the agent's speculation if there is one; one turn per agent at a time."""
+    with _speculators_lock:
+        speculator = _speculators.get(agent)
+    if speculator is None:
+        with agent.turn_lock:
+            return agent.run_conversation_chain(text)
+    return speculator.final(text)
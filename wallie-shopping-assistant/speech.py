@@ -0,0 +1,99 @@
+import os
+import re
+import uuid
+import logging
+
+# Speech recognition and text-to-speech; only imported when voice is used
+import speech_recognition as sr
+from gtts import gTTS
+import pygame
+
+from metrics import span
+from settings import SPEECH_LANGUAGE, SPEECH_TLD, SPEECH_TIMEOUT, SPEECH_PHRASE_LIMIT
+
+logger = logging.getLogger(__name__)
+
+
+class SpeechHandler:
+    """Handles speech recognition and text-to-speech functionality."""
+    
+    def __init__(self, language: str = SPEECH_LANGUAGE, tld: str = SPEECH_TLD):
+        """Initialize speech handler."""
+        self.language = language
+        self.tld = tld
+        self.recognizer = sr.Recognizer()
+        
+        # Configure speech recognition settings
+        self.recognizer.dynamic_energy_threshold = True
+        self.recognizer.energy_threshold = 300
+        self.recognizer.pause_threshold = 0.8
+        
+        # Initialize pygame for audio playback
+        pygame.mixer.init()
+        logger.info("Speech handler initialized")
+    
+    @span("stt")
+    def recognize_speech(self) -> str:
+        """Capture voice input and convert to text."""
+        with sr.Microphone() as source:
+            logger.info("Listening...")
+            print("Listening...")
+            
+            # Adjust for ambient noise
+            self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
+            
+            try:
+                # Listen for audio input
+                audio = self.recognizer.listen(source, timeout=SPEECH_TIMEOUT, phrase_time_limit=SPEECH_PHRASE_LIMIT)
+                logger.info("Processing speech...")
+                
+                # Convert speech to text
+                text = self.recognizer.recognize_google(audio, language=self.language)
+                logger.info(f"Customer: {text}")
+                print(f"Customer: {text}")
+                
+                return text.lower()
+                
+            except sr.UnknownValueError:
+                logger.warning("Could not understand audio")
+                print("Sorry, I didn't catch that.")
+            except sr.RequestError as e:
+                logger.error(f"Speech service error: {e}")
+                print("Speech service error. Please try again.")
+            except sr.WaitTimeoutError:
+                logger.warning("No speech detected within timeout period")
+                print("I didn't hear anything. Please try again.")
+                
+        return ""
+    
+    @span("tts")
+    def speak(self, text: str, slow: bool = False) -> None:
+        """Convert text to speech and play it."""
+        # Clean text for TTS
+        cleaned_text = re.sub(r'[^\w\s.,!?-]', '', text)
+        logger.info(f"AI: {cleaned_text}")
+        print(f"AI: {cleaned_text}")
+        
+        # Generate TTS audio
+        filename = f"response_{uuid.uuid4().hex[:8]}.mp3"
+        try:
+            tts = gTTS(text=cleaned_text, lang=self.language.split('-')[0], 
+                      slow=slow, tld=self.tld)
+            tts.save(filename)
+            
+            # Play audio
+            pygame.mixer.music.load(filename)
+            pygame.mixer.music.play()
+            
+            # Wait for audio to finish playing
+            while pygame.mixer.music.get_busy():
+                pygame.time.Clock().tick(10)
+                
+        except Exception as e:
+            logger.error(f"TTS error: {e}")
+            print(f"Error generating speech: {e}")
+        finally:
+            # Cleanup
+            pygame.mixer.music.unload()
+            if os.path.exists(filename):
+                os.remove(filename)
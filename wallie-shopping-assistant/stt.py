@@ -0,0 +1,146 @@
+import logging
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from settings import SPEECH_LANGUAGE, SPEECH_PHRASE_LIMIT, STT_ENGINE, STT_SCRIPT
+
+logger = logging.getLogger(__name__)
+
+
+class EnergyVAD:
+    """Splits a stream of 16-bit mono PCM into utterances by frame energy.
+
+    A frame is speech when its RMS is above `threshold`. An utterance starts
+    with the first speech frame (plus `preroll_ms` of audio before it, so
+    soft first syllables are kept) and ends after `silence_ms` of quiet or
+    `max_seconds` of audio. Utterances shorter than `min_speech_ms` of
+    speech are dropped as noise.
+    """
+
+    def __init__(self, sample_rate: int = 16000, frame_ms: int = 30, threshold: float = 500,
+                 silence_ms: int = 700, min_speech_ms: int = 200, preroll_ms: int = 300,
+                 max_seconds: float = SPEECH_PHRASE_LIMIT):
+        self.sample_rate = sample_rate
+        self.frame_bytes = sample_rate * frame_ms // 1000 * 2
+        self.threshold = threshold
+        self.silence_frames = max(1, silence_ms // frame_ms)
+        self.min_speech_frames = max(1, min_speech_ms // frame_ms)
+        self.max_frames = int(max_seconds * 1000 // frame_ms)
+        self._preroll = deque(maxlen=max(1, preroll_ms // frame_ms))
+        self._pending = b""
+        self._frames: List[bytes] = []
+        self._speech_frames = 0
+        self._quiet_frames = 0
+
+    @property
+    def in_speech(self) -> bool:
+        return bool(self._frames)
+
+    @property
+    def audio(self) -> bytes:
+        """Audio of the utterance in progress."""
+        return b"".join(self._frames)
+
+    def feed(self, pcm: bytes) -> List[bytes]:
+        """Add audio; returns the utterances it completed."""
+        finished = []
+        data = self._pending + pcm
+        usable = len(data) - len(data) % self.frame_bytes
+        self._pending = data[usable:]
+        for start in range(0, usable, self.frame_bytes):
+            utterance = self._frame(data[start:start + self.frame_bytes])
+            if utterance:
+                finished.append(utterance)
+        return finished
+
+    def flush(self) -> Optional[bytes]:
+        """End the utterance in progress (e.g. the client stopped sending)."""
+        return self._end()
+
+    def _frame(self, frame: bytes) -> Optional[bytes]:
+        samples = np.frombuffer(frame, dtype="<i2").astype(np.float32)
+        loud = float(np.sqrt(np.mean(samples * samples))) >= self.threshold
+        if not self._frames:
+            if not loud:
+                self._preroll.append(frame)
+                return None
+            self._frames.extend(self._preroll)
+            self._preroll.clear()
+
+        self._frames.append(frame)
+        if loud:
+            self._speech_frames += 1
+            self._quiet_frames = 0
+        else:
+            self._quiet_frames += 1
+        if self._quiet_frames >= self.silence_frames or len(self._frames) >= self.max_frames:
+            return self._end()
+        return None
+
+    def _end(self) -> Optional[bytes]:
+        audio = b"".join(self._frames)
+        speech = self._speech_frames
+        self._frames = []
+        self._speech_frames = 0
+        self._quiet_frames = 0
+        return audio if speech >= self.min_speech_frames else None
+
+
+class SpeechEngine(ABC):
+    """Turns one utterance of 16-bit mono PCM into text."""
+
+    # Audio encodings the engine accepts from clients
+    encodings = ("pcm16",)
+
+    @abstractmethod
+    def transcribe(self, pcm: bytes, sample_rate: int) -> str:
+        """Text of a finished utterance ("" when nothing was understood)."""
+
+    def interim(self, pcm: bytes, sample_rate: int) -> Optional[str]:
+        """Best guess for an utterance still in progress, if the engine has one."""
+        return None
+
+
+class GoogleSpeechEngine(SpeechEngine):
+    """Google Web Speech API through speech_recognition, as SpeechHandler uses."""
+
+    def __init__(self, language: str = SPEECH_LANGUAGE):
+        import speech_recognition as sr
+        self.sr = sr
+        self.language = language
+        self.recognizer = sr.Recognizer()
+
+    def transcribe(self, pcm: bytes, sample_rate: int) -> str:
+        audio = self.sr.AudioData(pcm, sample_rate, 2)
+        try:
+            return self.recognizer.recognize_google(audio, language=self.language).lower()
+        except self.sr.UnknownValueError:
+            logger.warning("Could not understand audio")
+            return ""
+
+
+class ScriptedSpeechEngine(SpeechEngine):
+    """Offline stand-in: the n-th utterance is heard as the n-th scripted line."""
+
+    def __init__(self, transcripts: Iterable[str] = ()):
+        self.transcripts = deque(transcripts)
+
+    def transcribe(self, pcm: bytes, sample_rate: int) -> str:
+        return self.transcripts.popleft() if self.transcripts else ""
+
+    def interim(self, pcm: bytes, sample_rate: int) -> Optional[str]:
+        return self.transcripts[0] if self.transcripts else None
+
+
+ENGINES: Dict[str, Callable[[], SpeechEngine]] = {
+    "google": GoogleSpeechEngine,
+    "scripted": lambda: ScriptedSpeechEngine(STT_SCRIPT),
+}
+
+
+def create_engine(name: str = None) -> SpeechEngine:
+    """Engine named in settings.STT_ENGINE (or `name`); add others to ENGINES."""
+    return ENGINES[name or STT_ENGINE]()
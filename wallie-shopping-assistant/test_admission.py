@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Test script for prioritized chat admission (offline, no model or backend)
+"""
+
+import asyncio
+import sys
+import threading
+
+import pytest
+
+from admission import PHASE_PRIORITY, AdmissionController, Overloaded
+
+# Arrival order of the waiting turns; they should run by phase priority
+ARRIVALS = ["interim", "greeting", "checkout", "product_inquiry", "details"]
+
+
+async def hold(controller):
+    """Start a turn that keeps its slot until the returned event is set."""
+    release = threading.Event()
+    task = asyncio.create_task(controller.run("checkout", release.wait, 5))
+    await asyncio.sleep(0.05)
+    return release, task
+
+
+async def queue(controller, phase, function, *args):
+    """Start a turn and give it time to reach the queue."""
+    task = asyncio.create_task(controller.run(phase, function, *args))
+    await asyncio.sleep(0.01)
+    return task
+
+
+def test_priority_order():
+    """Waiting turns run by phase priority, interim transcripts last"""
+    print("🔍 Testing admission order...")
+    assert max(PHASE_PRIORITY, key=PHASE_PRIORITY.get) == "interim"
+
+    async def scenario():
+        controller = AdmissionController(workers=1, queue=10, max_wait=5)
+        release, running = await hold(controller)
+        ran = []
+        waiting = [await queue(controller, phase, ran.append, phase) for phase in ARRIVALS]
+        assert len(controller._waiting) == len(ARRIVALS)
+        release.set()
+        await asyncio.gather(running, *waiting)
+        assert controller.running == 0
+        return ran
+
+    ran = asyncio.run(scenario())
+    assert ran == sorted(ARRIVALS, key=PHASE_PRIORITY.get), ran
+    print(f"✅ ran {' > '.join(ran)}")
+
+
+def test_shedding():
+    """A full queue sheds its lowest-ranked waiter for a higher one, else turns the new one away"""
+    print("\n🔍 Testing shedding...")
+
+    async def scenario():
+        controller = AdmissionController(workers=1, queue=1, max_wait=5)
+        release, running = await hold(controller)
+        greeting = await queue(controller, "greeting", str, "greeting")
+        checkout = await queue(controller, "checkout", str, "checkout")
+        with pytest.raises(Overloaded) as shed:
+            await greeting
+        assert shed.value.reason == "shed" and shed.value.retry_after >= 1
+
+        # Nothing waiting ranks below the new turn
+        with pytest.raises(Overloaded) as full:
+            await controller.run("details", str, "details")
+        assert full.value.reason == "queue_full"
+
+        release.set()
+        await running
+        assert await checkout == "checkout"
+        assert controller.running == 0 and not controller._waiting
+
+    asyncio.run(scenario())
+    print("✅ greeting shed for checkout, details turned away")
+
+
+def test_timeout():
+    """A turn that waits longer than max_wait is turned away"""
+    print("\n🔍 Testing the queue wait limit...")
+
+    async def scenario():
+        controller = AdmissionController(workers=1, queue=5, max_wait=0.1)
+        release, running = await hold(controller)
+        with pytest.raises(Overloaded) as late:
+            await controller.run("details", str, "details")
+        assert late.value.reason == "timeout"
+        assert not controller._waiting
+        release.set()
+        await running
+        assert controller.running == 0
+
+    asyncio.run(scenario())
+    print("✅ waiter timed out")
+
+
+def test_release_on_error():
+    """A turn that raises gives its slot back, to a waiter or to the pool"""
+    print("\n🔍 Testing release on error...")
+
+    def fail(message):
+        raise ValueError(message)
+
+    async def scenario():
+        controller = AdmissionController(workers=1, queue=5, max_wait=5)
+        with pytest.raises(ValueError):
+            await controller.run("checkout", fail, "model down")
+        assert controller.running == 0
+        assert await controller.run("greeting", str, "next") == "next"
+
+        release, running = await hold(controller)
+        failing = await queue(controller, "checkout", fail, "model down")
+        waiting = await queue(controller, "greeting", str, "after")
+        release.set()
+        await running
+        with pytest.raises(ValueError):
+            await failing
+        assert await waiting == "after"
+        assert controller.running == 0 and controller.service_time is not None
+
+    asyncio.run(scenario())
+    print("✅ slots released after errors")
+
+
+def main():
+    """Run all tests"""
+    print("🚀 Admission Test")
+    print("=" * 50)
+
+    results = {}
+    for test_name, test_func in [("Priority order", test_priority_order),
+                                 ("Shedding", test_shedding),
+                                 ("Queue timeout", test_timeout),
+                                 ("Release on error", test_release_on_error)]:
+        try:
+            test_func()
+            results[test_name] = True
+        except Exception as e:
+            print(f"❌ {test_name} failed: {e}")
+            results[test_name] = False
+
+    print("\n" + "=" * 50)
+    for test_name, passed in results.items():
+        status = "✅ PASS" if passed else "❌ FAIL"
+        print(f"{status:<10} {test_name}")
+    return 0 if all(results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
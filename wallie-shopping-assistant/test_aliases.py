@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test script for Hinglish and Devanagari product mentions (offline, no backend)
+"""
+
+import sys
+
+from benchmarks.fake_backend import SEED_PRODUCTS
+from intents import ProductIndex, tokenize
+
+NAMES = [name for name, _, _ in SEED_PRODUCTS]
+
+# Mentions that must name a product
+POSITIVE = {
+    "mujhe ek ghadi chahiye": "Smart Watch",
+    "घड़ी dikhao": "Smart Watch",
+    "joote kitne ke hain": "Running Shoes",
+    "जूते चाहिए": "Running Shoes",
+    "basta lena hai": "Backpack",
+    "हेडफोन का price": "Wireless Headphones",
+    "ek sunglass dikhao": "Sunglasses",
+    "chashma chahiye": "Sunglasses",
+}
+# Everyday words whose phonetic keys are close to a product alias
+NEGATIVE = ["jata", "jaata", "jaate", "jati", "jeet", "gaddi", "gud", "baste",
+            "yeh kaam ho jata hai", "wo roz jaate hain"]
+
+
+def find(index, text):
+    row = index.find(tokenize(text))
+    return None if row is None else NAMES[row]
+
+
+def test_aliases_name_products():
+    """Curated Hinglish and Devanagari words and spelling variants find their product"""
+    print("🔍 Testing product aliases...")
+    index = ProductIndex(NAMES)
+    for text, expected in POSITIVE.items():
+        assert find(index, text) == expected, f"{text!r} -> {find(index, text)!r}, expected {expected!r}"
+    print(f"✅ {len(POSITIVE)} mentions found their product")
+
+
+def test_common_words_name_nothing():
+    """Common verbs and particles never resolve to a product"""
+    print("\n🔍 Testing common words...")
+    index = ProductIndex(NAMES)
+    for text in NEGATIVE:
+        assert find(index, text) is None, f"{text!r} resolved to {find(index, text)!r}"
+    print(f"✅ {len(NEGATIVE)} everyday phrases named no product")
+
+
+def main():
+    """Run all tests"""
+    print("🚀 Product Alias Test")
+    print("=" * 50)
+
+    results = {}
+    for test_name, test_func in [("Aliases", test_aliases_name_products),
+                                 ("Common words", test_common_words_name_nothing)]:
+        try:
+            test_func()
+            results[test_name] = True
+        except Exception as e:
+            print(f"❌ {test_name} failed: {e}")
+            results[test_name] = False
+
+    print("\n" + "=" * 50)
+    for test_name, passed in results.items():
+        status = "✅ PASS" if passed else "❌ FAIL"
+        print(f"{status:<10} {test_name}")
+    return 0 if all(results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Test script for the local cart mirror (offline, fake model and backend)
+"""
+
+import logging
+import sys
+
+import pytest
+
+from cart import Cart, parse_quantity
+from test_checkout import fake_agent
+
+WATCH = {"id": 1, "name": "Smart Watch", "price": "1999.99"}
+SHOES = {"id": 2, "name": "Running Shoes", "price": 2499}
+# Message -> quantity asked for
+QUANTITIES = {
+    "do piece lena hai": 2,
+    "3 pcs chahiye": 3,
+    "तीन पीस": 3,
+    "ek jodi joote": 1,
+    "kar do": None,
+    "size 9 chahiye": None,
+}
+
+
+@pytest.fixture
+def session():
+    with fake_agent() as agent_and_backend:
+        yield agent_and_backend
+
+
+def test_totals():
+    """Lines merge by product and totals are exact integer paise"""
+    print("🔍 Testing cart totals...")
+    cart = Cart()
+    cart.add(WATCH, 2)
+    cart.add(SHOES)
+    cart.add(WATCH)
+    assert len(cart) == 4 and len(cart.lines) == 2
+    assert cart.total() == 3 * 199999 + 249900
+    assert cart.total_with(SHOES, 2) == cart.total() + 2 * 249900
+    assert "Total: ₹8498.97" in cart.describe()
+    assert Cart().describe() == "Aapka cart abhi khaali hai."
+    print(f"✅ total {cart.total()} paise")
+
+
+def test_quantities():
+    """Counts only count next to a unit"""
+    print("\n🔍 Testing quantities...")
+    for text, expected in QUANTITIES.items():
+        assert parse_quantity(text) == expected, f"{text!r} -> {parse_quantity(text)!r}, expected {expected!r}"
+    print(f"✅ {len(QUANTITIES)} messages")
+
+
+def test_sync_then_add(session):
+    """The mirror loads what the server cart holds, then adds on top of it"""
+    print("\n🔍 Testing cart sync...")
+    agent, backend = session
+    backend.cart.append({"productId": 2, "email": agent.product_service.user_email, "quantity": 1})
+    product = agent.product_service.catalog.record(agent.product_service.catalog.row_for_id(1))
+    assert agent.add_to_cart(product, 2)
+    assert agent.cart.synced
+    assert {line.product_id: line.quantity for line in agent.cart.lines.values()} == {1: 2, 2: 1}
+    assert backend.count("/api/voice-cart", "GET") == 1
+    print(f"✅ mirror holds {len(agent.cart)} items after one read")
+
+
+def test_failed_post(session):
+    """A rejected add leaves the mirror as it was"""
+    print("\n🔍 Testing a failed add...")
+    agent, backend = session
+    backend.faults["cart_post"] = {"errors": 1.0}
+    product = agent.product_service.catalog.record(0)
+    assert not agent.add_to_cart(product)
+    assert agent.cart.synced and len(agent.cart) == 0
+    assert agent.memory.get_context("last_purchase") is None
+    print("✅ mirror unchanged")
+
+
+def test_failed_read(session):
+    """An add after a failed read is counted once, from the read made after it"""
+    print("\n🔍 Testing an add after a failed cart read...")
+    agent, backend = session
+    backend.faults["cart_get"] = {"errors": 1.0}
+    agent._sync_cart()
+    assert not agent.cart.synced
+    del backend.faults["cart_get"]
+    product = agent.product_service.catalog.record(0)
+    assert agent.add_to_cart(product, 3)
+    assert agent.cart.synced and len(agent.cart) == 3
+    print("✅ add counted once")
+
+
+def _with_session(test):
+    with fake_agent() as agent_and_backend:
+        test(agent_and_backend)
+
+
+def main():
+    """Run all tests"""
+    print("🚀 Cart Test")
+    print("=" * 50)
+
+    logging.disable(logging.CRITICAL)
+    results = {}
+    tests = [("Totals", test_totals), ("Quantities", test_quantities)]
+    tests += [(name, lambda test=test: _with_session(test)) for name, test in [
+        ("Sync then add", test_sync_then_add), ("Failed add", test_failed_post), ("Failed read", test_failed_read)]]
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            results[test_name] = True
+        except Exception as e:
+            print(f"❌ {test_name} failed: {e}")
+            results[test_name] = False
+
+    print("\n" + "=" * 50)
+    for test_name, passed in results.items():
+        status = "✅ PASS" if passed else "❌ FAIL"
+        print(f"{status:<10} {test_name}")
+    return 0 if all(results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test script for catalog price handling and the legacy products view (offline)
+"""
+
+import sys
+
+from catalog import Catalog, format_price, parse_price
+
+# paise -> shown price
+PRICES = {
+    0: "₹0.00",
+    5: "₹0.05",
+    99: "₹0.99",
+    150: "₹1.50",
+    19999: "₹199.99",
+    5000000: "₹50000.00",
+    -5: "-₹0.05",
+    -150: "-₹1.50",
+    -19999: "-₹199.99",
+}
+RECORDS = [
+    {"id": 1, "name": "Smart Watch", "price": "1999.00", "description": "Fitness tracking", "category": "Wearables"},
+    {"id": 2, "name": "Wireless Headphones", "price": 499.5, "description": "Premium audio", "category": "Audio"},
+]
+
+
+def test_format_price():
+    """Paise format with two decimals, the sign in front of the rupee symbol"""
+    print("🔍 Testing format_price...")
+    for paise, expected in PRICES.items():
+        assert format_price(paise) == expected, f"{paise} -> {format_price(paise)!r}, expected {expected!r}"
+        assert parse_price(expected.replace("-₹", "-")) == paise
+    print(f"✅ {len(PRICES)} prices formatted")
+
+
+def test_legacy_view():
+    """as_dict gives the old name-key -> product dict"""
+    print("\n🔍 Testing the legacy products view...")
+    view = Catalog.from_records(RECORDS).as_dict()
+    assert list(view) == ["smartwatch", "wirelessheadphones"]
+    assert view["wirelessheadphones"]["id"] == 2
+    print(f"✅ {len(view)} products in the view")
+
+
+def main():
+    """Run all tests"""
+    print("🚀 Catalog Test")
+    print("=" * 50)
+
+    results = {}
+    for test_name, test_func in [("Format price", test_format_price), ("Legacy view", test_legacy_view)]:
+        try:
+            test_func()
+            results[test_name] = True
+        except Exception as e:
+            print(f"❌ {test_name} failed: {e}")
+            results[test_name] = False
+
+    print("\n" + "=" * 50)
+    for test_name, passed in results.items():
+        status = "✅ PASS" if passed else "❌ FAIL"
+        print(f"{status:<10} {test_name}")
+    return 0 if all(results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Test script for single-flight catalog loading (runs offline against a fake backend)
+"""
+
+import logging
+import os
+import sys
+import tempfile
+import threading
+from contextlib import contextmanager
+
+import pytest
+
+from benchmarks import fakes
+from benchmarks.fake_backend import FakeBackend
+
+AGENTS = 1000
+# Fewer products than one page, so a full catalog load is exactly one request
+PRODUCTS = 500
+
+
+@contextmanager
+def fake_environment():
+    """Fake model and a slow fake backend, with settings pointed at them for the duration."""
+    import google.generativeai as genai
+    import settings
+
+    saved = {name: getattr(settings, name) for name in ("BASE_URL", "CATALOG_SNAPSHOT_PATH", "CONTEXT_CACHE")}
+    model_class = genai.GenerativeModel
+    fakes.install()
+    # Slow enough that every constructor arrives while the fetch is in flight
+    with FakeBackend(product_count=PRODUCTS, latency=0.5) as backend, tempfile.TemporaryDirectory() as tmp:
+        settings.BASE_URL = backend.base_url
+        settings.CATALOG_SNAPSHOT_PATH = os.path.join(tmp, "catalog.snapshot")
+        try:
+            yield backend
+        finally:
+            genai.GenerativeModel = model_class
+            for name, value in saved.items():
+                setattr(settings, name, value)
+
+
+# Module-wide and autouse: every test here runs against the fake backend
+@pytest.fixture(scope="module", autouse=True)
+def backend():
+    with fake_environment() as fake_backend:
+        yield fake_backend
+
+
+def construct_concurrently(count, construct):
+    """Run construct() on `count` threads released at the same moment."""
+    barrier = threading.Barrier(count)
+    results = [None] * count
+    errors = []
+
+    def run(index):
+        try:
+            barrier.wait()
+            results[index] = construct()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return results
+
+def test_single_flight():
+    """Concurrent callers of one key share a single call"""
+    print("🔍 Testing SingleFlight...")
+    from singleflight import SingleFlight
+
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def slow():
+        calls.append(1)
+        release.wait(5)
+        return "catalog"
+
+    threading.Timer(0.2, release.set).start()
+    results = construct_concurrently(50, lambda: flight.do("key", slow))
+    assert len(calls) == 1, f"expected 1 call, got {len(calls)}"
+    assert results == ["catalog"] * 50
+    # Finished calls are not cached: the next caller runs again
+    assert flight.do("key", lambda: "fresh") == "fresh"
+    print("✅ 50 concurrent callers shared one call")
+
+def test_concurrent_agents(backend):
+    """1,000 agents constructed at once make one /api/products request"""
+    print(f"\n🔍 Constructing {AGENTS} agents concurrently...")
+    from agent import ShoppingAgent
+
+    agents = construct_concurrently(AGENTS, ShoppingAgent)
+    requests_made = backend.count("/api/products")
+    services = {id(agent.product_service) for agent in agents}
+    assert requests_made == 1, f"expected 1 upstream request, got {requests_made}"
+    assert len(services) == 1, f"expected one shared ProductService, got {len(services)}"
+    assert all(len(agent.product_service.catalog) == PRODUCTS for agent in agents)
+    print(f"✅ {AGENTS} agents, {requests_made} upstream request, {len(services)} shared catalog")
+
+def test_concurrent_services(backend):
+    """Separate ProductService instances fetching at once share one request"""
+    print("\n🔍 Fetching from 100 separate services concurrently...")
+    from products import ProductService
+
+    before = backend.count("/api/products")
+    with tempfile.TemporaryDirectory() as tmp:
+        services = [ProductService(base_url=backend.base_url, snapshot_path=os.path.join(tmp, f"{i}.snapshot"))
+                    for i in range(100)]
+        construct_concurrently(len(services), lambda: services.pop().fetch_products())
+    requests_made = backend.count("/api/products") - before
+    assert requests_made == 1, f"expected 1 upstream request, got {requests_made}"
+    print(f"✅ 100 services, {requests_made} upstream request")
+
+def test_fallback_recovers(backend):
+    """A catalog that fell back to the samples is replaced once the API answers again"""
+    print("\n🔍 Recovering from the fallback catalog...")
+    import time
+    from products import ProductService
+
+    with tempfile.TemporaryDirectory() as tmp:
+        service = ProductService(base_url=backend.base_url, snapshot_path=os.path.join(tmp, "catalog.snapshot"))
+        backend.faults["products"] = {"errors": 1.0}
+        try:
+            service.ensure_loaded()
+        finally:
+            del backend.faults["products"]
+        assert service.degraded, "expected the fallback catalog to be marked degraded"
+        # The next call retries in the background while the fallback keeps serving
+        service.ensure_loaded()
+        give_up = time.monotonic() + 5
+        while service.degraded and time.monotonic() < give_up:
+            time.sleep(0.05)
+        assert not service.degraded, "catalog still degraded after the API recovered"
+        assert len(service.catalog) == PRODUCTS
+    print(f"✅ fallback replaced by {len(service.catalog)} products")
+
+def main():
+    """Run all tests"""
+    print("🚀 Catalog Loading Test")
+    print("=" * 50)
+
+    logging.disable(logging.INFO)
+    results = {}
+    with fake_environment() as backend:
+        tests = [
+            ("Single flight", test_single_flight),
+            ("Concurrent agents", lambda: test_concurrent_agents(backend)),
+            ("Concurrent services", lambda: test_concurrent_services(backend)),
+            ("Fallback recovers", lambda: test_fallback_recovers(backend)),
+        ]
+        for test_name, test_func in tests:
+            try:
+                test_func()
+                results[test_name] = True
+            except Exception as e:
+                print(f"❌ {test_name} failed: {e}")
+                results[test_name] = False
+
+    print("\n" + "=" * 50)
+    for test_name, passed in results.items():
+        status = "✅ PASS" if passed else "❌ FAIL"
+        print(f"{status:<10} {test_name}")
+    return 0 if all(results.values()) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test script for placing an order exactly once (offline, fake model and backend)
+"""
+
+import logging
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+
+import pytest
+
+from benchmarks import fakes
+from benchmarks.fake_backend import FakeBackend
+
+ORDER = ["smart watch chahiye", "haan", "haan le lo"]
+# Follow-ups after the order; none of them orders anything
+FOLLOW_UPS = ["thank you", "bye", "is it ok?", "what is this book about"]
+
+
+@contextmanager
+def fake_agent(model_class=fakes.FakeGenerativeModel):
+    """A session agent on a fake model and a fake backend; yields (agent, backend)."""
+    import google.generativeai as genai
+    import settings
+
+    saved = settings.CONTEXT_CACHE
+    real_model_class = genai.GenerativeModel
+    fakes.install(model_class)
+    with FakeBackend() as backend, tempfile.TemporaryDirectory() as tmp:
+        try:
+            from agent import ShoppingAgent
+            from products import ProductService
+
+            service = ProductService(base_url=backend.base_url, snapshot_path=os.path.join(tmp, "catalog.snapshot"))
+            yield ShoppingAgent(product_service=service, context_cache=False, router=False), backend
+        finally:
+            genai.GenerativeModel = real_model_class
+            settings.CONTEXT_CACHE = saved
+
+
+@pytest.fixture
+def session():
+    with fake_agent() as agent_and_backend:
+        yield agent_and_backend
+
+
+def test_order_placed_once(session):
+    """Turns after an order make no further cart call"""
+    print("🔍 Testing follow-ups after an order...")
+    agent, backend = session
+    for text in ORDER:
+        agent.run_conversation_chain(text)
+    orders = backend.count("/api/voice-cart", "POST")
+    assert orders == 1, f"expected 1 cart POST for the order, got {orders}"
+    assert agent.memory.conversation_phase != "checkout"
+
+    for text in FOLLOW_UPS:
+        agent.run_conversation_chain(text)
+    orders = backend.count("/api/voice-cart", "POST")
+    assert orders == 1, f"follow-ups placed the order again: {orders} cart POSTs"
+    assert len(backend.cart) == 1
+    print(f"✅ {len(FOLLOW_UPS)} follow-ups, {orders} cart POST")
+
+
+def main():
+    """Run all tests"""
+    print("🚀 Checkout Test")
+    print("=" * 50)
+
+    logging.disable(logging.INFO)
+    results = {}
+    with fake_agent() as agent_and_backend:
+        tests = [("Order placed once", lambda: test_order_placed_once(agent_and_backend))]
+        for test_name, test_func in tests:
+            try:
+                test_func()
+                results[test_name] = True
+            except Exception as e:
+                print(f"❌ {test_name} failed: {e}")
+                results[test_name] = False
+
+    print("\n" + "=" * 50)
+    for test_name, passed in results.items():
+        status = "✅ PASS" if passed else "❌ FAIL"
+        print(f"{status:<10} {test_name}")
+    return 0 if all(results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Test script for the turn deadline and template fallback (offline, fake model and backend)
+"""
+
+import contextvars
+import logging
+import sys
+import threading
+import time
+
+import pytest
+
+from benchmarks import fakes
+from catalog import Catalog
+from cart import Cart
+from deadline import DeadlineExceeded, check_remaining, deadline, expired, remaining, request_timeout
+from fallback import EXAMPLE_PRODUCTS, fallback_reply
+from metrics import FALLBACK_REPLIES
+from test_checkout import fake_agent
+
+PRODUCTS = [
+    {"id": 1, "name": "Smart Watch", "price": "1999.99", "category": "electronics"},
+    {"id": 2, "name": "Running Shoes", "price": "2499", "category": "footwear"},
+    {"id": 3, "name": "Cotton Kurta", "price": "799.50", "category": "clothing"},
+    {"id": 4, "name": "Steel Bottle", "price": "349", "category": "kitchen"},
+]
+# Model that answers in 2s, well after the turn's deadline
+SLOW_MODEL = fakes.fake_model_class("2")
+TURN_DEADLINE = 0.3
+
+
+@pytest.fixture
+def slow_session():
+    with fake_agent(SLOW_MODEL) as agent_and_backend:
+        yield agent_and_backend
+
+
+def test_nesting():
+    """A nested deadline only ever shortens the one in force, and is undone on exit"""
+    print("🔍 Testing deadline nesting...")
+    assert remaining() is None and not expired()
+    with deadline(10):
+        outer = remaining()
+        with deadline(60):
+            assert remaining() <= outer, "a nested block was given more time than the turn"
+        with deadline(1):
+            assert remaining() <= 1
+        assert remaining() > 1
+        with deadline(None):
+            assert remaining() > 1
+    assert remaining() is None
+    print("✅ nested deadlines shorten only")
+
+
+def test_budget():
+    """check_remaining and request_timeout follow what the turn has left"""
+    print("\n🔍 Testing the time budget...")
+    assert request_timeout(5) == 5
+    check_remaining("model")
+    with deadline(2):
+        assert 1 < request_timeout(5) <= 2
+        assert request_timeout(0.5) == 0.5
+    with deadline(0):
+        assert expired()
+        assert request_timeout(5) == 0.1 and request_timeout(5, floor=0.2) == 0.2
+        with pytest.raises(DeadlineExceeded):
+            check_remaining("model")
+    assert issubclass(DeadlineExceeded, TimeoutError)
+    print("✅ budget clamped between floor and cap")
+
+
+def test_context():
+    """The deadline follows a copied context to a worker thread and stays local to it"""
+    print("\n🔍 Testing the deadline across threads...")
+    seen = {}
+    with deadline(5):
+        # run_in_threadpool runs the call in a copy of the caller's context
+        context = contextvars.copy_context()
+    worker = threading.Thread(target=lambda: seen.update(copied=context.run(remaining)))
+    worker.start()
+    worker.join()
+    assert seen["copied"] is not None and seen["copied"] <= 5
+    assert remaining() is None
+
+    # A thread started without the context has no deadline
+    worker = threading.Thread(target=lambda: seen.update(bare=remaining()))
+    with deadline(5):
+        worker.start()
+        worker.join()
+    assert seen["bare"] is None
+    print("✅ deadline scoped to the turn's context")
+
+
+def test_templates():
+    """Each phase has a reply, with and without a product, from the catalog and the cart"""
+    print("\n🔍 Testing fallback templates...")
+    catalog = Catalog.from_records(PRODUCTS)
+    watch = catalog.record(0)
+
+    greeting = fallback_reply("greeting", catalog)
+    assert all(product["name"] in greeting for product in PRODUCTS[:EXAMPLE_PRODUCTS])
+    assert PRODUCTS[EXAMPLE_PRODUCTS]["name"] not in greeting
+    assert fallback_reply("unknown", catalog) == fallback_reply("product_inquiry", catalog)
+    assert "Smart Watch ki price ₹1999.99" in fallback_reply("product_inquiry", catalog, watch)
+    assert "Smart Watch (₹1999.99)" in fallback_reply("details", catalog, watch)
+    assert "kitne pieces" in fallback_reply("details", catalog)
+
+    cart = Cart()
+    assert "₹0.00" in fallback_reply("checkout", catalog, cart=cart)
+    cart.add(PRODUCTS[1])
+    assert "₹2499.00" in fallback_reply("checkout", catalog, cart=cart)
+    # The product being ordered is added on top of what the cart already holds
+    reply = fallback_reply("checkout", catalog, watch, quantity=2, cart=cart)
+    assert "2 x Smart Watch, total ₹6498.98" in reply, reply
+    assert "kai" in fallback_reply("greeting", Catalog.from_records([]))
+    print("✅ templates filled for every phase")
+
+
+def test_turn_fallback(slow_session):
+    """A turn past its deadline answers from templates and orders nothing"""
+    print("\n🔍 Testing a turn past its deadline...")
+    agent, backend = slow_session
+    before = FALLBACK_REPLIES.value(reason="deadline")
+    started = time.monotonic()
+    with deadline(TURN_DEADLINE):
+        reply = agent.run_conversation_chain("smart watch chahiye")
+    elapsed = time.monotonic() - started
+    assert elapsed < 1.5, f"turn took {elapsed:.2f}s with a {TURN_DEADLINE}s deadline"
+    assert "Smart Watch" in reply, reply
+    assert FALLBACK_REPLIES.value(reason="deadline") == before + 1
+
+    # Checkout from templates asks again instead of placing the order
+    agent.memory.conversation_phase = "details"
+    with deadline(TURN_DEADLINE):
+        reply = agent.run_conversation_chain("haan le lo")
+    assert "confirm" in reply, reply
+    assert backend.count("/api/voice-cart", "POST") == 0
+    assert len(backend.cart) == 0
+    print(f"✅ template reply in {elapsed:.2f}s, no order placed")
+
+
+def main():
+    """Run all tests"""
+    print("🚀 Deadline Test")
+    print("=" * 50)
+
+    logging.disable(logging.CRITICAL)
+    results = {}
+    tests = [("Nesting", test_nesting), ("Budget", test_budget), ("Context", test_context),
+             ("Templates", test_templates)]
+
+    def turn_fallback():
+        with fake_agent(SLOW_MODEL) as agent_and_backend:
+            test_turn_fallback(agent_and_backend)
+
+    tests.append(("Turn fallback", turn_fallback))
+    for test_name, test_func in tests:
+        try:
+            test_func()
+            results[test_name] = True
+        except Exception as e:
+            print(f"❌ {test_name} failed: {e}")
+            results[test_name] = False
+
+    print("\n" + "=" * 50)
+    for test_name, passed in results.items():
+        status = "✅ PASS" if passed else "❌ FAIL"
+        print(f"{status:<10} {test_name}")
+    return 0 if all(results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
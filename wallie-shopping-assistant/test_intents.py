@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Test script for intent matching and phase transitions (offline, no backend)
+"""
+
+import sys
+
+from intents import IntentMatcher, Utterance, detect_event, next_phase
+
+# Message -> event it drives (None: no confirm or decline)
+EVENTS = {
+    "haan": "confirm",
+    "theek hai, le lo": "confirm",
+    "ok done": "confirm",
+    "हाँ, ऑर्डर कर दो": "confirm",
+    "nahi": "decline",
+    "no thanks": "decline",
+    "cancel karo": "decline",
+    "रहने दो": "decline",
+    # Negation next to the verb it negates
+    "nahi lena": "decline",
+    "lena nahi hai": "decline",
+    "haan but nahi lena": "decline",
+    "theek hai but I don't want it": "decline",
+    "haan, nahi chahiye": "decline",
+    "नहीं लेना": "decline",
+    # Negation before any confirm still declines
+    "nahi, theek hai": "decline",
+    # Hinglish asides that are not a decline
+    "haan, koi problem nahi": "confirm",
+    "theek hai, no problem": "confirm",
+    "no problem": "confirm",
+    "haan, pehle wala nahi tha": "confirm",
+    "ok, why not": "confirm",
+    "हाँ, कोई दिक्कत नहीं": "confirm",
+    # Whole words only
+    "book ke baare mein batao": None,
+    "nothing else": None,
+    "kya hai yeh": None,
+}
+# (phase, event) -> next phase
+PHASES = [
+    ("greeting", "product", "product_inquiry"),
+    ("greeting", "confirm", "product_inquiry"),
+    ("greeting", "decline", "greeting"),
+    ("product_inquiry", "confirm", "details"),
+    ("product_inquiry", "decline", "product_inquiry"),
+    ("product_inquiry", "product", "product_inquiry"),
+    ("details", "confirm", "checkout"),
+    ("details", "decline", "details"),
+    ("checkout", "confirm", "checkout"),
+    ("checkout", "cart_added", "product_inquiry"),
+    ("details", "cart_added", "product_inquiry"),
+    ("product_inquiry", "cart_added", "product_inquiry"),
+    ("checkout", None, "checkout"),
+]
+
+
+def event_for(matcher, text, mentions_product=False):
+    return detect_event(Utterance(matcher.match(text), None, mentions_product))
+
+
+def test_intent_events():
+    """Confirm and decline, with negation only counting next to its verb"""
+    print("🔍 Testing intent events...")
+    matcher = IntentMatcher()
+    for text, expected in EVENTS.items():
+        event = event_for(matcher, text)
+        assert event == expected, f"{text!r} -> {event!r}, expected {expected!r}"
+    print(f"✅ {len(EVENTS)} messages gave their event")
+
+
+def test_product_event():
+    """A product mention is an event only without a confirm or decline"""
+    print("\n🔍 Testing product events...")
+    matcher = IntentMatcher()
+    assert event_for(matcher, "smart watch dikhao", mentions_product=True) == "product"
+    assert event_for(matcher, "haan smart watch", mentions_product=True) == "confirm"
+    assert event_for(matcher, "smart watch nahi", mentions_product=True) == "decline"
+    print("✅ product mentions ranked below intents")
+
+
+def test_phase_transitions():
+    """next_phase follows the TRANSITIONS table and keeps unlisted pairs"""
+    print("\n🔍 Testing phase transitions...")
+    for phase, event, expected in PHASES:
+        assert next_phase(phase, event) == expected, \
+            f"{phase} + {event} -> {next_phase(phase, event)}, expected {expected}"
+    print(f"✅ {len(PHASES)} transitions")
+
+
+def main():
+    """Run all tests"""
+    print("🚀 Intent Test")
+    print("=" * 50)
+
+    results = {}
+    for test_name, test_func in [("Intent events", test_intent_events),
+                                 ("Product events", test_product_event),
+                                 ("Phase transitions", test_phase_transitions)]:
+        try:
+            test_func()
+            results[test_name] = True
+        except Exception as e:
+            print(f"❌ {test_name} failed: {e}")
+            results[test_name] = False
+
+    print("\n" + "=" * 50)
+    for test_name, passed in results.items():
+        status = "✅ PASS" if passed else "❌ FAIL"
+        print(f"{status:<10} {test_name}")
+    return 0 if all(results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
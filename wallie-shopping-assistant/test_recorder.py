@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Test script for turn recording (offline, fake model and backend)
+"""
+
+import logging
+import os
+import sys
+import tempfile
+
+import pytest
+
+from recorder import MemoryRecorder, default_recorder, read_records
+from speculation import Speculator
+from test_checkout import fake_agent
+
+TEXT = "smart watch chahiye"
+
+
+@pytest.fixture
+def session():
+    with fake_agent() as agent_and_backend:
+        yield agent_and_backend
+
+
+def test_speculative_record(session):
+    """A turn answered from a speculative draft records the draft's prompt and model time"""
+    print("🔍 Testing a speculative turn's record...")
+    agent, _ = session
+    agent.recorder = MemoryRecorder()
+    speculator = Speculator(agent)
+    assert speculator.interim(TEXT) == "started"
+    speculator._pending.future.result(timeout=5)
+    speculator.final(TEXT)
+
+    record = agent.recorder.entries[-1]
+    assert record["speculative"] is True
+    assert TEXT in record["prompt"] and record["model_s"] >= 0 and record["model"]
+    assert record["input"] == TEXT and record["phase"] == "product_inquiry"
+
+    agent.run_conversation_chain("kitne ka hai")
+    record = agent.recorder.entries[-1]
+    assert "speculative" not in record and "kitne ka hai" in record["prompt"]
+    print(f"✅ prompt and model_s ({record['model_s']}s) recorded")
+
+
+def test_default_recorder_path():
+    """A new RECORD_PATH closes the previous file, and a closed recorder drops turns"""
+    print("\n🔍 Testing a RECORD_PATH change...")
+    import settings
+
+    saved = settings.RECORD_PATH
+    with tempfile.TemporaryDirectory() as tmp:
+        first_path, second_path = os.path.join(tmp, "first.jsonl"), os.path.join(tmp, "second.jsonl")
+        try:
+            settings.RECORD_PATH = first_path
+            first = default_recorder()
+            assert default_recorder() is first
+            first.record({"turn": 0})
+            settings.RECORD_PATH = second_path
+            second = default_recorder()
+            assert second is not first and first._fd is None
+            first.record({"turn": 1})
+            second.record({"turn": 2})
+            settings.RECORD_PATH = None
+            assert default_recorder() is None
+        finally:
+            settings.RECORD_PATH = saved
+            second.close()
+        assert [r["turn"] for r in read_records(first_path)] == [0]
+        assert [r["turn"] for r in read_records(second_path)] == [2]
+    print("✅ old file closed, turns go to the new one")
+
+
+def main():
+    """Run all tests"""
+    print("🚀 Recorder Test")
+    print("=" * 50)
+
+    logging.disable(logging.CRITICAL)
+    results = {}
+
+    def speculative_record():
+        with fake_agent() as agent_and_backend:
+            test_speculative_record(agent_and_backend)
+
+    for test_name, test_func in [("Speculative record", speculative_record),
+                                 ("Default recorder path", test_default_recorder_path)]:
+        try:
+            test_func()
+            results[test_name] = True
+        except Exception as e:
+            print(f"❌ {test_name} failed: {e}")
+            results[test_name] = False
+
+    print("\n" + "=" * 50)
+    for test_name, passed in results.items():
+        status = "✅ PASS" if passed else "❌ FAIL"
+        print(f"{status:<10} {test_name}")
+    return 0 if all(results.values()) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
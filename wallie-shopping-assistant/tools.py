@@ -0,0 +1,159 @@
+from typing import Any, Dict, List, NamedTuple, Optional
+
+import google.generativeai as genai
+
+from catalog import format_price, parse_price
+
+# Most pieces of one product a single voice order may add
+MAX_QUANTITY = 20
+# Model calls per turn, including follow-ups that return tool results
+MAX_TOOL_ROUNDS = 3
+SEARCH_LIMIT = 5
+
+# Functions the model can call instead of describing an action in text
+FUNCTION_DECLARATIONS = [
+    {
+        "name": "add_to_cart",
+        "description": "Add a product to the customer's cart once they have confirmed the order.",
+        "parameters": {
+            "type": "object",
+            "properties": {
+                "product_id": {"type": "integer", "description": "id of the product to add"},
+                "quantity": {"type": "integer", "description": "number of pieces (default 1)"},
+            },
+            "required": ["product_id"],
+        },
+    },
+    {
+        "name": "search_products",
+        "description": "Find products by name, description or category; returns ids and prices.",
+        "parameters": {
+            "type": "object",
+            "properties": {"query": {"type": "string", "description": "what the customer asked for"}},
+            "required": ["query"],
+        },
+    },
+    {
+        "name": "get_price",
+        "description": "Exact price of one product, by name or id.",
+        "parameters": {
+            "type": "object",
+            "properties": {"product": {"type": "string", "description": "product name or id"}},
+            "required": ["product"],
+        },
+    },
+]
+TOOLS = [{"function_declarations": FUNCTION_DECLARATIONS}]
+TOOL_NAMES = {declaration["name"] for declaration in FUNCTION_DECLARATIONS}
+
+
+class ToolCall(NamedTuple):
+    name: str
+    args: Dict[str, Any]
+
+
+class ModelReply(NamedTuple):
+    """One model response: its text, the functions it called, and what was sent.
+
+    `model`, `request` and `content` (the model's turn) are kept so tool
+    results can be sent back in a follow-up call, possibly after a
+    speculative draft.
+    """
+    text: str
+    calls: List[ToolCall]
+    model: Any
+    request: Any
+    content: Any
+
+
+def parse_response(response: Any, model: Any, request: Any) -> ModelReply:
+    """Text and function calls of a generate_content response.
+
+    response.text raises when the model answered only with a function call,
+    so the parts are read directly.
+    """
+    texts, calls = [], []
+    parts = getattr(response, "parts", None)
+    if parts is None:
+        return ModelReply(getattr(response, "text", str(response)), [], model, request, None)
+    for part in parts:
+        call = getattr(part, "function_call", None)
+        if call is not None and call.name:
+            calls.append(ToolCall(call.name, dict(call.args or {})))
+        elif getattr(part, "text", ""):
+            texts.append(part.text)
+    candidates = getattr(response, "candidates", None)
+    content = candidates[0].content if candidates else None
+    return ModelReply("".join(texts).strip(), calls, model, request, content)
+
+
+def follow_up(reply: ModelReply, results: List[Dict[str, Any]]) -> List[Any]:
+    """Contents for the call that hands the tool results back to the model."""
+    history = reply.request if isinstance(reply.request, list) else [{"role": "user", "parts": [reply.request]}]
+    responses = [
+        genai.protos.Part(function_response=genai.protos.FunctionResponse(name=call.name, response=result))
+        for call, result in zip(reply.calls, results)
+    ]
+    return history + [reply.content, genai.protos.Content(role="user", parts=responses)]
+
+
+def _integer(value: Any, default: int) -> int:
+    # Function call arguments arrive as floats (protobuf Struct numbers)
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+class ShoppingTools:
+    """Executes the model's function calls for one agent.
+
+    add_to_cart goes through the agent (cart API, local cart, recording);
+    search_products and get_price are answered from the in-memory catalog.
+    """
+
+    def __init__(self, agent):
+        self.agent = agent
+
+    def execute(self, call: ToolCall) -> Dict[str, Any]:
+        handler = getattr(self, f"_{call.name}", None) if call.name in TOOL_NAMES else None
+        if handler is None:
+            return {"error": f"unknown function {call.name}"}
+        try:
+            return handler(**call.args)
+        except TypeError as e:
+            return {"error": f"bad arguments for {call.name}: {e}"}
+
+    def _product(self, product_id: Any) -> Optional[Dict[str, Any]]:
+        catalog = self.agent.product_service.catalog
+        row = catalog.row_for_id(_integer(product_id, -1))
+        return None if row is None else catalog.record(row)
+
+    def _add_to_cart(self, product_id: Any, quantity: Any = 1) -> Dict[str, Any]:
+        product = self._product(product_id)
+        if product is None:
+            return {"ok": False, "error": f"no product with id {_integer(product_id, product_id)}"}
+        quantity = _integer(quantity, 1)
+        if not 1 <= quantity <= MAX_QUANTITY:
+            return {"ok": False, "error": f"quantity must be between 1 and {MAX_QUANTITY}"}
+        ok = self.agent.add_to_cart(product, quantity)
+        result = {"ok": ok, "product_id": product["id"], "name": product["name"], "quantity": quantity}
+        if ok and self.agent.cart.synced:
+            result["cart_total"] = format_price(self.agent.cart.total())
+        return result
+
+    def _search_products(self, query: str = "") -> Dict[str, Any]:
+        matches = self.agent.product_service.search_products(str(query))[:SEARCH_LIMIT]
+        if not matches:
+            product = self.agent.product_service.get_product_by_name(str(query))
+            matches = [product] if product else []
+        return {"products": [{"product_id": p["id"], "name": p["name"], "price": p["price"]} for p in matches]}
+
+    def _get_price(self, product: str = "") -> Dict[str, Any]:
+        text = str(product).strip()
+        found = self._product(text) if text.isdigit() else self.agent.product_service.get_product_by_name(text)
+        if not found:
+            return {"error": f"no product matching {text!r}"}
+        return {"product_id": found["id"], "name": found["name"],
+                "price": format_price(parse_price(found["price"]))}
+
@@ -0,0 +1,142 @@
+import asyncio
+import hashlib
+import logging
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, Iterator, Optional
+
+from metrics import span
+from settings import SPEECH_LANGUAGE, SPEECH_TLD, TTS_SLOW, TTS_WORKERS, TTS_QUEUE, TTS_CACHE_MB
+
+logger = logging.getLogger(__name__)
+
+
+def clean_text(text: str) -> str:
+    """Drop characters gTTS would read out (emoji, markdown), keeping Devanagari."""
+    return re.sub(r'[^\w\u0900-\u097F\s.,!?-]', '', text).strip()
+
+
+def synthesize(text: str, language: str = SPEECH_LANGUAGE, tld: str = SPEECH_TLD,
+               slow: bool = TTS_SLOW) -> Iterator[bytes]:
+    """MP3 audio for a reply, yielded sentence by sentence as gTTS produces it."""
+    from gtts import gTTS
+    cleaned = clean_text(text)
+    if not cleaned:
+        return
+    yield from gTTS(text=cleaned, lang=language.split('-')[0], slow=slow, tld=tld).stream()
+
+
+def audio_etag(text: str, language: str = SPEECH_LANGUAGE, tld: str = SPEECH_TLD,
+               slow: bool = TTS_SLOW) -> str:
+    """Strong ETag: the audio depends only on the cleaned text and voice settings."""
+    key = f"{language}|{tld}|{int(slow)}|{clean_text(text)}"
+    return '"' + hashlib.sha256(key.encode("utf-8")).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match check (weak comparison, as RFC 9110 asks for GET)."""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+
+class AudioCache:
+    """Audio of finished syntheses by ETag, least recently used dropped past `max_bytes`.
+
+    Only audio synthesized to the end is stored, so only it is served with
+    a long-lived validator; a synthesis that failed part-way never is.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, etag: str) -> Optional[bytes]:
+        with self._lock:
+            audio = self._entries.get(etag)
+            if audio is not None:
+                self._entries.move_to_end(etag)
+            return audio
+
+    def put(self, etag: str, audio: bytes) -> None:
+        if not audio or len(audio) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._entries.pop(etag, None)
+            self._size += len(audio) - len(previous or b"")
+            self._entries[etag] = audio
+            while self._size > self.max_bytes:
+                _, dropped = self._entries.popitem(last=False)
+                self._size -= len(dropped)
+
+
+class TTSPool:
+    """Bounded pool for speech synthesis, separate from the /chat threads.
+
+    At most `workers` syntheses run and `queue` more wait; submit() returns
+    None beyond that so callers can shed load instead of queueing forever.
+    Audio is handed to the event loop chunk by chunk as gTTS produces it,
+    and kept in `cache` once a synthesis completes.
+    """
+
+    def __init__(self, workers: int = TTS_WORKERS, queue: int = TTS_QUEUE,
+                 cache: Optional[AudioCache] = None):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tts")
+        self._slots = threading.BoundedSemaphore(workers + queue)
+        self.cache = cache
+
+    def submit(self, text: str) -> Optional[AsyncIterator[bytes]]:
+        """Start synthesizing; None when the pool is full. Call from the event loop."""
+        if not self._slots.acquire(blocking=False):
+            return None
+        loop = asyncio.get_running_loop()
+        chunks: asyncio.Queue = asyncio.Queue()
+
+        def produce() -> None:
+            try:
+                audio = []
+                with span("tts"):
+                    for chunk in synthesize(text):
+                        audio.append(chunk)
+                        loop.call_soon_threadsafe(chunks.put_nowait, chunk)
+                if self.cache is not None:
+                    self.cache.put(audio_etag(text), b"".join(audio))
+                loop.call_soon_threadsafe(chunks.put_nowait, None)
+            except Exception as e:
+                loop.call_soon_threadsafe(chunks.put_nowait, e)
+            finally:
+                self._slots.release()
+
+        try:
+            self._executor.submit(produce)
+        except Exception:
+            self._slots.release()
+            raise
+        return self._drain(chunks)
+
+    async def _drain(self, chunks: asyncio.Queue) -> AsyncIterator[bytes]:
+        while True:
+            chunk = await chunks.get()
+            if chunk is None:
+                return
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+
+
+_pool: Optional[TTSPool] = None
+_pool_lock = threading.Lock()
+
+
+def tts_pool() -> TTSPool:
+    """Process-wide pool shared by /tts and /ws/voice."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = TTSPool(cache=AudioCache(TTS_CACHE_MB * 1024 * 1024))
+        return _pool
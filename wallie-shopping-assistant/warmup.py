@@ -0,0 +1,102 @@
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks while the catalog is still the built-in samples
+CATALOG_POLL = 1.0
+
+
+class Readiness:
+    """Warm-up progress of this process, served by /readyz.
+
+    Each step is timed and its error kept. The process is ready once every
+    step has run and the catalog came from the API or a snapshot; a failed
+    connection or model ping is reported but does not hold traffic back,
+    since turns still get template replies (see fallback.py).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self.state = "starting"  # starting, warming, ready or failed
+        self.ready_after: Optional[float] = None
+        self.steps: Dict[str, Dict[str, Any]] = {}
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def step(self, name: str, function: Callable[[], Any]) -> Any:
+        """Run one warm-up step, recording its time and any error; returns its result or None.
+
+        A step that returns False counts as failed.
+        """
+        started = time.perf_counter()
+        result, error = None, None
+        try:
+            result = function()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            logger.warning(f"Warm-up step {name} failed: {error}")
+        with self._lock:
+            self.steps[name] = {"ms": round((time.perf_counter() - started) * 1000, 1),
+                                "ok": error is None and result is not False}
+            if error:
+                self.steps[name]["error"] = error
+        return result
+
+    def finish(self, ok: bool) -> None:
+        with self._lock:
+            self.state = "ready" if ok else "failed"
+            self.ready_after = round(time.monotonic() - self._started, 3)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"status": self.state, "ready_after_s": self.ready_after, "steps": dict(self.steps)}
+
+
+def load_catalog(default_agent: Callable[[], Any], poll: float = CATALOG_POLL) -> Any:
+    """The default agent, once its catalog is a real one rather than the built-in samples."""
+    agent = default_agent()
+    service = agent.product_service
+    if service.degraded:
+        logger.warning("Products API unavailable, staying unready until it answers")
+    while service.degraded:
+        time.sleep(poll)
+        # Retries the API in the background, at most every FALLBACK_RETRY_INTERVAL
+        service.ensure_loaded()
+    return agent
+
+
+def ping_model(agent) -> int:
+    """A token count on the agent's model, under the turn deadline: no reply, no tools, no generation quota."""
+    from deadline import deadline
+    import settings
+
+    with deadline(settings.TURN_DEADLINE):
+        return agent.ping_model()
+
+
+def warm_up(default_agent: Callable[[], Any], readiness: Readiness) -> None:
+    """Get this process ready for its first real turn.
+
+    Loads the catalog through the default agent (waiting out the sample
+    fallback), opens a pooled connection to the products and cart API,
+    builds the product index and prompt prefixes, and counts the tokens of
+    a prompt, which sets up the model client's connection without
+    generating anything or touching the cart.
+    """
+    readiness.state = "warming"
+    agent = readiness.step("catalog", lambda: load_catalog(default_agent))
+    if agent is None or not len(agent.product_service.catalog):
+        readiness.finish(False)
+        return
+    service = agent.product_service
+    readiness.step("api_connection", service.warm_connection)
+    readiness.step("caches", agent.prime_caches)
+    readiness.step("model", lambda: ping_model(agent))
+    readiness.finish(True)
+    logger.info(f"Warm-up done in {readiness.ready_after}s: {readiness.snapshot()['steps']}")